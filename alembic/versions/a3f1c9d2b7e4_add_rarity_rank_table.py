@@ -0,0 +1,40 @@
+"""Add rarity rank table
+
+Revision ID: a3f1c9d2b7e4
+Revises: 4cc7c496d25b
+Create Date: 2026-10-19 18:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f1c9d2b7e4'
+down_revision: Union[str, None] = '4cc7c496d25b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RARITY_ORDER = ['Bronze', 'Silver', 'Gold', 'Diamond', 'Legendary']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    rarities = op.create_table(
+        'rarities',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False, unique=True),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+    op.execute("DELETE FROM rarities")
+    op.bulk_insert(rarities, [
+        {'id': rank, 'name': name, 'rank': rank} for rank, name in enumerate(RARITY_ORDER, start=1)
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rarities')
@@ -0,0 +1,33 @@
+"""Add indexes for the whitelisted video sort keys and the title prefix filter
+
+Revision ID: a8c3e5f7b9d2
+Revises: f7a2d4b6c8e0
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c3e5f7b9d2'
+down_revision: Union[str, None] = 'f7a2d4b6c8e0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NOCASE so that the case-insensitive LIKE 'prefix%' and ORDER BY title COLLATE NOCASE use it
+    op.execute("CREATE INDEX IF NOT EXISTS idx_video_title ON videos (title COLLATE NOCASE)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_video_status_date ON videos (status, date)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_video_type_date ON videos (type, date)")
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_video_type_date', table_name='videos', if_exists=True)
+    op.drop_index('idx_video_status_date', table_name='videos', if_exists=True)
+    op.drop_index('idx_video_title', table_name='videos', if_exists=True)
@@ -0,0 +1,64 @@
+"""Add covering indexes on child and association tables
+
+Revision ID: b8e2d4f6a1c3
+Revises: a3f1c9d2b7e4
+Create Date: 2026-10-19 18:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e2d4f6a1c3'
+down_revision: Union[str, None] = 'a3f1c9d2b7e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Single-column value indexes replaced by (value, entity_id) versions of the same name
+REPLACED = {
+    'idx_item_rarity': ('item_rarities', ['rarity']),
+    'idx_item_type': ('item_types', ['type']),
+    'idx_item_hero': ('item_heroes', ['hero']),
+    'idx_skill_rarity': ('skill_rarities', ['rarity']),
+    'idx_skill_type': ('skill_types', ['type']),
+    'idx_skill_hero': ('skill_heroes', ['hero']),
+}
+
+INDEXES = [
+    ('idx_item_rarities_item', 'item_rarities', ['item_id', 'rarity']),
+    ('idx_item_rarity', 'item_rarities', ['rarity', 'item_id']),
+    ('idx_item_types_item', 'item_types', ['item_id', 'type']),
+    ('idx_item_type', 'item_types', ['type', 'item_id']),
+    ('idx_item_heroes_item', 'item_heroes', ['item_id', 'hero']),
+    ('idx_item_hero', 'item_heroes', ['hero', 'item_id']),
+    ('idx_item_effects_item', 'item_effects', ['item_id', 'effect']),
+    ('idx_skill_rarities_skill', 'skill_rarities', ['skill_id', 'rarity']),
+    ('idx_skill_rarity', 'skill_rarities', ['rarity', 'skill_id']),
+    ('idx_skill_types_skill', 'skill_types', ['skill_id', 'type']),
+    ('idx_skill_type', 'skill_types', ['type', 'skill_id']),
+    ('idx_skill_heroes_skill', 'skill_heroes', ['skill_id', 'hero']),
+    ('idx_skill_hero', 'skill_heroes', ['hero', 'skill_id']),
+    ('idx_skill_effects_skill', 'skill_effects', ['skill_id', 'effect']),
+    ('idx_video_skills_skill', 'video_skills', ['skill_id', 'video_id']),
+    ('idx_video_items_item', 'video_items', ['item_id', 'video_id']),
+    ('idx_video_heroes_hero', 'video_heroes', ['hero_name', 'video_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name in REPLACED:
+        op.drop_index(name, if_exists=True)
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, columns in INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+    for name, (table, columns) in REPLACED.items():
+        op.create_index(name, table, columns, if_not_exists=True)
@@ -0,0 +1,52 @@
+"""Add the videos_fts full-text index over video titles and descriptions
+
+Revision ID: b9d4f6a8c1e3
+Revises: a8c3e5f7b9d2
+Create Date: 2026-10-19 22:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9d4f6a8c1e3'
+down_revision: Union[str, None] = 'a8c3e5f7b9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same statements as db.models.VIDEOS_FTS_DDL
+VIDEOS_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+        title, description, content='videos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    # rank (bm25) weighs a title match ten times a description match; stored with the index
+    """INSERT INTO videos_fts (videos_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')""",
+    """CREATE TRIGGER IF NOT EXISTS videos_fts_insert AFTER INSERT ON videos BEGIN
+        INSERT INTO videos_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS videos_fts_delete AFTER DELETE ON videos BEGIN
+        INSERT INTO videos_fts (videos_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS videos_fts_update AFTER UPDATE OF title, description ON videos BEGIN
+        INSERT INTO videos_fts (videos_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO videos_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for statement in VIDEOS_FTS_DDL:
+        op.execute(statement)
+    # Index the videos already in the table
+    op.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for trigger in ('videos_fts_insert', 'videos_fts_delete', 'videos_fts_update'):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS videos_fts")
@@ -0,0 +1,129 @@
+"""Add item/skill/hero co-occurrence counts kept in sync by triggers on the video associations
+
+Revision ID: c1e5a7b9d3f4
+Revises: b9d4f6a8c1e3
+Create Date: 2026-10-19 23:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1e5a7b9d3f4'
+down_revision: Union[str, None] = 'b9d4f6a8c1e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, key column, key table, other column, other table, top-N index names)
+TABLES = [
+    ('item_cooccurrence', 'item_id', 'items', 'other_item_id', 'items', ['idx_item_cooccurrence_top']),
+    ('item_skill_cooccurrence', 'item_id', 'items', 'skill_id', 'skills',
+     ['idx_item_skill_cooccurrence_item_top', 'idx_item_skill_cooccurrence_skill_top']),
+    ('hero_item_cooccurrence', 'hero_id', 'heroes', 'item_id', 'items', ['idx_hero_item_cooccurrence_top']),
+]
+
+# Same statements as db.models.COOCCURRENCE_TRIGGERS
+TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS video_items_cooccurrence_insert AFTER INSERT ON video_items BEGIN
+        INSERT INTO item_cooccurrence (item_id, other_item_id, video_count)
+            SELECT new.item_id, item_id, 1 FROM video_items WHERE video_id = new.video_id AND item_id != new.item_id
+            UNION ALL
+            SELECT item_id, new.item_id, 1 FROM video_items WHERE video_id = new.video_id AND item_id != new.item_id
+            ON CONFLICT (item_id, other_item_id) DO UPDATE SET video_count = video_count + 1;
+        INSERT INTO item_skill_cooccurrence (item_id, skill_id, video_count)
+            SELECT new.item_id, skill_id, 1 FROM video_skills WHERE video_id = new.video_id
+            ON CONFLICT (item_id, skill_id) DO UPDATE SET video_count = video_count + 1;
+        INSERT INTO hero_item_cooccurrence (hero_id, item_id, video_count)
+            SELECT hero_id, new.item_id, 1 FROM video_heroes WHERE video_id = new.video_id
+            ON CONFLICT (hero_id, item_id) DO UPDATE SET video_count = video_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS video_items_cooccurrence_delete AFTER DELETE ON video_items BEGIN
+        UPDATE item_cooccurrence SET video_count = video_count - 1
+            WHERE item_id = old.item_id AND other_item_id IN (SELECT item_id FROM video_items WHERE video_id = old.video_id);
+        UPDATE item_cooccurrence SET video_count = video_count - 1
+            WHERE other_item_id = old.item_id AND item_id IN (SELECT item_id FROM video_items WHERE video_id = old.video_id);
+        DELETE FROM item_cooccurrence WHERE item_id = old.item_id AND video_count = 0;
+        DELETE FROM item_cooccurrence
+            WHERE other_item_id = old.item_id AND video_count = 0
+            AND item_id IN (SELECT item_id FROM video_items WHERE video_id = old.video_id);
+        UPDATE item_skill_cooccurrence SET video_count = video_count - 1
+            WHERE item_id = old.item_id AND skill_id IN (SELECT skill_id FROM video_skills WHERE video_id = old.video_id);
+        DELETE FROM item_skill_cooccurrence WHERE item_id = old.item_id AND video_count = 0;
+        UPDATE hero_item_cooccurrence SET video_count = video_count - 1
+            WHERE item_id = old.item_id AND hero_id IN (SELECT hero_id FROM video_heroes WHERE video_id = old.video_id);
+        DELETE FROM hero_item_cooccurrence
+            WHERE item_id = old.item_id AND video_count = 0
+            AND hero_id IN (SELECT hero_id FROM video_heroes WHERE video_id = old.video_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS video_skills_cooccurrence_insert AFTER INSERT ON video_skills BEGIN
+        INSERT INTO item_skill_cooccurrence (item_id, skill_id, video_count)
+            SELECT item_id, new.skill_id, 1 FROM video_items WHERE video_id = new.video_id
+            ON CONFLICT (item_id, skill_id) DO UPDATE SET video_count = video_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS video_skills_cooccurrence_delete AFTER DELETE ON video_skills BEGIN
+        UPDATE item_skill_cooccurrence SET video_count = video_count - 1
+            WHERE skill_id = old.skill_id AND item_id IN (SELECT item_id FROM video_items WHERE video_id = old.video_id);
+        DELETE FROM item_skill_cooccurrence WHERE skill_id = old.skill_id AND video_count = 0;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS video_heroes_cooccurrence_insert AFTER INSERT ON video_heroes BEGIN
+        INSERT INTO hero_item_cooccurrence (hero_id, item_id, video_count)
+            SELECT new.hero_id, item_id, 1 FROM video_items WHERE video_id = new.video_id
+            ON CONFLICT (hero_id, item_id) DO UPDATE SET video_count = video_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS video_heroes_cooccurrence_delete AFTER DELETE ON video_heroes BEGIN
+        UPDATE hero_item_cooccurrence SET video_count = video_count - 1
+            WHERE hero_id = old.hero_id AND item_id IN (SELECT item_id FROM video_items WHERE video_id = old.video_id);
+        DELETE FROM hero_item_cooccurrence WHERE hero_id = old.hero_id AND video_count = 0;
+    END""",
+]
+
+# Same statements as db.analytics.REBUILD_SQL
+REBUILD_SQL = [
+    "DELETE FROM item_cooccurrence",
+    """INSERT INTO item_cooccurrence (item_id, other_item_id, video_count)
+        SELECT a.item_id, b.item_id, COUNT(*) FROM video_items a
+        JOIN video_items b ON b.video_id = a.video_id AND b.item_id != a.item_id
+        GROUP BY a.item_id, b.item_id""",
+    "DELETE FROM item_skill_cooccurrence",
+    """INSERT INTO item_skill_cooccurrence (item_id, skill_id, video_count)
+        SELECT i.item_id, s.skill_id, COUNT(*) FROM video_items i
+        JOIN video_skills s ON s.video_id = i.video_id
+        GROUP BY i.item_id, s.skill_id""",
+    "DELETE FROM hero_item_cooccurrence",
+    """INSERT INTO hero_item_cooccurrence (hero_id, item_id, video_count)
+        SELECT h.hero_id, i.item_id, COUNT(*) FROM video_heroes h
+        JOIN video_items i ON i.video_id = h.video_id
+        GROUP BY h.hero_id, i.item_id""",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, key_column, key_table, other_column, other_table, indexes in TABLES:
+        op.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {key_column} INTEGER NOT NULL,
+                {other_column} INTEGER NOT NULL,
+                video_count INTEGER NOT NULL,
+                PRIMARY KEY ({key_column}, {other_column}),
+                FOREIGN KEY ({key_column}) REFERENCES {key_table}(id),
+                FOREIGN KEY ({other_column}) REFERENCES {other_table}(id)
+            ) WITHOUT ROWID
+        """)
+        op.execute(f"CREATE INDEX IF NOT EXISTS {indexes[0]} ON {table} ({key_column}, video_count, {other_column})")
+        if len(indexes) > 1:
+            op.execute(f"CREATE INDEX IF NOT EXISTS {indexes[1]} ON {table} ({other_column}, video_count, {key_column})")
+    for statement in TRIGGERS + REBUILD_SQL:
+        op.execute(statement)
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('video_items', 'video_skills', 'video_heroes'):
+        for event in ('insert', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_cooccurrence_{event}")
+    for table, key_column, key_table, other_column, other_table, indexes in TABLES:
+        op.execute(f"DROP TABLE IF EXISTS {table}")
@@ -0,0 +1,143 @@
+"""Add hero and type dimension tables; child tables reference heroes, types and rarities by id
+
+Revision ID: c4d7a9e1f2b5
+Revises: b8e2d4f6a1c3
+Create Date: 2026-10-19 19:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d7a9e1f2b5'
+down_revision: Union[str, None] = 'b8e2d4f6a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, owner column, owner table, name column, id column, dimension table)
+CHILD_TABLES = [
+    ('item_heroes', 'item_id', 'items', 'hero', 'hero_id', 'heroes'),
+    ('item_types', 'item_id', 'items', 'type', 'type_id', 'types'),
+    ('item_rarities', 'item_id', 'items', 'rarity', 'rarity_id', 'rarities'),
+    ('skill_heroes', 'skill_id', 'skills', 'hero', 'hero_id', 'heroes'),
+    ('skill_types', 'skill_id', 'skills', 'type', 'type_id', 'types'),
+    ('skill_rarities', 'skill_id', 'skills', 'rarity', 'rarity_id', 'rarities'),
+]
+
+# Indexes on the rebuilt tables, as (owner-first name, value-first name, table, value column, owner column)
+INDEXES = [
+    ('idx_item_heroes_item', 'idx_item_hero', 'item_heroes', 'hero', 'item_id'),
+    ('idx_item_types_item', 'idx_item_type', 'item_types', 'type', 'item_id'),
+    ('idx_item_rarities_item', 'idx_item_rarity', 'item_rarities', 'rarity', 'item_id'),
+    ('idx_skill_heroes_skill', 'idx_skill_hero', 'skill_heroes', 'hero', 'skill_id'),
+    ('idx_skill_types_skill', 'idx_skill_type', 'skill_types', 'type', 'skill_id'),
+    ('idx_skill_rarities_skill', 'idx_skill_rarity', 'skill_rarities', 'rarity', 'skill_id'),
+    ('idx_video_heroes', 'idx_video_heroes_hero', 'video_heroes', 'hero_name', 'video_id'),
+]
+
+
+def _create_indexes(id_columns):
+    for owner_index, value_index, table, value_column, owner_column in INDEXES:
+        value_column = id_columns.get(value_column, value_column)
+        op.execute(f"CREATE INDEX IF NOT EXISTS {owner_index} ON {table} ({owner_column}, {value_column})")
+        op.execute(f"CREATE INDEX IF NOT EXISTS {value_index} ON {table} ({value_column}, {owner_column})")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE TABLE IF NOT EXISTS heroes (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+    op.execute("CREATE TABLE IF NOT EXISTS types (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+
+    # Backfill the dimensions from the names in use; unknown rarities rank after the known ones
+    op.execute("""
+        INSERT OR IGNORE INTO heroes (name)
+        SELECT hero FROM item_heroes UNION SELECT hero FROM skill_heroes UNION SELECT hero_name FROM video_heroes
+        ORDER BY 1
+    """)
+    op.execute("""
+        INSERT OR IGNORE INTO types (name)
+        SELECT type FROM item_types UNION SELECT type FROM skill_types
+        ORDER BY 1
+    """)
+    op.execute("""
+        INSERT INTO rarities (name, rank)
+        SELECT name, (SELECT COALESCE(MAX(rank), 0) FROM rarities) + ROW_NUMBER() OVER (ORDER BY name)
+        FROM (SELECT rarity AS name FROM item_rarities UNION SELECT rarity FROM skill_rarities)
+        WHERE name NOT IN (SELECT name FROM rarities)
+    """)
+
+    # SQLite cannot change a column's type in place: rebuild each child table with the id column
+    for table, owner_column, owner_table, name_column, id_column, dimension in CHILD_TABLES:
+        op.execute(f"""
+            CREATE TABLE {table}_new (
+                {owner_column} INTEGER,
+                {id_column} INTEGER NOT NULL,
+                FOREIGN KEY ({owner_column}) REFERENCES {owner_table}(id),
+                FOREIGN KEY ({id_column}) REFERENCES {dimension}(id)
+            )
+        """)
+        op.execute(f"""
+            INSERT INTO {table}_new ({owner_column}, {id_column})
+            SELECT c.{owner_column}, d.id FROM {table} c JOIN {dimension} d ON d.name = c.{name_column}
+        """)
+        op.execute(f"DROP TABLE {table}")
+        op.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+    op.execute("""
+        CREATE TABLE video_heroes_new (
+            video_id INTEGER NOT NULL,
+            hero_id INTEGER NOT NULL,
+            PRIMARY KEY (video_id, hero_id),
+            FOREIGN KEY (video_id) REFERENCES videos(id) ON DELETE CASCADE,
+            FOREIGN KEY (hero_id) REFERENCES heroes(id)
+        )
+    """)
+    op.execute("""
+        INSERT OR IGNORE INTO video_heroes_new (video_id, hero_id)
+        SELECT v.video_id, h.id FROM video_heroes v JOIN heroes h ON h.name = v.hero_name
+    """)
+    op.execute("DROP TABLE video_heroes")
+    op.execute("ALTER TABLE video_heroes_new RENAME TO video_heroes")
+
+    _create_indexes({'hero': 'hero_id', 'type': 'type_id', 'rarity': 'rarity_id', 'hero_name': 'hero_id'})
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, owner_column, owner_table, name_column, id_column, dimension in CHILD_TABLES:
+        op.execute(f"""
+            CREATE TABLE {table}_old (
+                {owner_column} INTEGER,
+                {name_column} TEXT NOT NULL,
+                FOREIGN KEY ({owner_column}) REFERENCES {owner_table}(id)
+            )
+        """)
+        op.execute(f"""
+            INSERT INTO {table}_old ({owner_column}, {name_column})
+            SELECT c.{owner_column}, d.name FROM {table} c JOIN {dimension} d ON d.id = c.{id_column}
+        """)
+        op.execute(f"DROP TABLE {table}")
+        op.execute(f"ALTER TABLE {table}_old RENAME TO {table}")
+
+    op.execute("""
+        CREATE TABLE video_heroes_old (
+            video_id INTEGER NOT NULL,
+            hero_name VARCHAR NOT NULL,
+            PRIMARY KEY (video_id, hero_name),
+            FOREIGN KEY (video_id) REFERENCES videos(id) ON DELETE CASCADE
+        )
+    """)
+    op.execute("""
+        INSERT INTO video_heroes_old (video_id, hero_name)
+        SELECT v.video_id, h.name FROM video_heroes v JOIN heroes h ON h.id = v.hero_id
+    """)
+    op.execute("DROP TABLE video_heroes")
+    op.execute("ALTER TABLE video_heroes_old RENAME TO video_heroes")
+
+    _create_indexes({})
+    # Rarities added by the upgrade stay; the rank table predates this revision
+    op.execute("DROP TABLE types")
+    op.execute("DROP TABLE heroes")
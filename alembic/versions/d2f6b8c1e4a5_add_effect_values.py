@@ -0,0 +1,59 @@
+"""Add effect_values: numeric stat values parsed from the effect texts
+
+Revision ID: d2f6b8c1e4a5
+Revises: c1e5a7b9d3f4
+Create Date: 2026-10-20 00:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.effect_values import parse_effect_values
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6b8c1e4a5'
+down_revision: Union[str, None] = 'c1e5a7b9d3f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Same DDL as utils.ingest_utils.create_dimension_tables
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS effect_values (
+            effect_id INTEGER NOT NULL,
+            stat TEXT NOT NULL,
+            tier INTEGER NOT NULL,
+            value REAL NOT NULL,
+            per_rarity INTEGER NOT NULL,
+            PRIMARY KEY (effect_id, stat, tier),
+            FOREIGN KEY (effect_id) REFERENCES effect_texts(id)
+        ) WITHOUT ROWID
+    """)
+    op.create_index('idx_effect_value_stat', 'effect_values', ['stat', 'value', 'per_rarity'], if_not_exists=True)
+
+    # Parse the existing texts with the ingest parser (utils.ingest_utils.refresh_effect_values)
+    conn = op.get_bind()
+    texts = conn.execute(sa.text(
+        "SELECT id, text FROM effect_texts WHERE id NOT IN (SELECT effect_id FROM effect_values)"
+    )).all()
+    rows = [
+        {"effect_id": effect_id, "stat": stat, "tier": tier, "value": value, "per_rarity": per_rarity}
+        for effect_id, text in texts for stat, tier, value, per_rarity in parse_effect_values(text)
+    ]
+    if rows:
+        conn.execute(sa.text(
+            "INSERT OR IGNORE INTO effect_values (effect_id, stat, tier, value, per_rarity) "
+            "VALUES (:effect_id, :stat, :tier, :value, :per_rarity)"
+        ), rows)
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_effect_value_stat', table_name='effect_values', if_exists=True)
+    op.drop_table('effect_values', if_exists=True)
@@ -0,0 +1,125 @@
+"""Store effect and enchantment texts once in effect_texts; drop the "None" enchantment rows
+
+Revision ID: d5e8b2c4a6f1
+Revises: c4d7a9e1f2b5
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e8b2c4a6f1'
+down_revision: Union[str, None] = 'c4d7a9e1f2b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ENCHANTMENT_NAMES = ['Heavy', 'Icy', 'Turbo', 'Shielded', 'Restorative', 'Toxic',
+                     'Fiery', 'Shiny', 'Deadly', 'Radiant', 'Obsidian', 'Golden']
+
+# (table, owner column, owner table)
+EFFECT_TABLES = [
+    ('item_effects', 'item_id', 'items'),
+    ('skill_effects', 'skill_id', 'skills'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE TABLE IF NOT EXISTS effect_texts (id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE)")
+    op.execute("""
+        INSERT OR IGNORE INTO effect_texts (text)
+        SELECT effect FROM item_effects UNION SELECT effect FROM skill_effects
+        UNION SELECT enchantment_effect FROM enchantments WHERE enchantment_effect != 'None'
+        ORDER BY 1
+    """)
+
+    # SQLite cannot change a column's type in place: rebuild the tables with the id column
+    for table, owner_column, owner_table in EFFECT_TABLES:
+        op.execute(f"""
+            CREATE TABLE {table}_new (
+                {owner_column} INTEGER,
+                effect_id INTEGER NOT NULL,
+                FOREIGN KEY ({owner_column}) REFERENCES {owner_table}(id),
+                FOREIGN KEY (effect_id) REFERENCES effect_texts(id)
+            )
+        """)
+        op.execute(f"""
+            INSERT INTO {table}_new ({owner_column}, effect_id)
+            SELECT c.{owner_column}, t.id FROM {table} c JOIN effect_texts t ON t.text = c.effect
+        """)
+        op.execute(f"DROP TABLE {table}")
+        op.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+    op.execute("""
+        CREATE TABLE enchantments_new (
+            item_id INTEGER,
+            enchantment_name TEXT NOT NULL,
+            effect_id INTEGER NOT NULL,
+            PRIMARY KEY (item_id, enchantment_name),
+            FOREIGN KEY (item_id) REFERENCES items(id),
+            FOREIGN KEY (effect_id) REFERENCES effect_texts(id)
+        )
+    """)
+    # Missing enchantments are no longer stored as "None" rows
+    op.execute("""
+        INSERT INTO enchantments_new (item_id, enchantment_name, effect_id)
+        SELECT e.item_id, e.enchantment_name, t.id FROM enchantments e JOIN effect_texts t ON t.text = e.enchantment_effect
+        WHERE e.enchantment_effect != 'None'
+    """)
+    op.execute("DROP TABLE enchantments")
+    op.execute("ALTER TABLE enchantments_new RENAME TO enchantments")
+
+    op.execute("CREATE INDEX IF NOT EXISTS idx_item_effects_item ON item_effects (item_id, effect_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_item_effect ON item_effects (effect_id, item_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_skill_effects_skill ON skill_effects (skill_id, effect_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_skill_effect ON skill_effects (effect_id, skill_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_enchantment_item_id ON enchantments (item_id)")
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, owner_column, owner_table in EFFECT_TABLES:
+        op.execute(f"""
+            CREATE TABLE {table}_old (
+                {owner_column} INTEGER,
+                effect TEXT NOT NULL,
+                FOREIGN KEY ({owner_column}) REFERENCES {owner_table}(id)
+            )
+        """)
+        op.execute(f"""
+            INSERT INTO {table}_old ({owner_column}, effect)
+            SELECT c.{owner_column}, t.text FROM {table} c JOIN effect_texts t ON t.id = c.effect_id
+        """)
+        op.execute(f"DROP TABLE {table}")
+        op.execute(f"ALTER TABLE {table}_old RENAME TO {table}")
+
+    op.execute("""
+        CREATE TABLE enchantments_old (
+            item_id INTEGER,
+            enchantment_name TEXT NOT NULL,
+            enchantment_effect TEXT NOT NULL,
+            PRIMARY KEY (item_id, enchantment_name),
+            FOREIGN KEY (item_id) REFERENCES items(id)
+        )
+    """)
+    op.execute("""
+        INSERT INTO enchantments_old (item_id, enchantment_name, enchantment_effect)
+        SELECT e.item_id, e.enchantment_name, t.text FROM enchantments e JOIN effect_texts t ON t.id = e.effect_id
+    """)
+    # Restore a "None" row for every enchantment an item does not have
+    names = " UNION ALL ".join(f"SELECT '{name}' AS name" for name in ENCHANTMENT_NAMES)
+    op.execute(f"""
+        INSERT OR IGNORE INTO enchantments_old (item_id, enchantment_name, enchantment_effect)
+        SELECT items.id, names.name, 'None' FROM items CROSS JOIN ({names}) AS names
+    """)
+    op.execute("DROP TABLE enchantments")
+    op.execute("ALTER TABLE enchantments_old RENAME TO enchantments")
+
+    op.execute("CREATE INDEX IF NOT EXISTS idx_item_effects_item ON item_effects (item_id, effect)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_skill_effects_skill ON skill_effects (skill_id, effect)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_enchantment_item_id ON enchantments (item_id)")
+    op.execute("DROP TABLE effect_texts")
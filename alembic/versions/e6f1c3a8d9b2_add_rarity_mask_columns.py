@@ -0,0 +1,54 @@
+"""Add derived rarity_mask and min_rarity_rank columns to items and skills
+
+Revision ID: e6f1c3a8d9b2
+Revises: d5e8b2c4a6f1
+Create Date: 2026-10-19 20:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6f1c3a8d9b2'
+down_revision: Union[str, None] = 'd5e8b2c4a6f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, rarity table, owner column, index)
+TABLES = [
+    ('items', 'item_rarities', 'item_id', 'idx_item_min_rarity_rank'),
+    ('skills', 'skill_rarities', 'skill_id', 'idx_skill_min_rarity_rank'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, rarity_table, owner_column, index in TABLES:
+        op.add_column(table, sa.Column('rarity_mask', sa.Integer(), nullable=False, server_default='0'))
+        op.add_column(table, sa.Column('min_rarity_rank', sa.Integer(), nullable=True))
+        # Same derivation as utils.ingest_utils.refresh_rarity_columns
+        op.execute(f"""
+            UPDATE {table} SET rarity_mask = r.mask, min_rarity_rank = r.min_rank
+            FROM (
+                SELECT c.{owner_column} AS owner_id, SUM(DISTINCT 1 << (rarities.rank - 1)) AS mask,
+                       MIN(rarities.rank) AS min_rank
+                FROM {rarity_table} c JOIN rarities ON rarities.id = c.rarity_id
+                GROUP BY c.{owner_column}
+            ) r
+            WHERE r.owner_id = {table}.id
+        """)
+        op.create_index(index, table, ['min_rarity_rank'], if_not_exists=True)
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, rarity_table, owner_column, index in TABLES:
+        op.drop_index(index, table_name=table, if_exists=True)
+        # Native DROP COLUMN (SQLite 3.35+) keeps the table's other indexes and AUTOINCREMENT,
+        # which a batch table rebuild would not
+        op.execute(f"ALTER TABLE {table} DROP COLUMN min_rarity_rank")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN rarity_mask")
@@ -0,0 +1,61 @@
+"""Add derived hero_count/is_neutral to items and type_sort_key to items and skills
+
+Revision ID: f7a2d4b6c8e0
+Revises: e6f1c3a8d9b2
+Create Date: 2026-10-19 21:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a2d4b6c8e0'
+down_revision: Union[str, None] = 'e6f1c3a8d9b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, type table, owner column)
+TYPE_TABLES = [
+    ('items', 'item_types', 'item_id'),
+    ('skills', 'skill_types', 'skill_id'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('items', sa.Column('hero_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('items', sa.Column('is_neutral', sa.Integer(), nullable=False, server_default='1'))
+    # Same derivations as utils.ingest_utils.refresh_hero_columns and refresh_type_sort_key
+    op.execute("""
+        UPDATE items SET hero_count = h.heroes, is_neutral = 0
+        FROM (SELECT item_id, COUNT(DISTINCT hero_id) AS heroes FROM item_heroes GROUP BY item_id) h
+        WHERE h.item_id = items.id
+    """)
+    op.create_index('idx_item_is_neutral', 'items', ['is_neutral'], if_not_exists=True)
+
+    for table, type_table, owner_column in TYPE_TABLES:
+        op.add_column(table, sa.Column('type_sort_key', sa.String(), nullable=False, server_default='[]'))
+        op.execute(f"""
+            UPDATE {table} SET type_sort_key = (
+                SELECT json_group_array(name) FROM (
+                    SELECT DISTINCT types.name FROM {type_table} c JOIN types ON types.id = c.type_id
+                    WHERE c.{owner_column} = {table}.id ORDER BY types.name COLLATE NOCASE
+                )
+            )
+        """)
+        op.create_index(f'idx_{table[:-1]}_type_sort_key', table, ['type_sort_key'], if_not_exists=True)
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Native DROP COLUMN keeps the tables' other indexes and AUTOINCREMENT
+    for table, type_table, owner_column in TYPE_TABLES:
+        op.drop_index(f'idx_{table[:-1]}_type_sort_key', table_name=table, if_exists=True)
+        op.execute(f"ALTER TABLE {table} DROP COLUMN type_sort_key")
+    op.drop_index('idx_item_is_neutral', table_name='items', if_exists=True)
+    op.execute("ALTER TABLE items DROP COLUMN is_neutral")
+    op.execute("ALTER TABLE items DROP COLUMN hero_count")
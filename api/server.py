@@ -0,0 +1,249 @@
+"""Read-only JSON HTTP API over the catalog and the video library.
+
+GET /items, /skills and /videos take the query_items / query_skills / get_videos filters as
+query parameters (repeat a parameter for several values) and return
+{"version", "count", "next_cursor", "results"}; GET / lists the parameters. Every response
+carries an ETag for the database's data version, so If-None-Match gets a 304 until the
+file changes, and bodies are kept in an LRU cache keyed on the version.
+
+Example:
+    python -m api.server --db bazaar.db --port 8765
+    curl 'http://127.0.0.1:8765/items?hero=Vanessa&type=Weapon&type=Tool&rarity=Gold&limit=20'
+    curl 'http://127.0.0.1:8765/videos?q=hero:Mak%20-status:Draft&sort=title&order=asc'
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+from db.db_routine import DBRoutine
+from db.items import ItemDB
+from db.records import ItemRecord, SkillRecord, VideoRecord
+from db.skills import SkillDB
+from db.videos import VideoDB
+from utils.config import DATABASE_PATH
+from utils.lru_cache import LRUCache
+
+RESPONSE_CACHE_SIZE = 1024
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# Query parameter -> (keyword argument, kind); "list" parameters may repeat
+ITEM_PARAMS = {
+    "name": ("name", "str"),
+    "rarity": ("rarities", "list"),
+    "type": ("types", "list"),
+    "effect": ("effect_keyword", "str"),
+    "hero": ("heroes", "list"),
+    "size": ("size", "str"),
+    "id": ("ids", "ids"),
+    "value": ("value_filters", "list"),
+    "q": ("query", "str"),
+    "sort": ("sort_by", "str"),
+    "order": ("sort_order", "order"),
+}
+SKILL_PARAMS = {key: spec for key, spec in ITEM_PARAMS.items() if key != "size"}
+VIDEO_PARAMS = {
+    "type": ("video_type", "str"),
+    "status": ("status", "list"),
+    "skill": ("skill_ids", "ids"),
+    "item": ("item_ids", "ids"),
+    "hero": ("heroes", "list"),
+    "date_from": ("date_from", "str"),
+    "date_to": ("date_to", "str"),
+    "title": ("title_prefix", "str"),
+    "skill_match": ("skill_match", "match"),
+    "item_match": ("item_match", "match"),
+    "hero_match": ("hero_match", "match"),
+    "search": ("search", "str"),
+    "q": ("query", "str"),
+    "sort": ("sort_by", "str"),
+    "order": ("sort_order", "order"),
+}
+PAGE_PARAMS = ("limit", "cursor")
+
+logger = logging.getLogger(__name__)
+
+class BadRequest(ValueError):
+    pass
+
+class DataVersion:
+    """Version of the database file, read from PRAGMA data_version on a connection of its own.
+
+    SQLite changes a connection's data_version whenever another connection (in any process)
+    commits, so the one connection that never writes sees every change. Its starting value
+    is arbitrary, hence the start time in front of it.
+    """
+    def __init__(self, engine):
+        self.connection = engine.raw_connection()
+        self.prefix = f"{time.time_ns():x}"
+        self.lock = threading.Lock()
+
+    def current(self):
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute("PRAGMA data_version")
+            value = cursor.fetchone()[0]
+            cursor.close()
+        return f"{self.prefix}-{value}"
+
+    def close(self):
+        self.connection.close()
+
+def filter_kwargs(pairs, spec):
+    """Keyword arguments for the query method from the (name, value) query pairs."""
+    kwargs = {}
+    for key, value in pairs:
+        if key in PAGE_PARAMS:
+            continue
+        if key not in spec:
+            raise BadRequest(f"Unknown parameter {key!r}, expected one of {', '.join(sorted(spec) + list(PAGE_PARAMS))}")
+        name, kind = spec[key]
+        if kind == "list":
+            kwargs.setdefault(name, []).append(value)
+        elif kind == "ids":
+            try:
+                kwargs.setdefault(name, []).extend(int(part) for part in value.split(","))
+            except ValueError:
+                raise BadRequest(f"{key} takes integer ids, got {value!r}")
+        elif kind == "order":
+            if value.lower() not in ("asc", "desc"):
+                raise BadRequest(f"order is asc or desc, got {value!r}")
+            kwargs[name] = value.upper()
+        elif kind == "match":
+            if value not in ("any", "all"):
+                raise BadRequest(f"{key} is any or all, got {value!r}")
+            kwargs[name] = value
+        else:
+            kwargs[name] = value
+    return kwargs
+
+def page_bounds(query):
+    try:
+        limit = int(query.get("limit", DEFAULT_LIMIT))
+        cursor = int(query.get("cursor", 0))
+    except ValueError:
+        raise BadRequest("limit and cursor take integers")
+    if not 1 <= limit <= MAX_LIMIT or cursor < 0:
+        raise BadRequest(f"limit must be between 1 and {MAX_LIMIT} and cursor not negative")
+    return limit, cursor
+
+class CatalogAPI:
+    """Answers GET requests independently of the HTTP layer: (status, headers, body)."""
+    def __init__(self, db_routine, cache_size=RESPONSE_CACHE_SIZE):
+        self.db = db_routine
+        item_db, skill_db, video_db = ItemDB(db_routine), SkillDB(db_routine), VideoDB(db_routine)
+        self.endpoints = {
+            "/items": (item_db.query_items_statement, ItemRecord, ITEM_PARAMS),
+            "/skills": (skill_db.query_skills_statement, SkillRecord, SKILL_PARAMS),
+            "/videos": (video_db.get_videos_statement, VideoRecord, VIDEO_PARAMS),
+        }
+        self.version = DataVersion(db_routine.engine)
+        self.cache = LRUCache(cache_size)
+
+    def handle(self, target, if_none_match=None):
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        if path != "/" and path not in self.endpoints:
+            return self._json(404, {"error": f"No endpoint {url.path}, expected one of {', '.join(self.endpoints)}"})
+        version = self.version.current()
+        etag = f'"{version}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]):
+            return 304, headers, b""
+
+        pairs = parse_qsl(url.query, keep_blank_values=False)
+        # Filters are sets, so the order of the parameters does not change the response
+        key = (version, path, tuple(sorted(pairs)))
+        body = self.cache.get(key)
+        if body is None:
+            try:
+                body = self._body(path, pairs, version)
+            except ValueError as e:
+                # BadRequest, QuerySyntaxError and unparsable value filters
+                return self._json(400, {"error": str(e)})
+            self.cache.put(key, body)
+        return 200, headers, body
+
+    def _body(self, path, pairs, version):
+        if path == "/":
+            return _encode({
+                "version": version,
+                "endpoints": {name: sorted(spec) + list(PAGE_PARAMS) for name, (_, _, spec) in self.endpoints.items()},
+            })
+        statement_func, record_class, spec = self.endpoints[path]
+        limit, cursor = page_bounds(dict(pairs))
+        stmt, params = statement_func(**filter_kwargs(pairs, spec))
+        # The id (first column) breaks sort ties, so pages do not overlap; one row more than
+        # the page tells whether there is a next one
+        stmt = stmt.order_by(stmt.selected_columns[0]).limit(limit + 1).offset(cursor)
+        with self.db.read_connection() as conn:
+            records = [record_class(*row) for row in conn.execute(stmt, params)]
+        next_cursor = cursor + limit if len(records) > limit else None
+        results = [record.to_json() for record in records[:limit]]
+        return _encode({"version": version, "count": len(results), "next_cursor": next_cursor, "results": results})
+
+    def _json(self, status, payload):
+        return status, {}, _encode(payload)
+
+    def close(self):
+        self.version.close()
+
+def _encode(payload):
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class APIRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so clients can send many requests over one connection
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle's algorithm the body waits
+    # for the client's delayed ACK (about 40 ms per response)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        status, headers, body = self.server.api.handle(self.path, self.headers.get("If-None-Match"))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+class APIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, api):
+        super().__init__(address, APIRequestHandler)
+        self.api = api
+
+def create_server(db_path=DATABASE_PATH, host="127.0.0.1", port=8765, cache_size=RESPONSE_CACHE_SIZE):
+    """An APIServer on a read-only DBRoutine; port 0 picks a free port (see server_address)."""
+    return APIServer((host, port), CatalogAPI(DBRoutine(db_path, read_only=True), cache_size))
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the catalog and video library as a read-only JSON API")
+    parser.add_argument("--db", default=DATABASE_PATH, help=f"Database file (default: {DATABASE_PATH})")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache-size", type=int, default=RESPONSE_CACHE_SIZE, help="Responses kept in memory")
+    args = parser.parse_args()
+
+    server = create_server(args.db, args.host, args.port, args.cache_size)
+    host, port = server.server_address[:2]
+    logger.info(f"Serving {args.db} read-only on http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.api.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark the co-occurrence top-N queries against counting the pairs on the fly.
+
+For each library size, times AnalyticsDB.item_companions / skill_items / hero_items
+(index range over the maintained counts) and the equivalent self-join GROUP BY over
+video_items, plus the write cost the triggers add to add_video and update_video.
+
+Example:
+    python -m benchmarks.analytics_benchmark --videos 1000 10000 50000 --output analytics_report.json
+"""
+import argparse
+import logging
+import os
+import tempfile
+from benchmarks.common import measure, report_header, write_report, print_table
+from benchmarks.generate_dataset import generate_dataset
+from db.analytics import AnalyticsDB
+from db.db_routine import DBRoutine
+from db.videos import VideoDB
+from sqlalchemy import text
+
+# The same companions, counted from the association tables for every call
+ON_THE_FLY_SQL = """
+    SELECT b.item_id, COUNT(*) AS video_count FROM video_items a
+    JOIN video_items b ON b.video_id = a.video_id AND b.item_id != a.item_id
+    WHERE a.item_id = :item_id
+    GROUP BY b.item_id ORDER BY video_count DESC LIMIT :limit
+"""
+
+def run_size(videos, workdir, repeat, links_per_video, seed):
+    db_path = os.path.join(workdir, f"analytics_{videos}.db")
+    generate_dataset(db_path, scale=1, videos=videos, links_per_video=links_per_video, seed=seed)
+    db_routine = DBRoutine(db_path)
+    analytics, video_db = AnalyticsDB(db_routine), VideoDB(db_routine)
+
+    def on_the_fly():
+        with db_routine.read_connection() as conn:
+            return conn.execute(text(ON_THE_FLY_SQL), {"item_id": 1, "limit": 10}).all()
+
+    results = {
+        "item_companions": measure(lambda: analytics.item_companions(1, 10), repeat=repeat),
+        "skill_items": measure(lambda: analytics.skill_items(1, 10), repeat=repeat),
+        "hero_items": measure(lambda: analytics.hero_items("Mak", 10), repeat=repeat),
+        "item_companions_on_the_fly": measure(on_the_fly, repeat=repeat),
+    }
+    video_id = video_db.add_video("bench", "Short", "2026-01-01", "Draft", "", [1, 2], [1, 2, 3, 4], ["Mak"])
+    results["update_video"] = measure(lambda: video_db.update_video(
+        video_id, "bench", "Short", "2026-01-01", "Draft", "", [2, 3], [2, 3, 4, 5], ["Vanessa"]
+    ), repeat=repeat)
+    db_routine.engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the co-occurrence top-N queries")
+    parser.add_argument("--videos", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--links", type=int, default=8, help="Items linked to each video")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="analytics_benchmark.json", help="JSON report path")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    report = report_header("analytics_benchmark")
+    report["sizes"] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for videos in args.videos:
+            report["sizes"][str(videos)] = run_size(videos, workdir, args.repeat, args.links, args.seed)
+
+    labels = list(next(iter(report["sizes"].values())))
+    print_table(["query"] + [f"{v} videos (ms)" for v in report["sizes"]],
+                [[label] + [sizes[label]["median_ms"] for sizes in report["sizes"].values()] for label in labels])
+    write_report(report, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Benchmark the read-only JSON API (api/server.py) over localhost.
+
+Starts the server on a free local port in this process and sends a mix of item, skill and
+video queries from keep-alive client threads, three ways: with the response cache disabled,
+with it warm, and revalidating with If-None-Match (304 responses). Reports requests per
+second and latency percentiles, and checks that the API pages match the query methods.
+
+Example:
+    python -m benchmarks.api_benchmark --scales 1 10 --clients 1 4 --output api_report.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from benchmarks.common import report_header, write_report, print_table
+from benchmarks.generate_dataset import generate_dataset
+from api.server import create_server, DEFAULT_LIMIT
+from db.db_routine import DBRoutine
+from db.items import ItemDB
+from db.skills import SkillDB
+from db.videos import VideoDB
+
+PATHS = [
+    "/items?hero=Vanessa&type=Weapon&type=Tool&rarity=Gold",
+    "/items?q=damage%3E%3D50%40Gold%20-size:Large&sort=stat:damage&order=desc",
+    "/items?effect=burn&sort=rarity",
+    "/skills?hero=Mak&type=Burn&type=Poison",
+    "/skills?q=burn%3E%3D20%40Gold",
+    "/videos?hero=Mak&status=Published",
+    "/videos?search=mak%20build&sort=relevance",
+    "/videos?q=-status:Draft%20date%3E%3D2026-01-01&sort=title&order=asc",
+]
+
+def direct_ids(db_routine):
+    """First page of ids for each path through the query methods, in PATHS order."""
+    item_db, skill_db, video_db = ItemDB(db_routine), SkillDB(db_routine), VideoDB(db_routine)
+    pages = [
+        item_db.query_items(heroes=["Vanessa"], types=["Weapon", "Tool"], rarities=["Gold"]),
+        item_db.query_items(query="damage>=50@Gold -size:Large", sort_by="stat:damage", sort_order="DESC"),
+        item_db.query_items(effect_keyword="burn", sort_by="rarity"),
+        skill_db.query_skills(heroes=["Mak"], types=["Burn", "Poison"]),
+        skill_db.query_skills(query="burn>=20@Gold"),
+        video_db.get_videos(heroes=["Mak"], status="Published"),
+        video_db.get_videos(search="mak build", sort_by="relevance"),
+        video_db.get_videos(query="-status:Draft date>=2026-01-01", sort_by="title", sort_order="ASC"),
+    ]
+    return [[record.id for record in records] for records in pages]
+
+def run_clients(port, clients, requests, revalidate=False):
+    """requests per client thread, cycling through PATHS; returns (requests/s, latencies in ms, statuses)."""
+    etags = {}
+    if revalidate:
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        for path in PATHS:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            etags[path] = response.getheader("ETag")
+        connection.close()
+    latencies, statuses, lock = [], {}, threading.Lock()
+
+    def client(offset):
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        own_latencies, own_statuses = [], {}
+        for n in range(requests):
+            path = PATHS[(offset + n) % len(PATHS)]
+            headers = {"If-None-Match": etags[path]} if revalidate else {}
+            start = time.perf_counter()
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            own_latencies.append((time.perf_counter() - start) * 1000)
+            own_statuses[response.status] = own_statuses.get(response.status, 0) + 1
+        connection.close()
+        with lock:
+            latencies.extend(own_latencies)
+            for status, count in own_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=client, args=(offset,)) for offset in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return clients * requests / elapsed, latencies, statuses
+
+def summarize(throughput, latencies, statuses):
+    latencies = sorted(latencies)
+    return {
+        "requests_per_s": round(throughput, 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+def serve(db_path, cache_size):
+    server = create_server(db_path, port=0, cache_size=cache_size)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def stop(server):
+    server.shutdown()
+    server.server_close()
+    server.api.close()
+
+def check_agree(port, expected):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    agree = True
+    for path, ids in zip(PATHS, expected):
+        connection.request("GET", f"{path}&limit={DEFAULT_LIMIT}")
+        body = json.loads(connection.getresponse().read())
+        agree = agree and [row["id"] for row in body["results"]] == ids[:DEFAULT_LIMIT]
+    connection.close()
+    return agree
+
+def run_scale(scale, workdir, clients_list, requests, seed):
+    db_path = os.path.join(workdir, f"api_{scale}.db")
+    generate_dataset(db_path, scale=scale, seed=seed)
+    db_routine = DBRoutine(db_path)
+    expected = direct_ids(db_routine)
+    db_routine.engine.dispose()
+
+    results = {}
+    uncached = serve(db_path, cache_size=0)
+    agree = check_agree(uncached.server_address[1], expected)
+    for clients in clients_list:
+        results[f"uncached/{clients} clients"] = summarize(*run_clients(uncached.server_address[1], clients, requests))
+    stop(uncached)
+
+    cached = serve(db_path, cache_size=1024)
+    agree = agree and check_agree(cached.server_address[1], expected)
+    for clients in clients_list:
+        results[f"cached/{clients} clients"] = summarize(*run_clients(cached.server_address[1], clients, requests))
+        results[f"if-none-match/{clients} clients"] = summarize(*run_clients(cached.server_address[1], clients, requests, revalidate=True))
+    stop(cached)
+    return agree, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the JSON API over localhost")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per client thread and scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="api_benchmark.json", help="JSON report path")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    report = report_header("api_benchmark")
+    report["agree"] = True
+    report["scales"] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in args.scales:
+            agree, results = run_scale(scale, workdir, args.clients, args.requests, args.seed)
+            report["agree"] = report["agree"] and agree
+            report["scales"][str(scale)] = results
+
+    rows = []
+    for scale, results in report["scales"].items():
+        for name, result in results.items():
+            rows.append([scale, name, result["requests_per_s"], result["p50_ms"], result["p95_ms"],
+                         ", ".join(f"{status}: {count}" for status, count in result["statuses"].items())])
+    print_table(["scale", "scenario", "requests/s", "p50 (ms)", "p95 (ms)", "statuses"], rows)
+    print(f"API pages match the query methods: {report['agree']}")
+    write_report(report, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare the ORM session path with the Core read path for each query method.
+
+"orm" builds the statement for every call and runs it through a new Session
+from DBRoutine.get_connection, which commits on exit. "core" is what
+query_items, query_skills and get_videos do now: the statement cached for the
+filter shape, executed on a pooled connection from read_connection with no
+commit. Both build the same record objects.
+
+Example:
+    python -m benchmarks.core_vs_orm --scale 10 --repeat 20
+"""
+import argparse
+import logging
+import os
+import tempfile
+from benchmarks.common import measure, report_header, write_report, print_table
+from benchmarks.generate_dataset import generate_dataset
+from benchmarks.query_benchmark import ITEM_SCENARIOS, SKILL_SCENARIOS, VIDEO_SCENARIOS
+from db.db_routine import DBRoutine
+from db.items import ItemDB
+from db.records import ItemRecord, SkillRecord, VideoRecord
+from db.skills import SkillDB
+from db.videos import VideoDB
+
+def _orm_call(db_routine, statement_func, record):
+    def call(**kwargs):
+        # Drop the cached statement so the ORM path pays for building it, as the old methods did
+        db_routine.statements.clear()
+        stmt, params = statement_func(**kwargs)
+        with db_routine.get_connection() as session:
+            return [record(*row) for row in session.execute(stmt, params)]
+    return call
+
+def run(db_path, repeat):
+    db_routine = DBRoutine(db_path)
+    item_db, skill_db, video_db = ItemDB(db_routine), SkillDB(db_routine), VideoDB(db_routine)
+    paths = {
+        "items": (_orm_call(db_routine, item_db.query_items_statement, ItemRecord), item_db.query_items),
+        "skills": (_orm_call(db_routine, skill_db.query_skills_statement, SkillRecord), skill_db.query_skills),
+        "videos": (_orm_call(db_routine, video_db.get_videos_statement, VideoRecord), video_db.get_videos),
+    }
+    results = {}
+    for label, kwargs in ITEM_SCENARIOS + SKILL_SCENARIOS + VIDEO_SCENARIOS:
+        orm_func, core_func = paths[label.split("/")[0]]
+        orm = measure(lambda: orm_func(**kwargs), repeat=repeat)
+        core = measure(lambda: core_func(**kwargs), repeat=repeat)
+        results[label] = {"orm": orm, "core": core, "rows": len(core_func(**kwargs))}
+    db_routine.engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="ORM session vs Core read path")
+    parser.add_argument("--scale", type=float, default=1.0, help="Synthetic dataset scale")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="core_vs_orm.json", help="JSON report path")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    report = report_header("core_vs_orm")
+    report.update(scale=args.scale, repeat=args.repeat)
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "bench.db")
+        generate_dataset(db_path, scale=args.scale, seed=args.seed)
+        report["results"] = run(db_path, args.repeat)
+
+    rows = []
+    for label, data in report["results"].items():
+        orm, core = data["orm"]["median_ms"], data["core"]["median_ms"]
+        rows.append((label, data["rows"], orm, core, f"{orm / core:.2f}x" if core else "-"))
+    print_table(["scenario", "rows", "orm median ms", "core median ms", "speedup"], rows)
+    write_report(report, args.output)
+
+if __name__ == "__main__":
+    main()
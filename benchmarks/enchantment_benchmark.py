@@ -0,0 +1,102 @@
+"""Benchmark the item × enchantment matrix against the equivalent SQL joins.
+
+For "items whose <enchantment> mentions <keyword>" and "items missing <enchantment>", times
+the matrix lookup, the same ids through a join on the enchantments table, and the previous
+route of loading every item with query_items and reading its decoded enchantments. Also
+times the enchantment panel lookup for one item, and checks that all routes agree.
+
+Example:
+    python -m benchmarks.enchantment_benchmark --scales 1 10 --output enchantment_report.json
+"""
+import argparse
+import logging
+import os
+import tempfile
+from sqlalchemy import text
+from benchmarks.common import measure, report_header, write_report, print_table
+from benchmarks.generate_dataset import generate_dataset
+from db.db_routine import DBRoutine
+from db.items import ItemDB
+
+WITH_KEYWORD = ("Fiery", "Burn")
+MISSING = "Golden"
+
+JOIN_WITH_KEYWORD = text("""
+    SELECT e.item_id FROM enchantments e JOIN effect_texts t ON t.id = e.effect_id
+    WHERE e.enchantment_name = :name AND t.text LIKE :keyword
+""")
+JOIN_MISSING = text("""
+    SELECT id FROM items WHERE id NOT IN (SELECT item_id FROM enchantments WHERE enchantment_name = :name)
+""")
+
+def run_scale(scale, workdir, repeat, seed):
+    db_path = os.path.join(workdir, f"enchantments_{scale}.db")
+    generate_dataset(db_path, scale=scale, videos=0, seed=seed)
+    db_routine = DBRoutine(db_path)
+    item_db = ItemDB(db_routine)
+    matrix = item_db.enchantments
+    name, keyword = WITH_KEYWORD
+
+    def join_with_keyword():
+        with db_routine.read_connection() as conn:
+            return sorted(conn.execute(JOIN_WITH_KEYWORD, {"name": name, "keyword": f"%{keyword}%"}).scalars())
+
+    def join_missing():
+        with db_routine.read_connection() as conn:
+            return sorted(conn.execute(JOIN_MISSING, {"name": MISSING}).scalars())
+
+    def records_with_keyword():
+        return [item.id for item in item_db.query_items(sort_by=None)
+                if keyword.lower() in item.enchantments.get(name, "").lower()]
+
+    def records_missing():
+        return [item.id for item in item_db.query_items(sort_by=None) if MISSING not in item.enchantments]
+
+    matrix.items_with(name)
+    item_id = matrix.items_with(name)[0]
+    record = item_db.query_items(sort_by=None, ids=[item_id])[0]
+    agree = (
+        matrix.items_with(name, keyword) == join_with_keyword() == sorted(records_with_keyword())
+        and matrix.items_missing(MISSING) == join_missing() == sorted(records_missing())
+        and {n: t for n, t in item_db.get_item_enchantments(item_id) if t} == record.enchantments
+    )
+    results = {
+        "with_keyword/matrix": measure(lambda: matrix.items_with(name, keyword), repeat=repeat),
+        "with_keyword/join": measure(join_with_keyword, repeat=repeat),
+        "with_keyword/records": measure(records_with_keyword, repeat=max(1, repeat // 5)),
+        "with_keyword/items_with_enchantment": measure(lambda: item_db.items_with_enchantment(name, keyword), repeat=repeat),
+        "missing/matrix": measure(lambda: matrix.items_missing(MISSING), repeat=repeat),
+        "missing/join": measure(join_missing, repeat=repeat),
+        "missing/records": measure(records_missing, repeat=max(1, repeat // 5)),
+        "panel/matrix": measure(lambda: item_db.get_item_enchantments(item_id), repeat=repeat),
+        "panel/query_items": measure(lambda: item_db.query_items(sort_by=None, ids=[item_id])[0].enchantment_lines(), repeat=repeat),
+    }
+    db_routine.engine.dispose()
+    return agree, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the item × enchantment matrix")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="enchantment_benchmark.json", help="JSON report path")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    report = report_header("enchantment_benchmark")
+    report["agree"] = True
+    report["scales"] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in args.scales:
+            agree, results = run_scale(scale, workdir, args.repeat, args.seed)
+            report["agree"] = report["agree"] and agree
+            report["scales"][str(scale)] = results
+
+    scenarios = list(next(iter(report["scales"].values())))
+    print_table(["scenario"] + [f"scale {scale} (ms)" for scale in report["scales"]],
+                [[name] + [scales[name]["median_ms"] for scales in report["scales"].values()] for name in scenarios])
+    print(f"Matrix, joins and decoded records agree: {report['agree']}")
+    write_report(report, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Build a synthetic bazaar.db for benchmarking.
+
+Example:
+    python -m benchmarks.generate_dataset --output var/bench.db --scale 10
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+from datetime import date, timedelta
+from db.analytics import REBUILD_SQL
+from db.db_routine import DBRoutine
+from db.models import COOCCURRENCE_TRIGGERS
+from utils.config import RARITY_ORDER, SIZE_ORDER, ENCHANTMENT_NAMES
+from utils.parse_bazaar_items import create_database_items, store_items
+from utils.parse_bazaar_skills import create_database_skills, store_skills
+from utils.ingest_utils import DimensionIds
+
+# Roughly the size of the live catalog and video library (1x)
+BASE_COUNTS = {"items": 900, "skills": 600, "videos": 150}
+
+HEROES = ["Vanessa", "Pygmalien", "Dooley", "Mak", "Stelle", "Jules"]
+HERO_WEIGHTS = [0.18, 0.16, 0.16, 0.16, 0.12, 0.12]
+NEUTRAL_RATE = 0.1
+
+# Starting rarity of an entity; it is then available at every tier up to Diamond
+RARITY_WEIGHTS = [0.35, 0.3, 0.2, 0.1, 0.05]
+SIZE_WEIGHTS = [0.45, 0.4, 0.15]
+
+ITEM_TYPES = [
+    "Weapon", "Tool", "Food", "Apparel", "Aquatic", "Core", "Drone", "Friend", "Loot",
+    "Potion", "Property", "Ray", "Reagent", "Relic", "Tech", "Toy", "Vehicle", "Dinosaur",
+]
+SKILL_TYPES = [
+    "Burn", "Poison", "Shield", "Heal", "Haste", "Slow", "Freeze", "Crit", "Damage",
+    "Regen", "Ammo", "Charge", "Cooldown", "Economy", "Multicast",
+]
+
+EFFECT_TEMPLATES = [
+    "Deal {values} Damage",
+    "Gain {values} Shield",
+    "Heal {values}",
+    "Burn {values}",
+    "Poison {values}",
+    "Your Weapons gain {values} Damage for the fight",
+    "Haste an item for {seconds} second(s)",
+    "Slow an item for {seconds} second(s)",
+    "Freeze an item for {seconds} second(s)",
+    "When you use an adjacent item, Charge this 1 second(s)",
+    "Crit Chance {percent}%",
+    "Cooldown {seconds} seconds",
+    "Multicast: 2",
+    "Ammo: 3",
+]
+
+ENCHANTMENT_TEMPLATES = {
+    "Heavy": "Slow an item for {seconds} second(s)",
+    "Icy": "Freeze an item for {seconds} second(s)",
+    "Turbo": "Haste an item for {seconds} second(s)",
+    "Shielded": "Gain {values} Shield",
+    "Restorative": "Heal {values}",
+    "Toxic": "Poison {values}",
+    "Fiery": "Burn {values}",
+    "Shiny": "+1 Multicast",
+    "Deadly": "+50% Crit Chance",
+    "Radiant": "Cannot be Frozen, Slowed or Destroyed",
+    "Obsidian": "Double Damage",
+    "Golden": "Double Value",
+}
+ENCHANTMENT_RATE = 0.7
+
+VIDEO_TYPES = ["Short", "Long"]
+VIDEO_STATUSES = ["Draft", "Uploaded", "Published"]
+VIDEO_STATUS_WEIGHTS = [0.1, 0.2, 0.7]
+
+def pick_rarities(rng):
+    start = rng.choices(range(len(RARITY_ORDER)), weights=RARITY_WEIGHTS)[0]
+    if RARITY_ORDER[start] == "Legendary":
+        return ["Legendary"]
+    return RARITY_ORDER[start:RARITY_ORDER.index("Diamond") + 1]
+
+def pick_heroes(rng):
+    if rng.random() < NEUTRAL_RATE:
+        return []
+    return rng.choices(HEROES, weights=HERO_WEIGHTS)
+
+def format_effect(rng, template, tiers):
+    base = rng.choice([2, 3, 5, 10, 15, 20, 25, 30, 40, 50])
+    values = " » ".join(str(base * 2 ** i) for i in range(tiers))
+    return template.format(
+        values=values,
+        seconds=rng.choice([1, 2, 3]),
+        percent=rng.choice([10, 15, 20, 25, 50]),
+    )
+
+def make_effects(rng, count, tiers):
+    return [format_effect(rng, template, tiers) for template in rng.sample(EFFECT_TEMPLATES, count)]
+
+def make_item(rng, item_id, effects_per_entity=3, enchantment_rate=ENCHANTMENT_RATE):
+    """Return an item dict shaped like utils.parse_bazaar_items.parse_item output."""
+    rarities = pick_rarities(rng)
+    heroes = pick_heroes(rng)
+    enchantments = {}
+    for enc_name in ENCHANTMENT_NAMES:
+        if rng.random() < enchantment_rate:
+            enchantments[enc_name] = format_effect(rng, ENCHANTMENT_TEMPLATES[enc_name], len(rarities))
+    return {
+        "name": f"Item {item_id:06d}",
+        "hero": heroes[0] if heroes else "",
+        "size": rng.choices(SIZE_ORDER, weights=SIZE_WEIGHTS)[0],
+        "types": rng.sample(ITEM_TYPES, rng.randint(1, 3)),
+        "rarities": rarities,
+        "effects": make_effects(rng, effects_per_entity, len(rarities)),
+        "enchantments": enchantments,
+    }
+
+def make_skill(rng, skill_id, effects_per_entity=2):
+    """Return a mobalytics skill record shaped like utils.parse_bazaar_skills output."""
+    rarities = pick_rarities(rng)
+    return {
+        "source": "mobalytics",
+        "name": f"Skill {skill_id:06d}",
+        "icon_url": f"https://example.invalid/skills/{skill_id}.png",
+        "heroes": pick_heroes(rng),
+        "rarities": rarities,
+        "effects": make_effects(rng, effects_per_entity, len(rarities)),
+        "types": rng.sample(SKILL_TYPES, rng.randint(1, 2)),
+    }
+
+def make_wiki_skill(skill):
+    """Return the wiki record (effect text and types) matching a mobalytics skill record."""
+    return {
+        "source": "wiki",
+        "name": skill["name"],
+        "icon_url": skill["icon_url"],
+        "effect": skill["effects"][0],
+        "types": skill["types"],
+    }
+
+def generate_dataset(db_path, scale=1.0, items=None, skills=None, videos=None, effects_per_entity=3,
+                     enchantment_rate=ENCHANTMENT_RATE, links_per_video=4, seed=0):
+    """Create (or overwrite) db_path with a synthetic catalog and video library.
+
+    Counts default to BASE_COUNTS multiplied by scale. Catalog rows are written through
+    the same store functions the HTML ingest uses. Returns the row counts written.
+    """
+    rng = random.Random(seed)
+    items = items if items is not None else int(BASE_COUNTS["items"] * scale)
+    skills = skills if skills is not None else int(BASE_COUNTS["skills"] * scale)
+    videos = videos if videos is not None else int(BASE_COUNTS["videos"] * scale)
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    create_database_items(db_path)
+    create_database_skills(db_path)
+    # Video tables come from the ORM models
+    DBRoutine(db_path).engine.dispose()
+
+    item_records = [make_item(rng, i, effects_per_entity, enchantment_rate) for i in range(1, items + 1)]
+    mobalytics_skills = [make_skill(rng, i, max(1, effects_per_entity - 1)) for i in range(1, skills + 1)]
+    # Same order as the real ingest: the wiki pass supplies types, mobalytics then replaces the effects
+    skill_records = [make_wiki_skill(skill) for skill in mobalytics_skills] + mobalytics_skills
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Per-row ingest logging would dominate generation time
+    previous_disable = logging.root.manager.disable
+    logging.disable(max(previous_disable, logging.INFO))
+    try:
+        store_items(conn, item_records)
+        store_skills(conn, skill_records)
+    finally:
+        logging.disable(previous_disable)
+
+    video_rows, video_skills, video_items, video_heroes = [], [], [], []
+    first_day = date.today() - timedelta(days=3 * 365)
+    for video_id in range(1, videos + 1):
+        hero = rng.choices(HEROES, weights=HERO_WEIGHTS)[0]
+        video_rows.append((
+            video_id,
+            f"{hero} build #{video_id}",
+            rng.choice(VIDEO_TYPES),
+            (first_day + timedelta(days=rng.randrange(3 * 365))).isoformat(),
+            rng.choices(VIDEO_STATUSES, weights=VIDEO_STATUS_WEIGHTS)[0],
+            f"Run with {hero} focusing on {rng.choice(ITEM_TYPES).lower()} items",
+            None,
+            None,
+        ))
+        video_heroes.append((video_id, hero))
+        if items:
+            video_items.extend((video_id, i) for i in rng.sample(range(1, items + 1), min(links_per_video, items)))
+        if skills:
+            video_skills.extend((video_id, s) for s in rng.sample(range(1, skills + 1), min(links_per_video // 2, skills)))
+
+    # Counting co-occurrences link by link would dominate generation time: load the links
+    # without the triggers, then count them in one pass
+    triggers = [row[0] for row in cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%cooccurrence%'"
+    )]
+    for trigger in triggers:
+        cursor.execute(f"DROP TRIGGER {trigger}")
+    cursor.executemany(
+        "INSERT INTO videos (id, title, type, date, status, description, local_path, url) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        video_rows
+    )
+    cursor.executemany("INSERT INTO video_skills (video_id, skill_id) VALUES (?, ?)", video_skills)
+    cursor.executemany("INSERT INTO video_items (video_id, item_id) VALUES (?, ?)", video_items)
+    hero_ids = DimensionIds(cursor, "heroes")
+    cursor.executemany("INSERT INTO video_heroes (video_id, hero_id) VALUES (?, ?)",
+                       [(video_id, hero_ids[hero]) for video_id, hero in video_heroes])
+    for statement in COOCCURRENCE_TRIGGERS + REBUILD_SQL:
+        cursor.execute(statement)
+
+    conn.commit()
+    cursor.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+    counts = {
+        "items": items,
+        "skills": skills,
+        "videos": videos,
+        "item_effects": sum(len(item["effects"]) for item in item_records),
+        "skill_effects": sum(len(skill["effects"]) for skill in mobalytics_skills),
+        "enchantments": sum(len(item["enchantments"]) for item in item_records),
+        "video_links": len(video_items) + len(video_skills) + len(video_heroes),
+    }
+    logging.info(f"Generated {db_path}: {counts}")
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic bazaar.db")
+    parser.add_argument("--output", default="bench.db", help="Database file to create (overwritten)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier applied to BASE_COUNTS")
+    parser.add_argument("--items", type=int, help="Override the number of items")
+    parser.add_argument("--skills", type=int, help="Override the number of skills")
+    parser.add_argument("--videos", type=int, help="Override the number of videos")
+    parser.add_argument("--effects", type=int, default=3, help="Effects per item (skills get one fewer)")
+    parser.add_argument("--enchantment-rate", type=float, default=ENCHANTMENT_RATE,
+                        help="Share of the twelve enchantments each item has")
+    parser.add_argument("--links", type=int, default=4, help="Items linked per video (skills get half)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate_dataset(
+        args.output, scale=args.scale, items=args.items, skills=args.skills, videos=args.videos,
+        effects_per_entity=args.effects, enchantment_rate=args.enchantment_rate,
+        links_per_video=args.links, seed=args.seed
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Generate mobalytics-style and wiki-style HTML fixtures for the ingest parsers.
+
+The markup uses the exact class names that update_items_from_html and
+update_skills_from_html look for.
+
+Example:
+    python -m benchmarks.generate_html --output-dir var/fixtures --items 5000 --skills 3000
+"""
+import argparse
+import os
+import random
+from html import escape
+from benchmarks.generate_dataset import make_item, make_skill, make_wiki_skill
+
+CARD_CLASS = "x6ac99c x1qhigcl x1n2onr6 x1n9hxaw x25l62i xiy17q3 x19l6gds xvrka61"
+NAME_CLASS = "x1cabzks"
+HERO_CLASS = "x2fl5vp x5gn1fm"
+TAG_CLASS = "x1x4sc3n x5gn1fm xmpun7n x19l6gds x1m59ps7 x78zum5 xl56j7k x6s0dn4 x1jnr06f x1xq1gxn xxk0z11"
+RARITY_CLASS = "x2lah0s"
+EFFECTS_CLASS = "x2fl5vp x5gn1fm x5tiur9 x1ghz6dp"
+ICON_CLASS = "x19kjcj4"
+ENCHANTMENT_NAME_CLASS = "x19jf9pv x1g1qkmr x1db2dqx"
+ENCHANTMENT_EFFECT_CLASS = "x2fl5vp xqxvn2f"
+WIKI_TABLE_CLASS = "wikitable sortable jquery-tablesorter"
+WIKI_TYPE_COLOR = "#9aabff"
+
+# Wrapper markup around the cards, like the saved mobalytics pages
+PAGE_HEAD = '<!DOCTYPE html><html><head><meta charset="utf-8"><title>{title}</title></head><body><main><div class="x78zum5 x1a02dak">'
+PAGE_TAIL = "</div></main></body></html>"
+
+def _rarity_group(rarities):
+    labels = "".join(
+        f'<label><input type="radio" name="rarity"><div class="{RARITY_CLASS}">{escape(r)}</div></label>'
+        for r in rarities
+    )
+    return f'<div role="radiogroup">{labels}</div>'
+
+def _effects(effects):
+    return f'<ul class="{EFFECTS_CLASS}">' + "".join(f"<li><span>{escape(e)}</span></li>" for e in effects) + "</ul>"
+
+def item_card(item):
+    tags = "".join(f'<div class="{TAG_CLASS}">{escape(t)}</div>' for t in [item["size"]] + item["types"])
+    hero = f'<p class="{HERO_CLASS}">{escape(item["hero"])}</p>' if item["hero"] else ""
+    enchantments = "".join(
+        f'<div class="x78zum5"><span class="{ENCHANTMENT_NAME_CLASS}">{escape(name)}</span>'
+        f'<span class="{ENCHANTMENT_EFFECT_CLASS}">{escape(effect)}</span></div>'
+        for name, effect in item["enchantments"].items()
+    )
+    return (
+        f'<div class="{CARD_CLASS}">'
+        f'<div class="x78zum5"><p class="{NAME_CLASS}">{escape(item["name"])}</p>{hero}</div>'
+        f'<div class="x78zum5">{tags}</div>'
+        f"{_rarity_group(item['rarities'])}"
+        f"{_effects(item['effects'])}"
+        f'<div class="x1n2onr6">{enchantments}</div>'
+        "</div>"
+    )
+
+def skill_card(skill):
+    hero = f'<p class="{HERO_CLASS}">{escape(", ".join(skill["heroes"]))}</p>' if skill["heroes"] else ""
+    return (
+        f'<div class="{CARD_CLASS}">'
+        f'<img class="{ICON_CLASS}" src="{escape(skill["icon_url"])}" alt="">'
+        f'<div class="x78zum5"><p class="{NAME_CLASS}">{escape(skill["name"])}</p>{hero}</div>'
+        f"{_rarity_group(skill['rarities'])}"
+        f"{_effects(skill['effects'])}"
+        "</div>"
+    )
+
+def wiki_row(skill, index):
+    types = "".join(f'<font color="{WIKI_TYPE_COLOR}">{escape(t)}</font> ' for t in skill["types"])
+    return (
+        "<tr>"
+        f'<td><img src="/images/skill_{index}.png?version=1" width="64"></td>'
+        f'<td><a href="/wiki/{escape(skill["name"])}">{escape(skill["name"])}</a></td>'
+        f"<td><p>{escape(skill['effect'])}</p></td>"
+        "<td>Any</td>"
+        f"<td>{types}</td>"
+        "</tr>"
+    )
+
+def wiki_table(rows):
+    header = "<tr><th>Icon</th><th>Name</th><th>Effect</th><th>Hero</th><th>Types</th></tr>"
+    return f'<table class="{WIKI_TABLE_CLASS}"><thead>{header}</thead><tbody>{"".join(rows)}</tbody></table>'
+
+def write_fixtures(output_dir, items=2000, skills=1500, monsters=200, seed=0):
+    """Write items, mobalytics skills, wiki skills and monster skill pages to output_dir.
+
+    Returns a dict of fixture paths. The wiki file is named skill_w_types.html so the
+    skill parser recognises its format.
+    """
+    rng = random.Random(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    item_records = [make_item(rng, i) for i in range(1, items + 1)]
+    skill_records = [make_skill(rng, i) for i in range(1, skills + 1)]
+
+    paths = {
+        "items": os.path.join(output_dir, "item_data.html"),
+        "skills": os.path.join(output_dir, "skill_data.html"),
+        "wiki_skills": os.path.join(output_dir, "skill_w_types.html"),
+        "monster_skills": os.path.join(output_dir, "monster_skill_data.html"),
+    }
+    with open(paths["items"], "w", encoding="utf-8") as f:
+        f.write(PAGE_HEAD.format(title="Items"))
+        for item in item_records:
+            f.write(item_card(item))
+        f.write(PAGE_TAIL)
+    with open(paths["skills"], "w", encoding="utf-8") as f:
+        f.write(PAGE_HEAD.format(title="Skills"))
+        for skill in skill_records:
+            f.write(skill_card(skill))
+        f.write(PAGE_TAIL)
+    with open(paths["wiki_skills"], "w", encoding="utf-8") as f:
+        rows = [wiki_row(make_wiki_skill(skill), i) for i, skill in enumerate(skill_records)]
+        f.write(PAGE_HEAD.format(title="Skills wiki") + wiki_table(rows) + PAGE_TAIL)
+    with open(paths["monster_skills"], "w", encoding="utf-8") as f:
+        monster_skills = rng.sample(skill_records, min(monsters, len(skill_records)))
+        rows = [wiki_row(make_wiki_skill(skill), i) for i, skill in enumerate(monster_skills)]
+        f.write(PAGE_HEAD.format(title="Monster skills") + wiki_table(rows) + PAGE_TAIL)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate HTML fixtures for the ingest parsers")
+    parser.add_argument("--output-dir", default="fixtures")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--skills", type=int, default=1500)
+    parser.add_argument("--monsters", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = write_fixtures(args.output_dir, args.items, args.skills, args.monsters, args.seed)
+    for kind, path in paths.items():
+        print(f"{kind}: {path}")
+
+if __name__ == "__main__":
+    main()
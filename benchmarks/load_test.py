@@ -0,0 +1,230 @@
+"""Concurrent reader/writer load test for the DB layer.
+
+N readers call the SkillDB/ItemDB/VideoDB query methods while one writer
+edits videos or re-ingests items through DBRoutine. Each PRAGMA preset runs
+on its own copy of the database, and the tool reports read latency
+percentiles, writer throughput and busy/locked error counts.
+
+Example:
+    python -m benchmarks.load_test --readers 4 --duration 10 --writer video
+    python -m benchmarks.load_test --readers 4 --mode process --writer ingest --configs default wal-normal
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from sqlalchemy.exc import OperationalError
+from benchmarks.common import report_header, write_report, print_table
+from benchmarks.generate_dataset import generate_dataset, make_item, HEROES, ITEM_TYPES, SKILL_TYPES
+from db.db_routine import DBRoutine
+from db.items import ItemDB
+from db.skills import SkillDB
+from db.videos import VideoDB
+from utils.config import RARITY_ORDER
+from utils.parse_bazaar_items import store_items
+
+# PRAGMA presets; "default" is what the desktop app uses today
+CONFIGS = {
+    "default": {},
+    "delete-nowait": {"journal_mode": "DELETE", "busy_timeout": 0},
+    "wal": {"journal_mode": "WAL"},
+    "wal-normal": {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 5000},
+}
+
+def _is_lock_error(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+def _random_read(rng, item_db, skill_db, video_db):
+    choice = rng.randrange(6)
+    if choice == 0:
+        return item_db.query_items(rarities=[rng.choice(RARITY_ORDER)])
+    if choice == 1:
+        return item_db.query_items(types=[rng.choice(ITEM_TYPES)], heroes=[rng.choice(HEROES)])
+    if choice == 2:
+        return skill_db.query_skills(types=[rng.choice(SKILL_TYPES)])
+    if choice == 3:
+        return skill_db.query_skills(effect_keyword=rng.choice(["burn", "shield", "heal"]))
+    if choice == 4:
+        return video_db.get_videos(heroes=[rng.choice(HEROES)])
+    return video_db.get_videos(status="Published", sort_by="title", sort_order="ASC")
+
+def _reader_loop(db_routine, duration, seed):
+    """Run random reads until duration elapses. Returns (latencies_ms, lock_errors, other_errors)."""
+    rng = random.Random(seed)
+    item_db, skill_db, video_db = ItemDB(db_routine), SkillDB(db_routine), VideoDB(db_routine)
+    latencies, lock_errors, other_errors = [], 0, 0
+    stop_at = time.perf_counter() + duration
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        try:
+            _random_read(rng, item_db, skill_db, video_db)
+        except OperationalError as e:
+            if _is_lock_error(e):
+                lock_errors += 1
+            else:
+                other_errors += 1
+            continue
+        except Exception:
+            other_errors += 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, lock_errors, other_errors
+
+def _reader_process(db_path, pragmas, duration, seed, queue):
+    logging.disable(logging.CRITICAL)
+    db_routine = DBRoutine(db_path, pragmas=pragmas)
+    queue.put(_reader_loop(db_routine, duration, seed))
+    db_routine.engine.dispose()
+
+def _video_writer(db_routine, stop_event, rng):
+    """Add, edit and delete videos in a loop. Returns (operations, lock_errors)."""
+    video_db = VideoDB(db_routine)
+    item_ids = [item_id for item_id, _ in ItemDB(db_routine).get_all_items()]
+    skill_ids = [skill_id for skill_id, _ in SkillDB(db_routine).get_all_skills()]
+    operations, lock_errors = 0, 0
+    while not stop_event.is_set():
+        try:
+            title = f"Load test {rng.random():.12f}"
+            video_id = video_db.add_video(title, "Short", "2025-01-01", "Draft", "load test", rng.sample(skill_ids, 2),
+                                          rng.sample(item_ids, 4), [rng.choice(HEROES)])
+            video_db.update_video(video_id, title, "Short", "2025-01-02", "Uploaded", "load test edit",
+                                  rng.sample(skill_ids, 2), rng.sample(item_ids, 4), [rng.choice(HEROES)])
+            video_db.delete_video(video_id)
+            operations += 3
+        except OperationalError as e:
+            if not _is_lock_error(e):
+                raise
+            lock_errors += 1
+    return operations, lock_errors
+
+def _ingest_writer(db_routine, stop_event, rng, batch_size=100):
+    """Re-ingest batches of synthetic items through a pooled connection. Returns (items written, lock_errors)."""
+    operations, lock_errors = 0, 0
+    batch_no = 0
+    while not stop_event.is_set():
+        records = [make_item(rng, batch_no * batch_size + i + 1) for i in range(batch_size)]
+        batch_no += 1
+        conn = db_routine.engine.raw_connection()
+        try:
+            store_items(conn, records)
+            conn.commit()
+            operations += len(records)
+        except Exception as e:
+            conn.rollback()
+            if not _is_lock_error(e):
+                raise
+            lock_errors += 1
+        finally:
+            conn.close()
+    return operations, lock_errors
+
+def run_config(name, pragmas, base_db, workdir, args):
+    db_path = os.path.join(workdir, f"load_{name}.db")
+    shutil.copyfile(base_db, db_path)
+    db_routine = DBRoutine(db_path, pragmas=pragmas)
+
+    stop_event = threading.Event()
+    writer_result = {}
+    writer_func = _video_writer if args.writer == "video" else _ingest_writer
+
+    def writer():
+        start = time.perf_counter()
+        ops, errors = writer_func(db_routine, stop_event, random.Random(args.seed))
+        writer_result.update(ops=ops, lock_errors=errors, seconds=time.perf_counter() - start)
+
+    writer_thread = threading.Thread(target=writer, name="writer")
+    writer_thread.start()
+
+    latencies, lock_errors, other_errors = [], 0, 0
+    if args.mode == "thread":
+        results = [None] * args.readers
+
+        def reader(index):
+            results[index] = _reader_loop(db_routine, args.duration, args.seed + index + 1)
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        queue = ctx.Queue()
+        processes = [
+            ctx.Process(target=_reader_process, args=(db_path, pragmas, args.duration, args.seed + i + 1, queue))
+            for i in range(args.readers)
+        ]
+        for p in processes:
+            p.start()
+        results = [queue.get() for _ in processes]
+        for p in processes:
+            p.join()
+
+    stop_event.set()
+    writer_thread.join()
+    db_routine.engine.dispose()
+
+    for reader_latencies, reader_lock_errors, reader_other_errors in results:
+        latencies.extend(reader_latencies)
+        lock_errors += reader_lock_errors
+        other_errors += reader_other_errors
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        "pragmas": pragmas,
+        "reads": len(latencies),
+        "p50_ms": round(quantiles[49], 2),
+        "p95_ms": round(quantiles[94], 2),
+        "p99_ms": round(quantiles[98], 2),
+        "read_lock_errors": lock_errors,
+        "read_other_errors": other_errors,
+        "writer_ops": writer_result.get("ops", 0),
+        "writer_ops_per_s": round(writer_result.get("ops", 0) / writer_result["seconds"], 1) if writer_result.get("seconds") else 0,
+        "writer_lock_errors": writer_result.get("lock_errors", 0),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent reader/writer load test")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+    parser.add_argument("--writer", choices=["video", "ingest"], default="video")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per configuration")
+    parser.add_argument("--configs", nargs="+", choices=sorted(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--scale", type=float, default=1.0, help="Synthetic dataset scale")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="load_test.json", help="JSON report path")
+    parser.add_argument("--verbose", action="store_true", help="Keep DB error logging enabled")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # Lock errors are counted; logging each one would distort the timings
+        logging.disable(logging.CRITICAL)
+
+    report = report_header("load")
+    report.update(readers=args.readers, mode=args.mode, writer=args.writer, duration=args.duration, scale=args.scale)
+    report["configs"] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        base_db = os.path.join(workdir, "base.db")
+        generate_dataset(base_db, scale=args.scale, seed=args.seed)
+        for name in args.configs:
+            print(f"Running {name} ...")
+            report["configs"][name] = run_config(name, CONFIGS[name], base_db, workdir, args)
+
+    rows = [
+        (name, r["reads"], r["p50_ms"], r["p95_ms"], r["p99_ms"], r["read_lock_errors"],
+         r["writer_ops"], r["writer_ops_per_s"], r["writer_lock_errors"])
+        for name, r in report["configs"].items()
+    ]
+    print_table(["config", "reads", "p50 ms", "p95 ms", "p99 ms", "read locks",
+                 "writer ops", "writer ops/s", "writer locks"], rows)
+    write_report(report, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Measure ingest parser throughput on generated HTML fixtures.
+
+Parse time, DB write time and peak traced memory are reported separately for
+the item parser and the skill parser. Timings come from a run without
+tracemalloc; memory from a second, traced run.
+
+Example:
+    python -m benchmarks.parser_benchmark --items 5000 --skills 3000 --output parser_report.json
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from benchmarks.common import report_header, write_report, print_table
+from benchmarks.generate_html import write_fixtures
+from utils.parse_bazaar_items import create_database_items, parse_items_html, store_items
+from utils.parse_bazaar_skills import create_database_skills, parse_skills_html, store_skills
+
+def _run_phase(func, trace):
+    """Run func and return (result, seconds, peak_bytes or None)."""
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace else None
+    finally:
+        if trace:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+def _store(db_path, store_func, records):
+    conn = sqlite3.connect(db_path)
+    try:
+        store_func(conn, records)
+        conn.commit()
+    finally:
+        conn.close()
+
+def _bench_parser(parse_func, store_func, db_path, trace):
+    records, parse_s, parse_peak = _run_phase(parse_func, trace)
+    # First write inserts everything, the second takes the update path of a re-ingest
+    _, insert_s, insert_peak = _run_phase(lambda: _store(db_path, store_func, records), trace)
+    _, update_s, update_peak = _run_phase(lambda: _store(db_path, store_func, records), trace)
+    return {
+        "entities": len(records),
+        "parse_s": parse_s,
+        "insert_s": insert_s,
+        "update_s": update_s,
+        "parse_peak": parse_peak,
+        "insert_peak": insert_peak,
+        "update_peak": update_peak,
+    }
+
+def run(fixtures, workdir, trace):
+    results = {}
+    items_db = os.path.join(workdir, f"items_{'traced' if trace else 'timed'}.db")
+    skills_db = os.path.join(workdir, f"skills_{'traced' if trace else 'timed'}.db")
+    for path in (items_db, skills_db):
+        if os.path.exists(path):
+            os.remove(path)
+    create_database_items(items_db)
+    create_database_skills(skills_db)
+
+    results["items"] = _bench_parser(
+        lambda: parse_items_html(fixtures["items"]), store_items, items_db, trace
+    )
+    results["skills"] = _bench_parser(
+        lambda: parse_skills_html([fixtures["wiki_skills"], fixtures["skills"]], fixtures["monster_skills"]),
+        store_skills, skills_db, trace
+    )
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HTML ingest parsers")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--skills", type=int, default=1500)
+    parser.add_argument("--monsters", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="Directory for fixtures and databases (default: temporary)")
+    parser.add_argument("--output", default="parser_benchmark.json", help="JSON report path")
+    parser.add_argument("--verbose", action="store_true", help="Keep the parsers' INFO logging enabled")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = args.workdir or tmpdir
+        fixtures = write_fixtures(os.path.join(workdir, "fixtures"), args.items, args.skills, args.monsters, args.seed)
+        sizes = {kind: os.path.getsize(path) for kind, path in fixtures.items()}
+        timed = run(fixtures, workdir, trace=False)
+        traced = run(fixtures, workdir, trace=True)
+
+    report = report_header("parser")
+    report["fixture_bytes"] = sizes
+    report["parsers"] = {}
+    rows = []
+    for name in ("items", "skills"):
+        data = {
+            "entities": timed[name]["entities"],
+            "parse_ms": round(timed[name]["parse_s"] * 1000, 1),
+            "insert_ms": round(timed[name]["insert_s"] * 1000, 1),
+            "update_ms": round(timed[name]["update_s"] * 1000, 1),
+            "parse_peak_kb": round(traced[name]["parse_peak"] / 1024),
+            "insert_peak_kb": round(traced[name]["insert_peak"] / 1024),
+            "update_peak_kb": round(traced[name]["update_peak"] / 1024),
+        }
+        data["entities_per_s"] = round(data["entities"] / timed[name]["parse_s"]) if timed[name]["parse_s"] else None
+        report["parsers"][name] = data
+        rows.append((name, data["entities"], data["parse_ms"], data["insert_ms"], data["update_ms"],
+                     data["parse_peak_kb"], data["insert_peak_kb"], data["update_peak_kb"]))
+
+    print_table(["parser", "entities", "parse ms", "insert ms", "update ms",
+                 "parse peak KB", "insert peak KB", "update peak KB"], rows)
+    write_report(report, args.output)
+
+if __name__ == "__main__":
+    main()
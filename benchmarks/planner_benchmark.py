@@ -0,0 +1,89 @@
+"""Benchmark the build planner on the synthetic catalog and check it against brute force.
+
+Times BuildPlanner.plan for a few hero/type/k combinations at each catalog scale, then runs
+the planner's search on small random catalogs and compares its top-k scores with every
+combination enumerated.
+
+Example:
+    python -m benchmarks.planner_benchmark --scales 1 10 --output planner_report.json
+"""
+import argparse
+import itertools
+import logging
+import os
+import random
+import tempfile
+from benchmarks.common import measure, report_header, write_report, print_table
+from benchmarks.generate_dataset import generate_dataset
+from db.db_routine import DBRoutine
+from db.items import ItemDB
+from db.planner import BuildPlanner, best_loadouts, prune_candidates
+
+SCENARIOS = {
+    "any_hero": {},
+    "hero": {"hero": "Mak"},
+    "hero_k20": {"hero": "Mak", "k": 20},
+    "required_2": {"hero": "Mak", "required_types": ["Weapon", "Food"], "desired_types": ["Tool"]},
+    "required_4_k20": {"required_types": ["Weapon", "Toy", "Dinosaur", "Apparel"], "k": 20},
+    "required_6_k20": {"required_types": ["Weapon", "Toy", "Dinosaur", "Apparel", "Food", "Tool"], "k": 20},
+    "slots_6": {"hero": "Vanessa", "slots": 6, "required_types": ["Weapon"]},
+}
+
+def brute_force(entries, slots, full_mask, k):
+    scores = []
+    for count in range(1, len(entries) + 1):
+        for combo in itertools.combinations(entries, count):
+            covered = 0
+            for entry in combo:
+                covered |= entry[2]
+            if sum(entry[1] for entry in combo) <= slots and covered == full_mask:
+                scores.append(sum(entry[0] for entry in combo))
+    return sorted(scores, reverse=True)[:k]
+
+def check_against_brute_force(trials, seed):
+    rng = random.Random(seed)
+    for _ in range(trials):
+        slots, k, required = rng.randint(1, 10), rng.randint(1, 6), rng.randint(0, 3)
+        entries = [
+            (float(rng.randint(-2, 9)), rng.randint(1, 3), rng.randrange(1 << required), index)
+            for index in range(rng.randint(1, 12))
+        ]
+        full_mask = (1 << required) - 1
+        found = [score for score, _, _ in best_loadouts(prune_candidates(entries, slots, k), slots, full_mask, k)]
+        if found != brute_force(entries, slots, full_mask, k):
+            return False
+    return True
+
+def run_scale(scale, workdir, repeat, seed):
+    db_path = os.path.join(workdir, f"planner_{scale}.db")
+    generate_dataset(db_path, scale=scale, videos=0, seed=seed)
+    db_routine = DBRoutine(db_path)
+    planner = BuildPlanner(ItemDB(db_routine))
+    results = {name: measure(lambda: planner.plan(**kwargs), repeat=repeat) for name, kwargs in SCENARIOS.items()}
+    db_routine.engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the build planner")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--trials", type=int, default=500, help="Random catalogs checked against brute force")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="planner_benchmark.json", help="JSON report path")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    report = report_header("planner_benchmark")
+    report["agrees_with_brute_force"] = check_against_brute_force(args.trials, args.seed)
+    report["scales"] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in args.scales:
+            report["scales"][str(scale)] = run_scale(scale, workdir, args.repeat, args.seed)
+
+    print_table(["scenario"] + [f"scale {scale} (ms)" for scale in report["scales"]],
+                [[name] + [scales[name]["median_ms"] for scales in report["scales"].values()] for name in SCENARIOS])
+    print(f"Top-k scores match brute force on {args.trials} random catalogs: {report['agrees_with_brute_force']}")
+    write_report(report, args.output)
+
+if __name__ == "__main__":
+    main()
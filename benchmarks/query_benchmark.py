@@ -0,0 +1,134 @@
+"""Benchmark ItemDB.query_items, SkillDB.query_skills and VideoDB.get_videos on synthetic data.
+
+Example:
+    python -m benchmarks.query_benchmark --scales 1 10 100 --output query_report.json
+    python -m benchmarks.query_benchmark --compare query_report.json
+"""
+import argparse
+import os
+import tempfile
+from datetime import date, timedelta
+from benchmarks.common import measure, report_header, write_report, load_report, print_table
+from benchmarks.generate_dataset import generate_dataset
+from db.db_routine import DBRoutine
+from db.items import ItemDB
+from db.skills import SkillDB
+from db.videos import VideoDB
+
+# (label, kwargs); the label prefix selects the query method under test
+ITEM_SCENARIOS = [
+    ("items/all", {}),
+    ("items/name", {"name": "001"}),
+    ("items/rarity", {"rarities": ["Gold"]}),
+    ("items/types", {"types": ["Weapon", "Tool"]}),
+    ("items/effect", {"effect_keyword": "burn"}),
+    ("items/hero", {"heroes": ["Vanessa"]}),
+    ("items/size", {"size": "Small"}),
+    ("items/combined", {"rarities": ["Gold"], "types": ["Weapon"], "heroes": ["Vanessa"], "size": "Medium"}),
+    ("items/sort-rarity", {"sort_by": "rarity", "sort_order": "DESC"}),
+    ("items/sort-types", {"sort_by": "types"}),
+    ("items/value", {"value_filters": ["damage >= 50"]}),
+    ("items/value-at-rarity", {"value_filters": ["damage >= 50 at Gold"]}),
+    ("items/value-combined", {"value_filters": ["damage >= 50 at Gold", "cooldown <= 2"], "heroes": ["Vanessa"]}),
+    ("items/sort-stat", {"sort_by": "stat:damage", "sort_order": "DESC"}),
+]
+
+SKILL_SCENARIOS = [
+    ("skills/all", {}),
+    ("skills/name", {"name": "001"}),
+    ("skills/rarity", {"rarities": ["Diamond"]}),
+    ("skills/types", {"types": ["Burn", "Poison"]}),
+    ("skills/effect", {"effect_keyword": "shield"}),
+    ("skills/hero", {"heroes": ["Dooley"]}),
+    ("skills/sort-rarity", {"sort_by": "rarity"}),
+    ("skills/sort-types", {"sort_by": "types", "sort_order": "DESC"}),
+    ("skills/value-at-rarity", {"value_filters": ["burn >= 20 at Gold"]}),
+]
+
+VIDEO_SCENARIOS = [
+    ("videos/all", {}),
+    ("videos/type-status", {"video_type": "Short", "status": "Published"}),
+    ("videos/skills", {"skill_ids": [1, 2, 3]}),
+    ("videos/items", {"item_ids": [1, 2, 3]}),
+    ("videos/hero", {"heroes": ["Mak"]}),
+    ("videos/heroes-any", {"heroes": ["Mak", "Vanessa"]}),
+    ("videos/items-all", {"item_ids": [1, 2], "item_match": "all"}),
+    ("videos/sort-title", {"sort_by": "title", "sort_order": "ASC"}),
+    # The tab's default view: the last month of a multi-year history
+    ("videos/last-month", {"date_from": (date.today() - timedelta(days=30)).isoformat()}),
+    ("videos/last-month-status", {"date_from": (date.today() - timedelta(days=30)).isoformat(), "status": ["Draft", "Uploaded"]}),
+    ("videos/title-prefix", {"title_prefix": "Mak"}),
+    ("videos/sort-status", {"sort_by": "status"}),
+    ("videos/search", {"search": "weapon", "sort_by": "relevance"}),
+    ("videos/search-filtered", {"search": "mak", "video_type": "Short", "status": "Published"}),
+]
+
+def run_scale(scale, workdir, repeat, seed, keep):
+    db_path = os.path.join(workdir, f"bench_x{scale:g}.db")
+    if keep and os.path.exists(db_path):
+        counts = None
+    else:
+        counts = generate_dataset(db_path, scale=scale, seed=seed)
+
+    db_routine = DBRoutine(db_path)
+    targets = {
+        "items": ItemDB(db_routine).query_items,
+        "skills": SkillDB(db_routine).query_skills,
+        "videos": VideoDB(db_routine).get_videos,
+    }
+    results = {}
+    for label, kwargs in ITEM_SCENARIOS + SKILL_SCENARIOS + VIDEO_SCENARIOS:
+        func = targets[label.split("/")[0]]
+        try:
+            stats = measure(lambda: func(**kwargs), repeat=repeat)
+            stats["rows"] = len(func(**kwargs))
+        except Exception as e:
+            # Keep going so one broken query does not hide the rest of the report
+            results[label] = {"error": str(e).splitlines()[0]}
+            print(f"x{scale:g} {label:<22} failed: {results[label]['error']}")
+            continue
+        results[label] = stats
+        print(f"x{scale:g} {label:<22} median {stats['median_ms']:>10.2f} ms  rows {stats['rows']}")
+    db_routine.engine.dispose()
+    return {"counts": counts, "results": results}
+
+def compare(current, baseline):
+    rows = []
+    for scale, data in current["scales"].items():
+        base_results = baseline.get("scales", {}).get(scale, {}).get("results", {})
+        for label, stats in data["results"].items():
+            base = base_results.get(label)
+            if not base or "error" in base or "error" in stats:
+                continue
+            ratio = stats["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+            rows.append((f"x{scale}", label, base["median_ms"], stats["median_ms"], f"{ratio:.2f}x"))
+    print(f"\nBaseline {baseline.get('commit', '?')} vs current {current.get('commit', '?')} (median ms)")
+    print_table(["scale", "scenario", "baseline", "current", "ratio"], rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the catalog and video query methods")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10],
+                        help="Dataset multipliers of today's size (e.g. 1 10 100)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="Directory for generated databases (default: temporary)")
+    parser.add_argument("--keep", action="store_true", help="Reuse databases already present in --workdir")
+    parser.add_argument("--output", default="query_benchmark.json", help="JSON report path")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    report = report_header("query")
+    report["repeat"] = args.repeat
+    report["scales"] = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = args.workdir or tmpdir
+        os.makedirs(workdir, exist_ok=True)
+        for scale in args.scales:
+            report["scales"][f"{scale:g}"] = run_scale(scale, workdir, args.repeat, args.seed, args.keep)
+
+    write_report(report, args.output)
+    if args.compare:
+        compare(report, load_report(args.compare))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark text queries (db/query_dsl.py) against the keyword filters they replace.
+
+Times compiling a query without and with the compiled-query cache, running a text query
+next to the query_items / query_skills / get_videos call with the same filters (the
+results must match), and running OR / negated queries in one statement next to the
+previous route of one filter query per branch combined in Python.
+
+Example:
+    python -m benchmarks.query_dsl_benchmark --scales 1 10 --output query_dsl_report.json
+"""
+import argparse
+import logging
+import os
+import tempfile
+from benchmarks.common import measure, report_header, write_report, print_table
+from benchmarks.generate_dataset import generate_dataset
+from db.db_routine import DBRoutine
+from db.items import ItemDB
+from db.skills import SkillDB
+from db.videos import VideoDB
+from db.query_dsl import QUERY_CACHE, compile_query
+
+COMPILE_QUERIES = [
+    'hero:Vanessa type:Weapon,Tool rarity>=Gold size:Small effect:"burn"',
+    "-type:Weapon (rarity:Bronze OR damage>=50@Gold) enchant:Fiery,Golden",
+]
+
+def equivalent_queries(item_db, skill_db, video_db):
+    """(name, text query, same filters as keyword arguments); both must return the same rows."""
+    return [
+        ("items/hero+types+size+effect", lambda: item_db.query_items(query='hero:Vanessa type:Weapon,Tool size:Small effect:"burn"'),
+         lambda: item_db.query_items(heroes=["Vanessa"], types=["Weapon", "Tool"], size="Small", effect_keyword="burn")),
+        ("items/value", lambda: item_db.query_items(query="damage>=50@Gold"),
+         lambda: item_db.query_items(value_filters=["damage >= 50 at Gold"])),
+        ("skills/hero+types", lambda: skill_db.query_skills(query="hero:Mak type:Burn,Poison"),
+         lambda: skill_db.query_skills(heroes=["Mak"], types=["Burn", "Poison"])),
+        ("videos/hero+status+date", lambda: video_db.get_videos(query="hero:Mak status:Published date>=2024-01-01"),
+         lambda: video_db.get_videos(heroes=["Mak"], status="Published", date_from="2024-01-01")),
+    ]
+
+def combined_queries(item_db):
+    """(name, text query, the same through several keyword queries combined in Python)."""
+    def by_id(records):
+        return {record.id: record for record in records}
+
+    def or_types_or_effect():
+        merged = by_id(item_db.query_items(types=["Weapon"]))
+        merged.update(by_id(item_db.query_items(effect_keyword="burn")))
+        return sorted(merged.values(), key=lambda record: record.name)
+
+    def not_size():
+        large = {record.id for record in item_db.query_items(size="Large", rarities=["Gold"])}
+        return [record for record in item_db.query_items(rarities=["Gold"]) if record.id not in large]
+
+    return [
+        ("items/type OR effect", lambda: item_db.query_items(query="type:Weapon OR effect:burn"), or_types_or_effect),
+        ("items/rarity -size", lambda: item_db.query_items(query="rarity:Gold -size:Large"), not_size),
+    ]
+
+def run_scale(scale, workdir, repeat, seed):
+    db_path = os.path.join(workdir, f"query_dsl_{scale}.db")
+    generate_dataset(db_path, scale=scale, seed=seed)
+    db_routine = DBRoutine(db_path)
+    item_db, skill_db, video_db = ItemDB(db_routine), SkillDB(db_routine), VideoDB(db_routine)
+    results, agree = {}, True
+
+    def compile_cold():
+        QUERY_CACHE.clear()
+        for text in COMPILE_QUERIES:
+            compile_query("items", text)
+
+    def compile_cached():
+        for text in COMPILE_QUERIES:
+            compile_query("items", text)
+    results["compile/uncached"] = measure(compile_cold, repeat=repeat)
+    results["compile/cached"] = measure(compile_cached, repeat=repeat)
+
+    for name, text_query, keyword_query in equivalent_queries(item_db, skill_db, video_db) + combined_queries(item_db):
+        agree = agree and [record.id for record in text_query()] == [record.id for record in keyword_query()]
+        results[f"{name}/query"] = measure(text_query, repeat=repeat)
+        results[f"{name}/keywords"] = measure(keyword_query, repeat=repeat)
+    db_routine.engine.dispose()
+    return agree, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text queries against keyword filters")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="query_dsl_benchmark.json", help="JSON report path")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    report = report_header("query_dsl_benchmark")
+    report["agree"] = True
+    report["scales"] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in args.scales:
+            agree, results = run_scale(scale, workdir, args.repeat, args.seed)
+            report["agree"] = report["agree"] and agree
+            report["scales"][str(scale)] = results
+
+    scenarios = list(next(iter(report["scales"].values())))
+    print_table(["scenario"] + [f"scale {scale} (ms)" for scale in report["scales"]],
+                [[name] + [scales[name]["median_ms"] for scales in report["scales"].values()] for name in scenarios])
+    print(f"Text queries and keyword filters return the same rows: {report['agree']}")
+    write_report(report, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Compare the memory held by query results as per-row dicts vs slotted records.
+
+Dict rows are built from group_concat strings, as the old queries returned
+them; record rows from the JSON arrays the queries return now. The strings are created inside
+the traced region, as the DB driver would, so strings a record keeps count
+against it. "displayed" is measured after every row has been formatted for the
+Treeview once.
+
+Example:
+    python -m benchmarks.record_memory --rows 20000
+"""
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+from benchmarks.common import report_header, write_report, print_table
+from benchmarks.generate_dataset import make_item, make_skill, HEROES
+from db.records import ItemRecord, SkillRecord, VideoRecord
+from utils.config import RARITY_ORDER
+
+def _sorted_split(value):
+    return sorted(list(set(value.split(","))) if value else [], key=str.lower)
+
+def legacy_item(row):
+    """The per-row dict query_items used to build."""
+    rarities = sorted(
+        [r for r in (row[3].split(",") if row[3] else []) if r],
+        key=lambda x: RARITY_ORDER.index(x) if x in RARITY_ORDER else len(RARITY_ORDER)
+    )
+    return {
+        "id": row[0], "name": row[1], "size": row[2],
+        "rarities": ", ".join(rarities),
+        "effects": ", ".join(_sorted_split(row[4])),
+        "types": _sorted_split(row[5]),
+        "heroes": _sorted_split(row[6]),
+        "enchantments": ", ".join(_sorted_split(row[7])),
+    }
+
+def legacy_skill(row):
+    """The per-row dict query_skills used to build."""
+    rarities = sorted(
+        [r for r in (row[2].split(",") if row[2] else []) if r],
+        key=lambda x: RARITY_ORDER.index(x) if x in RARITY_ORDER else len(RARITY_ORDER)
+    )
+    return {
+        "id": row[0], "name": row[1],
+        "rarities": ", ".join(rarities),
+        "effects": ", ".join(_sorted_split(row[3])),
+        "types": _sorted_split(row[4]),
+        "heroes": _sorted_split(row[5]),
+    }
+
+def legacy_video(row):
+    """The per-row dict get_videos used to build."""
+    keys = ("id", "title", "type", "date", "status", "description", "local_path", "url", "skills", "items", "heroes")
+    return {key: (value or "") if key not in ("id", "title", "type", "date", "status", "description") else value
+            for key, value in zip(keys, row)}
+
+def legacy_item_values(d):
+    return (d["name"], d["size"], d["effects"], d["rarities"], ", ".join(d["types"]), ", ".join(d["heroes"]), d["enchantments"])
+
+def legacy_skill_values(d):
+    return (d["name"], d["effects"], d["rarities"], ", ".join(d["types"]), ", ".join(d["heroes"]))
+
+def legacy_video_values(d):
+    return (d["title"], d["type"], d["date"], d["status"], d["skills"], d["items"], d["heroes"],
+            d["description"], d["local_path"], d["url"])
+
+def concat_list(values):
+    return ",".join(values)
+
+def concat_object(mapping):
+    return ",".join(f"{name}: {effect}" for name, effect in mapping.items())
+
+def item_rows(rng, count, encode_list, encode_object):
+    rows = []
+    for i in range(1, count + 1):
+        item = make_item(rng, i)
+        rows.append((i, item["name"], item["size"], encode_list(item["rarities"]), encode_list(item["effects"]),
+                     encode_list(item["types"]), encode_list([item["hero"]] if item["hero"] else []),
+                     encode_object(item["enchantments"])))
+    return rows
+
+def skill_rows(rng, count, encode_list, encode_object):
+    rows = []
+    for i in range(1, count + 1):
+        skill = make_skill(rng, i)
+        rows.append((i, skill["name"], encode_list(skill["rarities"]), encode_list(skill["effects"]),
+                     encode_list(skill["types"]), encode_list(skill["heroes"])))
+    return rows
+
+def video_rows(rng, count, encode_list, encode_object):
+    return [
+        (i, f"Video {i}", "Short", "2025-01-01", "Published", f"Description {i}", None, None,
+         encode_list([f"Skill {rng.randrange(600):06d}" for _ in range(2)]),
+         encode_list([f"Item {rng.randrange(900):06d}" for _ in range(4)]), encode_list([rng.choice(HEROES)]))
+        for i in range(1, count + 1)
+    ]
+
+def _retained(make_rows, count, seed, encoders, build, display=None):
+    """Bytes still allocated after building (and optionally displaying) count rows."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rows = make_rows(random.Random(seed), count, *encoders)
+    results = [build(row) for row in rows]
+    del rows
+    if display:
+        for result in results:
+            display(result)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del results
+    return retained
+
+CASES = [
+    ("items", item_rows, legacy_item, legacy_item_values, lambda row: ItemRecord(*row)),
+    ("skills", skill_rows, legacy_skill, legacy_skill_values, lambda row: SkillRecord(*row)),
+    ("videos", video_rows, legacy_video, legacy_video_values, lambda row: VideoRecord(*row)),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row memory of dict results vs slotted records")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="record_memory.json", help="JSON report path")
+    args = parser.parse_args()
+
+    report = report_header("record_memory")
+    report["rows"] = args.rows
+    report["results"] = {}
+    table = []
+    for name, make_rows, legacy, legacy_values, record in CASES:
+        def per_row(encoders, build, display=None):
+            return _retained(make_rows, args.rows, args.seed, encoders, build, display) // args.rows
+
+        concat, as_json = (concat_list, concat_object), (json.dumps, json.dumps)
+        data = {
+            "dict_built_bytes_per_row": per_row(concat, legacy),
+            "record_built_bytes_per_row": per_row(as_json, record),
+            "dict_displayed_bytes_per_row": per_row(concat, legacy, legacy_values),
+            "record_displayed_bytes_per_row": per_row(as_json, record, lambda r: r.display_values()),
+        }
+        report["results"][name] = data
+        table.append((name, data["dict_built_bytes_per_row"], data["record_built_bytes_per_row"],
+                      data["dict_displayed_bytes_per_row"], data["record_displayed_bytes_per_row"]))
+
+    print_table(["results", "dict B/row", "record B/row", "dict B/row (displayed)", "record B/row (displayed)"], table)
+    write_report(report, args.output)
+
+if __name__ == "__main__":
+    main()
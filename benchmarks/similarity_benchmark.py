@@ -0,0 +1,92 @@
+"""Benchmark the item similarity index: build, reload from disk and top-k lookups.
+
+For each catalog scale, times building the TF-IDF matrix, loading it from the on-disk cache,
+ItemDB.similar_items for one item, and the top-k of every item scored one row at a time
+against the batched matrix products SimilarityIndex.similar uses.
+
+Example:
+    python -m benchmarks.similarity_benchmark --scales 1 10 --output similarity_report.json
+"""
+import argparse
+import logging
+import os
+import tempfile
+import numpy as np
+from benchmarks.common import measure, report_header, write_report, print_table
+from benchmarks.generate_dataset import generate_dataset
+from db.db_routine import DBRoutine
+from db.items import ItemDB
+
+def top_k_per_row(ids, matrix, k):
+    # One matrix-vector product and a full sort per item
+    results = {}
+    for row, entity_id in enumerate(ids):
+        scores = matrix @ matrix[row]
+        scores[row] = -1.0
+        results[int(entity_id)] = [int(ids[column]) for column in np.argsort(-scores)[:k]]
+    return results
+
+def run_scale(scale, workdir, repeat, k, seed):
+    db_path = os.path.join(workdir, f"similarity_{scale}.db")
+    generate_dataset(db_path, scale=scale, videos=0, seed=seed)
+    db_routine = DBRoutine(db_path)
+    index = ItemDB(db_routine).similarity
+
+    def build():
+        with db_routine.read_connection() as conn:
+            return index._build(conn)
+
+    def reload():
+        index.version = None
+        return index._refresh()
+
+    ids, matrix = build()
+    all_ids = [int(entity_id) for entity_id in ids]
+    index._refresh()
+    results = {
+        "rows": len(ids),
+        "terms": matrix.shape[1],
+        "build": measure(build, repeat=repeat),
+        "load_from_cache": measure(reload, repeat=repeat),
+        "similar_items": measure(lambda: ItemDB(db_routine).similar_items(all_ids[0], k), repeat=repeat),
+        "all_top_k_per_row": measure(lambda: top_k_per_row(ids, matrix, k), repeat=1, warmup=0),
+        "all_top_k_batched": measure(lambda: index.similar(all_ids, k), repeat=max(1, repeat // 5)),
+    }
+    # Same neighbours as the reference, ignoring order among equal scores
+    batched = index.similar(all_ids, k)
+    reference = top_k_per_row(ids, matrix, k)
+    results["agrees_with_per_row"] = all(
+        len(set(reference[entity_id]) & {other for other, _ in batched[entity_id]}) >= len(batched[entity_id]) - 1
+        for entity_id in all_ids
+    )
+    db_routine.engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the item similarity index")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="similarity_benchmark.json", help="JSON report path")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    report = report_header("similarity_benchmark")
+    report["sizes"] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in args.scales:
+            report["sizes"][str(scale)] = run_scale(scale, workdir, args.repeat, args.k, args.seed)
+
+    rows = []
+    for scale, sizes in report["sizes"].items():
+        rows.append([scale, sizes["rows"], sizes["terms"]] + [
+            sizes[label]["median_ms"] for label in
+            ("build", "load_from_cache", "similar_items", "all_top_k_per_row", "all_top_k_batched")
+        ] + [sizes["agrees_with_per_row"]])
+    print_table(["scale", "items", "terms", "build (ms)", "cache load (ms)", "similar_items (ms)",
+                 "all per row (ms)", "all batched (ms)", "agrees"], rows)
+    write_report(report, args.output)
+
+if __name__ == "__main__":
+    main()
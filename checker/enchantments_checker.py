@@ -1,37 +1,23 @@
 import sqlite3
-
-DEFAULT_ENCHANTMENTS = {
-    "Heavy": "None",
-    "Icy": "None",
-    "Turbo": "None",
-    "Shielded": "None",
-    "Restorative": "None",
-    "Toxic": "None",
-    "Fiery": "None",
-    "Shiny": "None",
-    "Deadly": "None",
-    "Radiant": "None",
-    "Obsidian": "None",
-    "Golden": "None",
-}
+from utils.config import ENCHANTMENT_NAMES
 
 if __name__ == "__main__":
     conn = sqlite3.connect("bazaar.db")
     cursor = conn.cursor()
 
-    maxi_item_id = cursor.execute("SELECT MAX(id) FROM items").fetchone()[0]
+    # Items only have rows for the enchantments they have; every name must be a known one
+    for item_id, enchantment_name in cursor.execute("SELECT item_id, enchantment_name FROM enchantments"):
+        if enchantment_name not in ENCHANTMENT_NAMES:
+            print(f"Item with ID {item_id}: enchantment {enchantment_name} not found in ENCHANTMENT_NAMES")
 
-    for item_id in range(1, maxi_item_id + 1):
-        count = 0
-        print(f"Checking item with ID {item_id} for enchantments...")
-        for rows in cursor.execute("SELECT * FROM enchantments WHERE item_id = ?", (item_id,)):
-            enchantment_name = rows[1]
+    # Every enchantment must point at an existing effect text
+    for item_id, enchantment_name in cursor.execute("""
+        SELECT e.item_id, e.enchantment_name FROM enchantments e
+        WHERE NOT EXISTS (SELECT 1 FROM effect_texts t WHERE t.id = e.effect_id)
+    """):
+        print(f"Item with ID {item_id}: enchantment {enchantment_name} has no effect text")
 
-            if enchantment_name in DEFAULT_ENCHANTMENTS:
-                count += 1
-            else:
-                print(f"Enchantment {enchantment_name} not found in DEFAULT_ENCHANTMENTS")
-                continue
-        if count != 12:
-            print(f"Item with ID {item_id} has {count} enchantments instead of 12.")
-    
\ No newline at end of file
+    without = cursor.execute(
+        "SELECT COUNT(*) FROM items WHERE NOT EXISTS (SELECT 1 FROM enchantments e WHERE e.item_id = items.id)"
+    ).fetchone()[0]
+    print(f"{without} items have no enchantments")
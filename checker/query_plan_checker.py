@@ -0,0 +1,178 @@
+"""Check EXPLAIN QUERY PLAN for every canonical query shape.
+
+Builds a small synthetic database (or uses --db), runs EXPLAIN QUERY PLAN for
+each filter/sort shape of query_items, query_skills and get_videos, and exits
+with status 1 if any child or association table is read with a full SCAN,
+or if a sorted video shape needs a temporary B-tree instead of an index.
+Scanning the driving table (items, skills, videos) is expected: the
+unfiltered and LIKE-filtered shapes return or test every row. So is scanning
+effect_texts for the effect keyword, which is matched with LIKE '%...%', and
+the videos_fts virtual table, which answers the text search from its own index.
+Text queries (db/query_dsl.py) may also read the type, hero, skill and item names in
+full once per query: they compare names case-insensitively, which the name indexes
+cannot serve.
+
+Usage:
+    python -m checker.query_plan_checker
+    python -m checker.query_plan_checker --db bazaar.db --verbose
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from benchmarks.generate_dataset import generate_dataset
+from db.db_routine import DBRoutine
+from db.items import ItemDB
+from db.skills import SkillDB
+from db.videos import VideoDB
+
+# Tables each query method may scan in full
+DRIVING_TABLES = {"items": "items", "skills": "skills", "videos": "videos"}
+# Tables a filter parameter may scan in full (or, for videos_fts, read through its own index)
+LIKE_TABLES = {"effect": "effect_texts", "search": "videos_fts"}
+# Tables a text query may scan in full
+QUERY_TABLES = {"effect_texts", "videos_fts", "types", "heroes", "skills", "items"}
+
+ITEM_SHAPES = [
+    {},
+    {"name": "001"},
+    {"rarities": ["Gold"]},
+    {"types": ["Weapon", "Tool"]},
+    {"effect_keyword": "burn"},
+    {"heroes": ["Vanessa"]},
+    {"size": "Small"},
+    {"rarities": ["Gold"], "types": ["Weapon"], "heroes": ["Vanessa"], "size": "Medium"},
+    {"sort_by": "rarity", "sort_order": "DESC"},
+    {"sort_by": "types"},
+    {"value_filters": ["damage >= 50"]},
+    {"value_filters": ["damage >= 50 at Gold", "cooldown <= 2"]},
+    {"sort_by": "stat:damage", "sort_order": "DESC"},
+    {"query": 'hero:Vanessa type:Weapon,Tool rarity>=Gold size:Small effect:"burn"'},
+    {"query": "-type:Weapon (rarity:Bronze OR damage>=50@Gold) enchant:Fiery,Golden"},
+    {"query": "NOT enchant:Golden cooldown<=2", "heroes": ["Mak"], "sort_by": "rarity"},
+]
+
+SKILL_SHAPES = [
+    {},
+    {"name": "001"},
+    {"rarities": ["Diamond"]},
+    {"types": ["Burn", "Poison"]},
+    {"effect_keyword": "shield"},
+    {"heroes": ["Dooley"]},
+    {"sort_by": "rarity"},
+    {"sort_by": "types", "sort_order": "DESC"},
+    {"value_filters": ["burn >= 20 at Gold"]},
+    {"query": "hero:Mak (type:Burn | burn>=20@Gold) -rarity:Bronze"},
+]
+
+VIDEO_SHAPES = [
+    {},
+    {"video_type": "Short", "status": "Published"},
+    {"skill_ids": [1, 2, 3]},
+    {"item_ids": [1, 2, 3]},
+    {"heroes": ["Mak"]},
+    {"item_ids": [1, 2, 3], "item_match": "all"},
+    {"skill_ids": [1, 2], "skill_match": "all", "heroes": ["Mak", "Vanessa"], "hero_match": "all"},
+    {"sort_by": "title", "sort_order": "ASC"},
+    {"date_from": (date.today() - timedelta(days=30)).isoformat()},
+    {"date_from": "2024-01-01", "date_to": "2024-01-31", "status": ["Draft", "Uploaded"]},
+    {"title_prefix": "Mak"},
+    {"search": "weapon", "sort_by": "relevance"},
+    {"search": "mak build", "video_type": "Short", "status": ["Published"], "item_ids": [1, 2]},
+    {"query": 'mak build -status:Draft skill:"Skill 000001" | item:"Item 000002" hero:Mak date>=2024-01-01'},
+]
+
+# Video sort keys must be read in index order, without a temporary B-tree
+SORTED_VIDEO_SHAPES = [
+    {"sort_by": "date"},
+    {"sort_by": "date", "sort_order": "ASC"},
+    {"sort_by": "title", "sort_order": "DESC"},
+    {"sort_by": "status"},
+    {"sort_by": "type", "sort_order": "ASC"},
+    {"date_from": (date.today() - timedelta(days=30)).isoformat()},
+]
+
+def explain(conn, stmt, params, top_level=False):
+    """Return the EXPLAIN QUERY PLAN detail lines for stmt with params inlined.
+
+    With top_level, only the outer query's lines (not its subqueries') are returned.
+    """
+    sql = str(stmt.params(params).compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+    return [row[3] for row in rows if not top_level or row[1] == 0]
+
+def temp_sorts(plan):
+    """Plan lines that sort the result instead of reading it in index order (pass the top-level plan)."""
+    return [detail for detail in plan if "TEMP B-TREE FOR ORDER BY" in detail]
+
+def full_scans(plan, allowed):
+    """Plan lines that read a table not in allowed in full."""
+    problems = []
+    for detail in plan:
+        if not detail.startswith("SCAN "):
+            continue
+        table = detail.split()[1]
+        # Subquery results (anon_N, "SCAN (subquery-N)") and allowed tables are fine
+        if table in allowed or table.startswith("anon_") or table.startswith("("):
+            continue
+        problems.append(detail)
+    return problems
+
+def check(db_path, verbose=False):
+    db_routine = DBRoutine(db_path)
+    shapes = [
+        ("items", ItemDB(db_routine).query_items_statement, ITEM_SHAPES),
+        ("skills", SkillDB(db_routine).query_skills_statement, SKILL_SHAPES),
+        ("videos", VideoDB(db_routine).get_videos_statement, VIDEO_SHAPES),
+        ("videos", VideoDB(db_routine).get_videos_statement, SORTED_VIDEO_SHAPES),
+    ]
+    failures = 0
+    with db_routine.read_connection() as conn:
+        for name, statement_func, kwargs_list in shapes:
+            for kwargs in kwargs_list:
+                stmt, params = statement_func(**kwargs)
+                plan = explain(conn, stmt, params)
+                allowed = {DRIVING_TABLES[name]} | {LIKE_TABLES[key] for key in params if key in LIKE_TABLES}
+                if "query" in kwargs:
+                    allowed |= QUERY_TABLES
+                problems = full_scans(plan, allowed)
+                if kwargs_list is SORTED_VIDEO_SHAPES:
+                    problems += temp_sorts(explain(conn, stmt, params, top_level=True))
+                label = f"{name} {kwargs or '{}'}"
+                if problems:
+                    failures += 1
+                    print(f"FAIL {label}")
+                    for detail in problems:
+                        print(f"    {detail}")
+                else:
+                    print(f"ok   {label}")
+                if verbose:
+                    for detail in plan:
+                        print(f"        {detail}")
+    db_routine.engine.dispose()
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail on full table scans in the canonical query plans")
+    parser.add_argument("--db", help="Database to check (default: a generated synthetic database)")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan line")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    if args.db:
+        failures = check(args.db, args.verbose)
+    else:
+        with tempfile.TemporaryDirectory() as workdir:
+            db_path = os.path.join(workdir, "plan_check.db")
+            generate_dataset(db_path, scale=0.2)
+            failures = check(db_path, args.verbose)
+
+    if failures:
+        print(f"{failures} query shape(s) use a full table scan or an unindexed sort")
+        sys.exit(1)
+    print("No full table scans or unindexed sorts")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Query the catalog and the video library from the command line, without the Tk app.
+
+The query is a text query (db/query_dsl.py). Results are written to stdout as the rows are
+read, as NDJSON (one JSON object per line, the default), CSV or a plain table. With
+--limit, the --cursor of the next page is printed on stderr.
+
+Examples:
+    bazaar-query items 'hero:Vanessa type:Weapon,Tool rarity>=Gold' --sort rarity
+    bazaar-query skills 'burn>=20@Gold' --format table --fields name,rarities,effects
+    bazaar-query videos 'hero:Mak -status:Draft' --format csv > videos.csv
+    bazaar-query items --limit 100 --cursor 100
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from utils.config import DATABASE_PATH
+
+# Default sort and order per entity
+ENTITIES = {
+    "items": ("name", "ASC"),
+    "skills": ("name", "ASC"),
+    "videos": ("date", "DESC"),
+}
+TABLE_WIDTH = 40
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bazaar-query", description="Query items, skills or videos from the database")
+    parser.add_argument("entity", choices=sorted(ENTITIES))
+    parser.add_argument("query", nargs="?", default="",
+                        help='Text query, e.g. \'hero:Vanessa type:Weapon,Tool rarity>=Gold -size:Large\'')
+    parser.add_argument("--db", default=DATABASE_PATH, help=f"Database file (default: {DATABASE_PATH})")
+    parser.add_argument("--sort", help="items/skills: name, rarity, types, stat:<stat>; videos: date, title, status, type, relevance")
+    parser.add_argument("--order", choices=["asc", "desc"], help="Sort order (default: asc, videos desc)")
+    parser.add_argument("--search", default="", help="videos: full-text search, with --sort relevance for best matches first")
+    parser.add_argument("--format", choices=["ndjson", "csv", "table"], default="ndjson")
+    parser.add_argument("--fields", help="Comma-separated fields to output (default: all)")
+    parser.add_argument("--limit", type=int, help="Rows per page")
+    parser.add_argument("--cursor", type=int, default=0, help="Page start printed by the previous --limit page")
+    parser.add_argument("--verbose", action="store_true", help="Show database log messages")
+    return parser
+
+def flat(value):
+    """Single-cell text for CSV and table output."""
+    if isinstance(value, list):
+        return ", ".join(value)
+    if isinstance(value, dict):
+        return ", ".join(f"{name}: {text}" for name, text in value.items())
+    return "" if value is None else str(value)
+
+def write_rows(rows, fields, output_format, out):
+    """Write the rows (dicts) as they come, except for the table, which needs every width."""
+    if output_format == "ndjson":
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+    elif output_format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow([flat(row[field]) for field in fields])
+    else:
+        cells = [[flat(row[field])[:TABLE_WIDTH] for field in fields] for row in rows]
+        widths = [max([len(field)] + [len(line[i]) for line in cells]) for i, field in enumerate(fields)]
+        out.write("  ".join(field.ljust(width) for field, width in zip(fields, widths)).rstrip() + "\n")
+        out.write("  ".join("-" * width for width in widths) + "\n")
+        for line in cells:
+            out.write("  ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip() + "\n")
+
+def run(args, parser):
+    # Imported here so --help and argument errors return without loading SQLAlchemy
+    from db.db_routine import DBRoutine
+    from db.items import ItemDB
+    from db.skills import SkillDB
+    from db.videos import VideoDB
+    from db.records import ItemRecord, SkillRecord, VideoRecord
+    from db.query_dsl import QuerySyntaxError
+    from sqlalchemy.exc import OperationalError
+
+    if not os.path.exists(args.db):
+        parser.error(f"database {args.db} not found")
+    if not args.verbose:
+        # Database errors are reported once, as the command's error message
+        logging.disable(logging.ERROR)
+    default_sort, default_order = ENTITIES[args.entity]
+    sort_by = args.sort or default_sort
+    sort_order = args.order.upper() if args.order else default_order
+    if args.search and args.entity != "videos":
+        parser.error("--search only applies to videos")
+
+    # Read-only: no schema creation or seeding, so a writer holding the file does not block us
+    db_routine = DBRoutine(args.db, read_only=True)
+    try:
+        if args.entity == "items":
+            record_class = ItemRecord
+            stmt, params = ItemDB(db_routine).query_items_statement(sort_by=sort_by, sort_order=sort_order, query=args.query)
+        elif args.entity == "skills":
+            record_class = SkillRecord
+            stmt, params = SkillDB(db_routine).query_skills_statement(sort_by=sort_by, sort_order=sort_order, query=args.query)
+        else:
+            record_class = VideoRecord
+            stmt, params = VideoDB(db_routine).get_videos_statement(
+                sort_by=sort_by, sort_order=sort_order, search=args.search, query=args.query
+            )
+    except QuerySyntaxError as e:
+        parser.error(str(e))
+
+    fields = list(record_class.fields)
+    if args.fields:
+        fields = [field.strip() for field in args.fields.split(",") if field.strip()]
+        unknown = [field for field in fields if field not in record_class.fields]
+        if unknown:
+            parser.error(f"unknown field {unknown[0]!r}, expected some of {', '.join(record_class.fields)}")
+
+    # The id (first column) breaks sort ties, so pages do not overlap
+    stmt = stmt.order_by(stmt.selected_columns[0])
+    if args.limit is not None:
+        # One row more than the page tells whether there is a next one
+        stmt = stmt.limit(args.limit + 1).offset(args.cursor)
+    elif args.cursor:
+        stmt = stmt.offset(args.cursor)
+
+    try:
+        return write_results(db_routine, stmt, params, record_class, fields, args)
+    except OperationalError as e:
+        # Locked past the busy timeout, or a database without the current schema
+        parser.error(f"cannot read {args.db}: {e.orig}")
+
+def write_results(db_routine, stmt, params, record_class, fields, args):
+    """Stream the rows of stmt to stdout as records; returns the exit status."""
+    has_more = False
+    with db_routine.read_connection() as conn:
+        result = conn.execute(stmt, params)
+
+        def rows():
+            nonlocal has_more
+            for count, row in enumerate(result):
+                if args.limit is not None and count == args.limit:
+                    has_more = True
+                    return
+                yield record_class(*row).to_json(fields)
+        try:
+            write_rows(rows(), fields, args.format, sys.stdout)
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # The reader (e.g. head) stopped early; point stdout at devnull so the exit flush cannot fail
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return 0
+    if has_more:
+        print(f"next page: --cursor {args.cursor + args.limit}", file=sys.stderr)
+    return 0
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.limit is not None and args.limit < 1 or args.cursor < 0:
+        parser.error("--limit must be positive and --cursor not negative")
+    return run(args, parser)
+
+if __name__ == "__main__":
+    sys.exit(main())
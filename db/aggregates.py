@@ -0,0 +1,62 @@
+"""Correlated JSON aggregates for the query methods.
+
+Each helper returns a scalar subquery that collects the DISTINCT child values
+of the outer row into a JSON array (or object), already in display order, so a
+row is decoded with one json.loads instead of splitting a group_concat string.
+Values may contain commas. Heroes, types, rarities and effect texts are stored
+as ids; their names come from joining the dimension table in the criteria.
+"""
+from sqlalchemy import select, func, literal, bindparam, Integer
+from db.models import Rarity
+
+def json_list(value, owner_column, owner_id, *criteria):
+    """JSON array of the distinct values linked to owner_id, case-insensitively sorted.
+
+    Extra criteria join value's table to the link table when they differ.
+    """
+    ordered = (
+        select(value.label("value"))
+        .where(owner_column == owner_id, *criteria)
+        .distinct()
+        .order_by(value.collate("NOCASE"))
+        .correlate(owner_id.class_)
+        .subquery()
+    )
+    return select(func.json_group_array(ordered.c.value)).scalar_subquery()
+
+def json_rarities(rarity_id, owner_column, owner_id):
+    """JSON array of the distinct rarity names linked to owner_id, in rank order."""
+    ordered = (
+        select(Rarity.name.label("value"), Rarity.rank)
+        .where(owner_column == owner_id, rarity_id == Rarity.id)
+        .distinct()
+        .order_by(Rarity.rank, Rarity.name)
+        .correlate(owner_id.class_)
+        .subquery()
+    )
+    return select(func.json_group_array(ordered.c.value)).scalar_subquery()
+
+def rarity_bits(param):
+    """rarity_mask bits of the rarity names in the expanding bind parameter `param`.
+
+    Uncorrelated, so SQLite evaluates it once per query; test rows with
+    rarity_mask & rarity_bits(...) != 0.
+    """
+    bit = literal(1).op("<<", return_type=Integer)(Rarity.rank - 1)
+    return (
+        select(func.coalesce(func.sum(bit), 0))
+        .where(Rarity.name.in_(bindparam(param, expanding=True)))
+        .scalar_subquery()
+    )
+
+def json_object(key, value, owner_column, owner_id, *criteria):
+    """JSON object of key -> value pairs linked to owner_id, sorted by key."""
+    ordered = (
+        select(key.label("key"), value.label("value"))
+        .where(owner_column == owner_id, *criteria)
+        .distinct()
+        .order_by(key.collate("NOCASE"))
+        .correlate(owner_id.class_)
+        .subquery()
+    )
+    return select(func.json_group_object(ordered.c.key, ordered.c.value)).scalar_subquery()
@@ -0,0 +1,80 @@
+from db.db_routine import DBRoutine
+from db.models import Item, Skill, Hero, ItemCooccurrence, ItemSkillCooccurrence, HeroItemCooccurrence
+from sqlalchemy import select, bindparam, text, Integer
+
+# Recount every pair from the association tables. The triggers keep the counts current
+# afterwards; a rebuild is only needed for databases written before they existed.
+REBUILD_SQL = [
+    "DELETE FROM item_cooccurrence",
+    """INSERT INTO item_cooccurrence (item_id, other_item_id, video_count)
+        SELECT a.item_id, b.item_id, COUNT(*) FROM video_items a
+        JOIN video_items b ON b.video_id = a.video_id AND b.item_id != a.item_id
+        GROUP BY a.item_id, b.item_id""",
+    "DELETE FROM item_skill_cooccurrence",
+    """INSERT INTO item_skill_cooccurrence (item_id, skill_id, video_count)
+        SELECT i.item_id, s.skill_id, COUNT(*) FROM video_items i
+        JOIN video_skills s ON s.video_id = i.video_id
+        GROUP BY i.item_id, s.skill_id""",
+    "DELETE FROM hero_item_cooccurrence",
+    """INSERT INTO hero_item_cooccurrence (hero_id, item_id, video_count)
+        SELECT h.hero_id, i.item_id, COUNT(*) FROM video_heroes h
+        JOIN video_items i ON i.video_id = h.video_id
+        GROUP BY h.hero_id, i.item_id""",
+]
+
+class AnalyticsDB:
+    """Top-N companions from the co-occurrence counts of the video associations.
+
+    Each query reads one index range in count order and stops after limit rows, so its cost
+    depends on limit, not on the size of the library.
+    """
+    def __init__(self, db_routine: DBRoutine):
+        self.db = db_routine
+
+    def item_companions(self, item_id, limit=10):
+        """Items most often featured in the same videos as item_id, as (id, name, video_count)."""
+        return self._top("item_companions", item_id, limit, lambda: self._build_top(
+            ItemCooccurrence.item_id, ItemCooccurrence.other_item_id, ItemCooccurrence.video_count, Item
+        ))
+
+    def item_skills(self, item_id, limit=10):
+        """Skills most often featured with item_id, as (id, name, video_count)."""
+        return self._top("item_skills", item_id, limit, lambda: self._build_top(
+            ItemSkillCooccurrence.item_id, ItemSkillCooccurrence.skill_id, ItemSkillCooccurrence.video_count, Skill
+        ))
+
+    def skill_items(self, skill_id, limit=10):
+        """Items most often featured with skill_id, as (id, name, video_count)."""
+        return self._top("skill_items", skill_id, limit, lambda: self._build_top(
+            ItemSkillCooccurrence.skill_id, ItemSkillCooccurrence.item_id, ItemSkillCooccurrence.video_count, Item
+        ))
+
+    def hero_items(self, hero_name, limit=10):
+        """Items most often featured in videos with hero_name, as (id, name, video_count)."""
+        def build():
+            hero_id = select(Hero.id).where(Hero.name == bindparam("key")).scalar_subquery()
+            return self._build_top(
+                HeroItemCooccurrence.hero_id, HeroItemCooccurrence.item_id, HeroItemCooccurrence.video_count, Item, hero_id
+            )
+        return self._top("hero_items", hero_name, limit, build)
+
+    def _top(self, name, key, limit, build):
+        stmt = self.db.statement(("analytics", name), build)
+        with self.db.read_connection() as conn:
+            return [tuple(row) for row in conn.execute(stmt, {"key": key, "limit": limit})]
+
+    def _build_top(self, key_column, other_column, count_column, other_model, key=None):
+        # Ordered like the (key, video_count, other) index read backwards: no sort step
+        return (
+            select(other_column, other_model.name, count_column)
+            .join(other_model, other_model.id == other_column)
+            .where(key_column == (bindparam("key") if key is None else key))
+            .order_by(count_column.desc(), other_column.desc())
+            .limit(bindparam("limit", type_=Integer))
+        )
+
+    def rebuild(self):
+        """Recount all co-occurrences from the association tables."""
+        with self.db.get_connection() as session:
+            for statement in REBUILD_SQL:
+                session.execute(text(statement))
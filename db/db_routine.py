@@ -1,20 +1,39 @@
 import logging
+import os
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import sessionmaker
-from utils.config import DATABASE_PATH
-from db.models import Base
+from urllib.parse import quote
+from utils.config import DATABASE_PATH, RARITY_ORDER
+from utils.lru_cache import LRUCache
+from db.models import Base, Rarity
+
+# Statements kept for text query shapes (db/query_dsl.py)
+PLAN_CACHE_SIZE = 256
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class DBRoutine:
-    def __init__(self):
-        self.db_path = f"sqlite:///{DATABASE_PATH}"
+    def __init__(self, db_path=DATABASE_PATH, pragmas=None, read_only=False):
+        self.read_only = read_only
+        if read_only:
+            # SQLite opens the file read-only (writes fail); the schema must already exist
+            self.db_path = f"sqlite:///file:{quote(os.path.abspath(db_path))}?mode=ro&uri=true"
+        else:
+            self.db_path = f"sqlite:///{db_path}"
         self.engine = create_engine(self.db_path, echo=False)
+        self.pragmas = dict(pragmas or {})
+        if self.pragmas:
+            event.listen(self.engine, "connect", self._apply_pragmas)
         self.Session = sessionmaker(bind=self.engine)
-        self.initialize_database()
+        # Core statements built by the read methods, keyed by query name and filter shape
+        self.statements = {}
+        self.plans = LRUCache(PLAN_CACHE_SIZE)
+        if not read_only:
+            self.initialize_database()
 
     @contextmanager
     def get_connection(self):
@@ -30,6 +49,34 @@ class DBRoutine:
             session.commit()
             session.close()
 
+    @contextmanager
+    def read_connection(self):
+        """Provide a pooled Core connection for read-only queries. Nothing is committed."""
+        with self.engine.connect() as conn:
+            try:
+                yield conn
+            except Exception as e:
+                logger.error(f"Database error: {e}")
+                raise
+
+    def statement(self, key, build):
+        """Return the statement cached under key, building it with build() on first use."""
+        stmt = self.statements.get(key)
+        if stmt is None:
+            stmt = self.statements[key] = build()
+        return stmt
+
+    def plan(self, key, build):
+        """Like statement(), for open-ended shapes such as text queries: least recently used ones are evicted."""
+        return self.plans.get_or_build(key, build)
+
+    def _apply_pragmas(self, dbapi_connection, connection_record):
+        """Apply the configured PRAGMA settings to every new pooled connection."""
+        cursor = dbapi_connection.cursor()
+        for name, value in self.pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
     def execute(self, query, params=()):
         """Execute a raw SQL query and return results as a list of dictionaries."""
         with self.get_connection() as session:
@@ -46,7 +93,14 @@ class DBRoutine:
         """Create tables and indexes defined in models."""
         try:
             Base.metadata.create_all(self.engine)
+            self.seed_rarities()
             logger.info("Database initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def seed_rarities(self):
+        """Fill the rarity rank table from RARITY_ORDER, keeping existing rows."""
+        rows = [{"id": rank, "name": name, "rank": rank} for rank, name in enumerate(RARITY_ORDER, start=1)]
+        with self.engine.begin() as conn:
+            conn.execute(insert(Rarity).values(rows).on_conflict_do_nothing())
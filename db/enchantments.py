@@ -0,0 +1,84 @@
+"""Item × enchantment matrix for per-enchantment lookups without joins.
+
+Row i holds the enchantments of the i-th item (by id) as effect text ids, one column per
+name in utils.config.ENCHANTMENT_NAMES and MISSING where the item lacks that enchantment.
+The few hundred unique enchantment texts are kept alongside, so "items whose Fiery
+enchantment mentions Burn" matches the keyword against the unique texts once and then
+tests one int32 column, and "items missing a Golden effect" is a single comparison.
+
+The matrix is rebuilt from the enchantments table when the item catalog version changes,
+like the similarity index.
+"""
+import logging
+import threading
+import numpy as np
+from sqlalchemy import select
+from db.models import Item, Enchantment, EffectText
+from db.similarity import catalog_version
+from utils.config import ENCHANTMENT_NAMES
+
+logger = logging.getLogger(__name__)
+
+MISSING = -1
+COLUMNS = {name: column for column, name in enumerate(ENCHANTMENT_NAMES)}
+
+class EnchantmentMatrix:
+    def __init__(self, db_routine):
+        self.db = db_routine
+        self.version = None
+        # (ids, matrix, row of each id, text of each effect id), replaced as a whole
+        self.index = None
+        self.lock = threading.Lock()
+
+    def items_with(self, enchantment, keyword=""):
+        """Ids of the items having enchantment, whose text contains keyword (case-insensitive) if given."""
+        ids, matrix, _, texts = self._refresh()
+        column = matrix[:, self._column(enchantment)]
+        if keyword:
+            keyword = keyword.lower()
+            matching = [effect_id for effect_id, text in texts.items() if keyword in text.lower()]
+            mask = np.isin(column, np.array(matching, dtype=np.int32))
+        else:
+            mask = column != MISSING
+        return ids[mask].tolist()
+
+    def items_missing(self, enchantment):
+        """Ids of the items without enchantment."""
+        ids, matrix, _, _ = self._refresh()
+        return ids[matrix[:, self._column(enchantment)] == MISSING].tolist()
+
+    def enchantments_of(self, item_id):
+        """[(name, text)] for every name in ENCHANTMENT_NAMES order; text is None where the item lacks it."""
+        _, matrix, rows_by_id, texts = self._refresh()
+        row = rows_by_id.get(item_id)
+        if row is None:
+            return []
+        return [(name, texts.get(int(effect_id))) for name, effect_id in zip(ENCHANTMENT_NAMES, matrix[row])]
+
+    def _column(self, enchantment):
+        if enchantment not in COLUMNS:
+            raise ValueError(f"Unknown enchantment {enchantment!r}, expected one of {', '.join(ENCHANTMENT_NAMES)}")
+        return COLUMNS[enchantment]
+
+    def _refresh(self):
+        with self.db.read_connection() as conn:
+            version = catalog_version(conn, Item)
+            with self.lock:
+                if self.version is None or not np.array_equal(self.version, version):
+                    self.index = self._build(conn)
+                    self.version = version
+                return self.index
+
+    def _build(self, conn):
+        ids = np.array(conn.execute(select(Item.id).order_by(Item.id)).scalars().all(), dtype=np.int64)
+        rows_by_id = {int(item_id): row for row, item_id in enumerate(ids)}
+        matrix = np.full((len(ids), len(ENCHANTMENT_NAMES)), MISSING, dtype=np.int32)
+        rows = conn.execute(select(Enchantment.item_id, Enchantment.enchantment_name, Enchantment.effect_id))
+        for item_id, name, effect_id in rows:
+            # Names outside ENCHANTMENT_NAMES are reported by checker/enchantments_checker.py
+            if item_id in rows_by_id and name in COLUMNS:
+                matrix[rows_by_id[item_id], COLUMNS[name]] = effect_id
+        used = select(Enchantment.effect_id).distinct()
+        texts = dict(conn.execute(select(EffectText.id, EffectText.text).where(EffectText.id.in_(used))).all())
+        logger.info(f"Built enchantment matrix: {len(ids)} items, {len(texts)} texts")
+        return ids, matrix, rows_by_id, texts
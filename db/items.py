@@ -1,141 +1,191 @@
 from db.db_routine import DBRoutine
-from db.models import Item, ItemRarity, ItemType, ItemEffect, ItemHero, Enchantment
-from utils.config import RARITY_ORDER, SIZE_ORDER
-from sqlalchemy import select, func, and_, case
-from sqlalchemy.sql import text
+from db.aggregates import json_list, json_object, json_rarities, rarity_bits
+from db.models import Item, ItemRarity, ItemType, ItemEffect, ItemHero, Enchantment, Rarity, Type, Hero, EffectText
+from db.query_dsl import compile_query
+from db.records import ItemRecord
+from db.value_filters import add_value_filter_params, value_filter_criteria, stat_sort_key
+from utils.effect_values import STAT_KEYWORDS
+from utils.config import SIZE_ORDER
+from sqlalchemy import select, bindparam
 
 class ItemDB:
     def __init__(self, db_routine: DBRoutine):
         self.db = db_routine
+        self._similarity = None
+        self._enchantments = None
+
+    # The numpy-backed indexes are created on first use, so callers that only query
+    # (such as the bazaar-query CLI) start without importing numpy
+    @property
+    def similarity(self):
+        if self._similarity is None:
+            from db.similarity import SimilarityIndex
+            self._similarity = SimilarityIndex(
+                self.db, "items", Item, ItemEffect.item_id, ItemEffect.effect_id, ItemType.item_id, ItemType.type_id
+            )
+        return self._similarity
+
+    @property
+    def enchantments(self):
+        if self._enchantments is None:
+            from db.enchantments import EnchantmentMatrix
+            self._enchantments = EnchantmentMatrix(self.db)
+        return self._enchantments
 
     def get_rarities(self):
-        with self.db.get_connection() as session:
-            results = session.query(ItemRarity.rarity).distinct().all()
-            rarities = [row[0] for row in results if row[0] is not None]
-            sorted_rarities = sorted([r for r in rarities if r in RARITY_ORDER], key=lambda x: RARITY_ORDER.index(x))
-            return [""] + sorted_rarities
+        with self.db.read_connection() as conn:
+            results = conn.execute(
+                select(Rarity.name)
+                .where(Rarity.id.in_(select(ItemRarity.rarity_id)))
+                .order_by(Rarity.rank)
+            )
+            return [""] + [row[0] for row in results]
 
     def get_types(self):
-        with self.db.get_connection() as session:
-            results = session.query(ItemType.type).distinct().order_by(ItemType.type).all()
+        with self.db.read_connection() as conn:
+            results = conn.execute(select(Type.name).where(Type.id.in_(select(ItemType.type_id))).order_by(Type.name))
             return [row[0] for row in results]
 
     def get_heroes(self):
-        with self.db.get_connection() as session:
-            results = session.query(ItemHero.hero).distinct().order_by(ItemHero.hero).all()
-            return [""] + [row[0] for row in results if row[0] is not None]
+        with self.db.read_connection() as conn:
+            results = conn.execute(select(Hero.name).where(Hero.id.in_(select(ItemHero.hero_id))).order_by(Hero.name))
+            return [""] + [row[0] for row in results]
 
     def get_sizes(self):
-        with self.db.get_connection() as session:
-            results = session.query(Item.size).distinct().all()
+        with self.db.read_connection() as conn:
+            results = conn.execute(select(Item.size).distinct())
             sizes = [row[0] for row in results if row[0] is not None]
             sorted_sizes = sorted([s for s in sizes if s in SIZE_ORDER], key=lambda x: SIZE_ORDER.index(x))
             return [""] + sorted_sizes
 
     def get_all_items(self):
-        with self.db.get_connection() as session:
-            results = session.query(Item.id, Item.name).order_by(Item.name).all()
+        with self.db.read_connection() as conn:
+            results = conn.execute(select(Item.id, Item.name).order_by(Item.name))
             return [(row.id, row.name) for row in results]
 
-    def query_items(self, name="", rarities=None, types=None, effect_keyword="", heroes=None, size="", sort_by="name", sort_order="ASC"):
-        with self.db.get_connection() as session:
-            # Base query with joins
-            query = (
-                session.query(
-                    Item.id,
-                    Item.name,
-                    Item.size,
-                    func.group_concat(ItemRarity.rarity.distinct()).label('rarities'),
-                    func.group_concat(ItemEffect.effect.distinct()).label('effects'),
-                    func.group_concat(ItemType.type.distinct()).label('types'),
-                    func.group_concat(ItemHero.hero.distinct()).label('heroes'),
-                    func.group_concat(
-                        func.concat(Enchantment.enchantment_name, ': ', Enchantment.enchantment_effect).distinct()
-                    ).label('enchantments')
+    def similar_items(self, item_id, k=10):
+        """Items whose effects and types are closest to item_id's, as (ItemRecord, score), best first."""
+        matches = self.similarity.similar([item_id], k)[item_id]
+        records = {record.id: record for record in self.query_items(sort_by=None, ids=[i for i, _ in matches])}
+        return [(records[i], score) for i, score in matches if i in records]
+
+    def get_item_enchantments(self, item_id):
+        """[(enchantment name, text or None)] of item_id in ENCHANTMENT_NAMES order."""
+        return self.enchantments.enchantments_of(item_id)
+
+    def items_with_enchantment(self, enchantment, keyword="", **filters):
+        """Items having enchantment, whose text contains keyword if given, narrowed by the query_items filters."""
+        return self.query_items(ids=self.enchantments.items_with(enchantment, keyword), **filters)
+
+    def items_missing_enchantment(self, enchantment, **filters):
+        """Items without enchantment, narrowed by the query_items filters."""
+        return self.query_items(ids=self.enchantments.items_missing(enchantment), **filters)
+
+    def query_items(self, name="", rarities=None, types=None, effect_keyword="", heroes=None, size="", sort_by="name", sort_order="ASC", ids=None, value_filters=None, query=""):
+        stmt, params = self.query_items_statement(name, rarities, types, effect_keyword, heroes, size, sort_by, sort_order, ids, value_filters, query)
+        with self.db.read_connection() as conn:
+            # Rows come back in ItemRecord's argument order; JSON columns are decoded lazily
+            return [ItemRecord(*row) for row in conn.execute(stmt, params)]
+
+    def query_items_statement(self, name="", rarities=None, types=None, effect_keyword="", heroes=None, size="", sort_by="name", sort_order="ASC", ids=None, value_filters=None, query=""):
+        """Return the cached Core statement for this filter shape and its bind parameters."""
+        params = {}
+        if name:
+            params["name"] = f"%{name}%"
+        if rarities:
+            params["rarities"] = list(rarities)
+        if types:
+            params["types"] = list(types)
+        if effect_keyword:
+            params["effect"] = f"%{effect_keyword}%"
+        if heroes:
+            params["heroes"] = list(heroes)
+        if ids is not None:
+            params["ids"] = list(ids)
+        if size:
+            params["size"] = size
+        add_value_filter_params(params, value_filters)
+        # A text query (db/query_dsl.py) is one more criterion on the same statement
+        compiled = compile_query("items", query) if query else None
+        if compiled:
+            params.update(compiled.params)
+        # "stat:damage" sorts by the highest damage value among the effects
+        if sort_by and sort_by.startswith("stat:") and sort_by[5:] in STAT_KEYWORDS:
+            params["sort_stat"] = sort_by[5:]
+            sort_by = "stat"
+        elif sort_by not in ("name", "rarity", "types"):
+            sort_by = None
+        descending = sort_order == "DESC"
+        shape = ("items", frozenset(params), sort_by, descending)
+        if compiled:
+            # Text queries come in any number of shapes, so their statements go to the bounded plan cache
+            build = lambda: self._build_query(params, sort_by, descending).where(compiled.criterion)
+            return self.db.plan(shape + (compiled.shape,), build), params
+        return self.db.statement(shape, lambda: self._build_query(params, sort_by, descending)), params
+
+    def _build_query(self, params, sort_by, descending):
+        # One JSON aggregate per child table, correlated on the item
+        stmt = select(
+            Item.id,
+            Item.name,
+            Item.size,
+            json_rarities(ItemRarity.rarity_id, ItemRarity.item_id, Item.id).label('rarities'),
+            json_list(EffectText.text, ItemEffect.item_id, Item.id, ItemEffect.effect_id == EffectText.id).label('effects'),
+            json_list(Type.name, ItemType.item_id, Item.id, ItemType.type_id == Type.id).label('types'),
+            json_list(Hero.name, ItemHero.item_id, Item.id, ItemHero.hero_id == Hero.id).label('heroes'),
+            json_object(
+                Enchantment.enchantment_name, EffectText.text, Enchantment.item_id, Item.id,
+                Enchantment.effect_id == EffectText.id
+            ).label('enchantments')
+        )
+
+        # Apply filters
+        if "name" in params:
+            stmt = stmt.where(Item.name.ilike(bindparam("name")))
+        if "rarities" in params:
+            # Bitwise test on the derived mask instead of a rarity subquery per row
+            stmt = stmt.where(Item.rarity_mask.op("&")(rarity_bits("rarities")) != 0)
+        if "types" in params:
+            stmt = stmt.where(Item.id.in_(
+                select(ItemType.item_id).join(Type, ItemType.type_id == Type.id)
+                .where(Type.name.in_(bindparam("types", expanding=True)))
+            ))
+        if "effect" in params:
+            # LIKE '%...%' cannot use an index: match the few unique texts once, then
+            # look up the items using them through (effect_id, item_id)
+            matching = select(EffectText.id).where(EffectText.text.ilike(bindparam("effect")))
+            stmt = stmt.where(Item.id.in_(
+                select(ItemEffect.item_id).where(ItemEffect.effect_id.in_(matching))
+            ))
+        if "heroes" in params:
+            # Neutral items (no hero) match every hero; is_neutral is derived during ingest
+            stmt = stmt.where(
+                (Item.is_neutral == 1) |
+                Item.id.in_(
+                    select(ItemHero.item_id).join(Hero, ItemHero.hero_id == Hero.id)
+                    .where(Hero.name.in_(bindparam("heroes", expanding=True)))
                 )
-                .outerjoin(ItemRarity, Item.id == ItemRarity.item_id)
-                .outerjoin(ItemEffect, Item.id == ItemEffect.item_id)
-                .outerjoin(ItemType, Item.id == ItemType.item_id)
-                .outerjoin(ItemHero, Item.id == ItemHero.item_id)
-                .outerjoin(Enchantment, Item.id == Enchantment.item_id)
             )
+        if "size" in params:
+            stmt = stmt.where(Item.size == bindparam("size"))
+        if "ids" in params:
+            stmt = stmt.where(Item.id.in_(bindparam("ids", expanding=True)))
+        # Numeric predicates such as "damage >= 50 at Gold" over the parsed effect values
+        stmt = stmt.where(*value_filter_criteria(params, Item, ItemEffect.item_id, ItemEffect.effect_id))
 
-            # Apply filters
-            filters = []
-            if name:
-                filters.append(Item.name.ilike(f"%{name}%"))
-            if rarities:
-                query = query.filter(Item.id.in_(
-                    select(ItemRarity.item_id).where(ItemRarity.rarity.in_(rarities))
-                ))
-            if types:
-                query = query.filter(Item.id.in_(
-                    select(ItemType.item_id).where(ItemType.type.in_(types))
-                ))
-            if effect_keyword:
-                filters.append(ItemEffect.effect.ilike(f"%{effect_keyword}%"))
-            if heroes:
-                query = query.filter(
-                    and_(
-                        Item.id.in_(
-                            select(ItemHero.item_id).where(ItemHero.hero.in_(heroes))
-                        ) |
-                        (~Item.id.in_(
-                            select(ItemHero.item_id)
-                        ))
-                    )
-                )
-            if size:
-                filters.append(Item.size == size)
-
-            # Apply filters and group
-            query = query.filter(and_(*filters)).group_by(Item.id)
-
-            # Apply sorting
-            if sort_by == "name":
-                query = query.order_by(text(f"items.name {sort_order}"))
-            elif sort_by == "rarity":
-                rarity_case = case(
-                    {rarity: idx + 1 for idx, rarity in enumerate(['Bronze', 'Silver', 'Gold', 'Diamond', 'Legendary'])},
-                    value=ItemRarity.rarity,
-                    else_=6
-                )
-                query = query.order_by(func.min(rarity_case).asc() if sort_order == "ASC" else func.min(rarity_case).desc())
-            elif sort_by == "types":
-                query = query.order_by(text(f"GROUP_CONCAT(DISTINCT item_types.type) {sort_order}"))
-
-            # Execute and format results
-            results = query.all()
-            items = []
-            for row in results:
-                # Process effects (assuming plain text)
-                effects = row.effects or ""
-                effects_list = sorted(list(set(effects.split(","))) if effects else [], key=str.lower)
-                
-                # Process types
-                types_list = sorted(list(set(row.types.split(","))) if row.types else [], key=str.lower)
-                
-                # Process rarities
-                rarities_list = sorted(
-                    [r for r in (row.rarities.split(",") if row.rarities else []) if r],
-                    key=lambda x: RARITY_ORDER.index(x) if x in RARITY_ORDER else len(RARITY_ORDER)
-                )
-                
-                # Process heroes
-                heroes_list = sorted(list(set(row.heroes.split(","))) if row.heroes else [], key=str.lower)
-                
-                # Process enchantments
-                enchantments_list = sorted(list(set(row.enchantments.split(","))) if row.enchantments else [], key=str.lower)
-                
-                items.append({
-                    "id": row.id,
-                    "name": row.name,
-                    "size": row.size,
-                    "rarities": ", ".join(rarities_list),
-                    "effects": ", ".join(effects_list),
-                    "types": types_list,
-                    "heroes": heroes_list,
-                    "enchantments": ", ".join(enchantments_list)
-                })
-            
-            return items
\ No newline at end of file
+        # Apply sorting
+        if sort_by == "name":
+            key = Item.name
+        elif sort_by == "rarity":
+            # Entries without a known rarity have no rank and sort last, as before the column
+            key = Item.min_rarity_rank
+            return stmt.order_by((key.desc() if descending else key.asc()).nulls_last())
+        elif sort_by == "types":
+            key = Item.type_sort_key
+        elif sort_by == "stat":
+            # Rows without the stat sort last either way
+            key = stat_sort_key(Item, ItemEffect.item_id, ItemEffect.effect_id)
+            return stmt.order_by((key.desc() if descending else key.asc()).nulls_last())
+        else:
+            return stmt
+        return stmt.order_by(key.desc() if descending else key.asc())
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Index, PrimaryKeyConstraint
+from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, Index, PrimaryKeyConstraint, DDL, event
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.sql import table, column
 
 Base = declarative_base()
 
@@ -19,6 +20,11 @@ class Skill(Base):
     __tablename__ = 'skills'
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
+    # Derived from skill_rarities during ingest: bit rank - 1 per rarity, lowest rank
+    rarity_mask = Column(Integer, nullable=False, default=0)
+    min_rarity_rank = Column(Integer)
+    # JSON array of the skill's type names, for sorting by types
+    type_sort_key = Column(String, nullable=False, default='[]')
 
 class VideoSkill(Base):
     __tablename__ = 'video_skills'
@@ -39,76 +45,271 @@ class VideoItem(Base):
 class VideoHero(Base):
     __tablename__ = 'video_heroes'
     video_id = Column(Integer, ForeignKey('videos.id', ondelete='CASCADE'), primary_key=True)
-    hero_name = Column(String, primary_key=True)
+    hero_id = Column(Integer, ForeignKey('heroes.id'), primary_key=True)
     __table_args__ = (
-        PrimaryKeyConstraint('video_id', 'hero_name'),
+        PrimaryKeyConstraint('video_id', 'hero_id'),
     )
 
+# Dimension tables: child tables reference these by integer id
+class Hero(Base):
+    __tablename__ = 'heroes'
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+class Type(Base):
+    __tablename__ = 'types'
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+# Unique effect and enchantment texts, shared by every row that uses them
+class EffectText(Base):
+    __tablename__ = 'effect_texts'
+    id = Column(Integer, primary_key=True)
+    text = Column(String, nullable=False, unique=True)
+
+# Numeric values parsed from each effect text (utils.effect_values): one row per stat and
+# "»" tier, tier 0 at the owner's lowest rarity. per_rarity 0 marks a single value that
+# applies at every rarity.
+class EffectValue(Base):
+    __tablename__ = 'effect_values'
+    effect_id = Column(Integer, ForeignKey('effect_texts.id'), primary_key=True)
+    stat = Column(String, primary_key=True)
+    tier = Column(Integer, primary_key=True)
+    value = Column(Float, nullable=False)
+    per_rarity = Column(Integer, nullable=False)
+    __table_args__ = {'sqlite_with_rowid': False}
+
 # Placeholder for other tables referenced in indexes
 class SkillRarity(Base):
     __tablename__ = 'skill_rarities'
     skill_id = Column(Integer, primary_key=True)
-    rarity = Column(String)
+    rarity_id = Column(Integer, ForeignKey('rarities.id'), primary_key=True)
 
 class SkillType(Base):
     __tablename__ = 'skill_types'
     skill_id = Column(Integer, primary_key=True)
-    type = Column(String)
+    type_id = Column(Integer, ForeignKey('types.id'), primary_key=True)
 
 class SkillHero(Base):
     __tablename__ = 'skill_heroes'
     skill_id = Column(Integer, primary_key=True)
-    hero = Column(String)
+    hero_id = Column(Integer, ForeignKey('heroes.id'), primary_key=True)
 
 class SkillEffect(Base):
     __tablename__ = 'skill_effects'
     skill_id = Column(Integer, primary_key=True)
-    effect = Column(String)
+    effect_id = Column(Integer, ForeignKey('effect_texts.id'), primary_key=True)
 
 class Item(Base):
     __tablename__ = 'items'
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     size = Column(String)
+    # Derived from item_rarities during ingest: bit rank - 1 per rarity, lowest rank
+    rarity_mask = Column(Integer, nullable=False, default=0)
+    min_rarity_rank = Column(Integer)
+    # Derived from item_heroes; neutral items have no hero and match every hero filter
+    hero_count = Column(Integer, nullable=False, default=0)
+    is_neutral = Column(Integer, nullable=False, default=1)
+    # JSON array of the item's type names, for sorting by types
+    type_sort_key = Column(String, nullable=False, default='[]')
 
 class ItemRarity(Base):
     __tablename__ = 'item_rarities'
     item_id = Column(Integer, primary_key=True)
-    rarity = Column(String)
+    rarity_id = Column(Integer, ForeignKey('rarities.id'), primary_key=True)
 
 class ItemType(Base):
     __tablename__ = 'item_types'
     item_id = Column(Integer, primary_key=True)
-    type = Column(String)
+    type_id = Column(Integer, ForeignKey('types.id'), primary_key=True)
 
 class ItemHero(Base):
     __tablename__ = 'item_heroes'
     item_id = Column(Integer, primary_key=True)
-    hero = Column(String)
+    hero_id = Column(Integer, ForeignKey('heroes.id'), primary_key=True)
 
 class ItemEffect(Base):
     __tablename__ = 'item_effects'
     item_id = Column(Integer, primary_key=True)
-    effect = Column(String)
+    effect_id = Column(Integer, ForeignKey('effect_texts.id'), primary_key=True)
+
+class Rarity(Base):
+    __tablename__ = 'rarities'
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+    rank = Column(Integer, nullable=False)
 
 class Enchantment(Base):
     __tablename__ = 'enchantments'
     item_id = Column(Integer, ForeignKey('items.id'), primary_key=True)
     enchantment_name = Column(String, primary_key=True)
-    enchantment_effect = Column(String, nullable=False)
+    effect_id = Column(Integer, ForeignKey('effect_texts.id'), nullable=False)
+
+# Co-occurrence counts over the video associations: the number of videos featuring both
+# members of a pair. Pairs that no video shares have no row. Maintained by the triggers in
+# COOCCURRENCE_TRIGGERS; db.analytics reads them.
+class ItemCooccurrence(Base):
+    __tablename__ = 'item_cooccurrence'
+    # Stored in both directions, so the companions of an item are one index range
+    item_id = Column(Integer, ForeignKey('items.id'), primary_key=True)
+    other_item_id = Column(Integer, ForeignKey('items.id'), primary_key=True)
+    video_count = Column(Integer, nullable=False)
+    __table_args__ = {'sqlite_with_rowid': False}
+
+class ItemSkillCooccurrence(Base):
+    __tablename__ = 'item_skill_cooccurrence'
+    item_id = Column(Integer, ForeignKey('items.id'), primary_key=True)
+    skill_id = Column(Integer, ForeignKey('skills.id'), primary_key=True)
+    video_count = Column(Integer, nullable=False)
+    __table_args__ = {'sqlite_with_rowid': False}
+
+class HeroItemCooccurrence(Base):
+    __tablename__ = 'hero_item_cooccurrence'
+    hero_id = Column(Integer, ForeignKey('heroes.id'), primary_key=True)
+    item_id = Column(Integer, ForeignKey('items.id'), primary_key=True)
+    video_count = Column(Integer, nullable=False)
+    __table_args__ = {'sqlite_with_rowid': False}
 
 # Define indexes
 Index('idx_skill_name', Skill.name)
-Index('idx_skill_rarity', SkillRarity.rarity)
-Index('idx_skill_type', SkillType.type)
-Index('idx_skill_hero', SkillHero.hero)
 Index('idx_item_name', Item.name)
 Index('idx_item_size', Item.size)
-Index('idx_item_rarity', ItemRarity.rarity)
-Index('idx_item_type', ItemType.type)
-Index('idx_item_hero', ItemHero.hero)
+Index('idx_skill_min_rarity_rank', Skill.min_rarity_rank)
+Index('idx_item_min_rarity_rank', Item.min_rarity_rank)
+Index('idx_item_is_neutral', Item.is_neutral)
+Index('idx_skill_type_sort_key', Skill.type_sort_key)
+Index('idx_item_type_sort_key', Item.type_sort_key)
 Index('idx_enchantment_item_id', Enchantment.item_id)
+# Range scans on one stat's values; the primary key columns complete it as a covering index
+Index('idx_effect_value_stat', EffectValue.stat, EffectValue.value, EffectValue.per_rarity)
+# (date) also orders by id: SQLite appends the rowid to every index
 Index('idx_video_date', Video.date)
+Index('idx_video_title', Video.title.collate('NOCASE'))
+Index('idx_video_status_date', Video.status, Video.date)
+Index('idx_video_type_date', Video.type, Video.date)
 Index('idx_video_skills', VideoSkill.video_id, VideoSkill.skill_id)
 Index('idx_video_items', VideoItem.video_id, VideoItem.item_id)
-Index('idx_video_heroes', VideoHero.video_id, VideoHero.hero_name)
\ No newline at end of file
+Index('idx_video_heroes', VideoHero.video_id, VideoHero.hero_id)
+
+# Covering child-table indexes: (entity_id, value) for the per-row aggregates,
+# (value, entity_id) for the filters. Keep in sync with utils.ingest_utils.ITEM_INDEXES / SKILL_INDEXES.
+Index('idx_skill_rarities_skill', SkillRarity.skill_id, SkillRarity.rarity_id)
+Index('idx_skill_rarity', SkillRarity.rarity_id, SkillRarity.skill_id)
+Index('idx_skill_types_skill', SkillType.skill_id, SkillType.type_id)
+Index('idx_skill_type', SkillType.type_id, SkillType.skill_id)
+Index('idx_skill_heroes_skill', SkillHero.skill_id, SkillHero.hero_id)
+Index('idx_skill_hero', SkillHero.hero_id, SkillHero.skill_id)
+Index('idx_skill_effects_skill', SkillEffect.skill_id, SkillEffect.effect_id)
+Index('idx_skill_effect', SkillEffect.effect_id, SkillEffect.skill_id)
+Index('idx_item_rarities_item', ItemRarity.item_id, ItemRarity.rarity_id)
+Index('idx_item_rarity', ItemRarity.rarity_id, ItemRarity.item_id)
+Index('idx_item_types_item', ItemType.item_id, ItemType.type_id)
+Index('idx_item_type', ItemType.type_id, ItemType.item_id)
+Index('idx_item_heroes_item', ItemHero.item_id, ItemHero.hero_id)
+Index('idx_item_hero', ItemHero.hero_id, ItemHero.item_id)
+Index('idx_item_effects_item', ItemEffect.item_id, ItemEffect.effect_id)
+Index('idx_item_effect', ItemEffect.effect_id, ItemEffect.item_id)
+
+# Reverse lookups for the video filters
+Index('idx_video_skills_skill', VideoSkill.skill_id, VideoSkill.video_id)
+Index('idx_video_items_item', VideoItem.item_id, VideoItem.video_id)
+Index('idx_video_heroes_hero', VideoHero.hero_id, VideoHero.video_id)
+
+# Top-N companions: walk (x, video_count, other) backwards and stop after N entries
+Index('idx_item_cooccurrence_top', ItemCooccurrence.item_id, ItemCooccurrence.video_count, ItemCooccurrence.other_item_id)
+Index('idx_item_skill_cooccurrence_item_top', ItemSkillCooccurrence.item_id, ItemSkillCooccurrence.video_count, ItemSkillCooccurrence.skill_id)
+Index('idx_item_skill_cooccurrence_skill_top', ItemSkillCooccurrence.skill_id, ItemSkillCooccurrence.video_count, ItemSkillCooccurrence.item_id)
+Index('idx_hero_item_cooccurrence_top', HeroItemCooccurrence.hero_id, HeroItemCooccurrence.video_count, HeroItemCooccurrence.item_id)
+
+# Full-text index over video titles and descriptions. External content: the text is read
+# back from videos, and the triggers keep the index in sync with every write to the table.
+VIDEOS_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+        title, description, content='videos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    # rank (bm25) weighs a title match ten times a description match; stored with the index
+    """INSERT INTO videos_fts (videos_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')""",
+    """CREATE TRIGGER IF NOT EXISTS videos_fts_insert AFTER INSERT ON videos BEGIN
+        INSERT INTO videos_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS videos_fts_delete AFTER DELETE ON videos BEGIN
+        INSERT INTO videos_fts (videos_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS videos_fts_update AFTER UPDATE OF title, description ON videos BEGIN
+        INSERT INTO videos_fts (videos_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO videos_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+for statement in VIDEOS_FTS_DDL:
+    event.listen(Video.__table__, "after_create", DDL(statement))
+
+# Query-side handle on the virtual table: the hidden videos_fts column takes MATCH, rank is bm25()
+videos_fts = table("videos_fts", column("rowid", Integer), column("videos_fts", String), column("rank", Float))
+
+# Keep the co-occurrence counts in step with the association tables: adding a link counts
+# it against the video's other links, removing one uncounts it and drops pairs left at zero.
+# update_video deletes and re-adds a video's links, which nets out to the change.
+COOCCURRENCE_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS video_items_cooccurrence_insert AFTER INSERT ON video_items BEGIN
+        INSERT INTO item_cooccurrence (item_id, other_item_id, video_count)
+            SELECT new.item_id, item_id, 1 FROM video_items WHERE video_id = new.video_id AND item_id != new.item_id
+            UNION ALL
+            SELECT item_id, new.item_id, 1 FROM video_items WHERE video_id = new.video_id AND item_id != new.item_id
+            ON CONFLICT (item_id, other_item_id) DO UPDATE SET video_count = video_count + 1;
+        INSERT INTO item_skill_cooccurrence (item_id, skill_id, video_count)
+            SELECT new.item_id, skill_id, 1 FROM video_skills WHERE video_id = new.video_id
+            ON CONFLICT (item_id, skill_id) DO UPDATE SET video_count = video_count + 1;
+        INSERT INTO hero_item_cooccurrence (hero_id, item_id, video_count)
+            SELECT hero_id, new.item_id, 1 FROM video_heroes WHERE video_id = new.video_id
+            ON CONFLICT (hero_id, item_id) DO UPDATE SET video_count = video_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS video_items_cooccurrence_delete AFTER DELETE ON video_items BEGIN
+        UPDATE item_cooccurrence SET video_count = video_count - 1
+            WHERE item_id = old.item_id AND other_item_id IN (SELECT item_id FROM video_items WHERE video_id = old.video_id);
+        UPDATE item_cooccurrence SET video_count = video_count - 1
+            WHERE other_item_id = old.item_id AND item_id IN (SELECT item_id FROM video_items WHERE video_id = old.video_id);
+        DELETE FROM item_cooccurrence WHERE item_id = old.item_id AND video_count = 0;
+        DELETE FROM item_cooccurrence
+            WHERE other_item_id = old.item_id AND video_count = 0
+            AND item_id IN (SELECT item_id FROM video_items WHERE video_id = old.video_id);
+        UPDATE item_skill_cooccurrence SET video_count = video_count - 1
+            WHERE item_id = old.item_id AND skill_id IN (SELECT skill_id FROM video_skills WHERE video_id = old.video_id);
+        DELETE FROM item_skill_cooccurrence WHERE item_id = old.item_id AND video_count = 0;
+        UPDATE hero_item_cooccurrence SET video_count = video_count - 1
+            WHERE item_id = old.item_id AND hero_id IN (SELECT hero_id FROM video_heroes WHERE video_id = old.video_id);
+        DELETE FROM hero_item_cooccurrence
+            WHERE item_id = old.item_id AND video_count = 0
+            AND hero_id IN (SELECT hero_id FROM video_heroes WHERE video_id = old.video_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS video_skills_cooccurrence_insert AFTER INSERT ON video_skills BEGIN
+        INSERT INTO item_skill_cooccurrence (item_id, skill_id, video_count)
+            SELECT item_id, new.skill_id, 1 FROM video_items WHERE video_id = new.video_id
+            ON CONFLICT (item_id, skill_id) DO UPDATE SET video_count = video_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS video_skills_cooccurrence_delete AFTER DELETE ON video_skills BEGIN
+        UPDATE item_skill_cooccurrence SET video_count = video_count - 1
+            WHERE skill_id = old.skill_id AND item_id IN (SELECT item_id FROM video_items WHERE video_id = old.video_id);
+        DELETE FROM item_skill_cooccurrence WHERE skill_id = old.skill_id AND video_count = 0;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS video_heroes_cooccurrence_insert AFTER INSERT ON video_heroes BEGIN
+        INSERT INTO hero_item_cooccurrence (hero_id, item_id, video_count)
+            SELECT new.hero_id, item_id, 1 FROM video_items WHERE video_id = new.video_id
+            ON CONFLICT (hero_id, item_id) DO UPDATE SET video_count = video_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS video_heroes_cooccurrence_delete AFTER DELETE ON video_heroes BEGIN
+        UPDATE hero_item_cooccurrence SET video_count = video_count - 1
+            WHERE hero_id = old.hero_id AND item_id IN (SELECT item_id FROM video_items WHERE video_id = old.video_id);
+        DELETE FROM hero_item_cooccurrence WHERE hero_id = old.hero_id AND video_count = 0;
+    END""",
+]
+def _create_cooccurrence_triggers(target, connection, tables=(), **kw):
+    # The triggers span several tables, so they are created once all of them exist. Only when
+    # create_all builds the association tables, i.e. on a new database: an existing one gets
+    # them from its migration, once its tables have the columns the triggers use
+    if VideoItem.__table__ in tables:
+        for statement in COOCCURRENCE_TRIGGERS:
+            connection.exec_driver_sql(statement)
+
+event.listen(Base.metadata, "after_create", _create_cooccurrence_triggers)
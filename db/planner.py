@@ -0,0 +1,131 @@
+"""Top-k board loadouts: the best item combinations that fit a board's slots.
+
+Each item takes SIZE_SLOTS[size] slots and scores independently, so a loadout's score is
+the sum of its items' scores and the search is a 0/1 knapsack with two twists: every
+required type must be covered by at least one item, and the k best loadouts are wanted,
+not just the best one.
+
+Two steps keep it interactive on the full catalog:
+
+- Pruning. Items with the same size and the same subset of the required types are
+  interchangeable for feasibility. A board holds at most slots // size of them, so an
+  item ranked below the best slots // size + k - 1 of its group could be swapped for k
+  unused better ones, giving k loadouts at least as good: it is never in the top k.
+- A k-best dynamic program over (slots used, required types covered), keeping the k best
+  partial loadouts per state. Any top-k loadout restricted to the items processed so far
+  is among the k best of its state, or k better ones could replace that part. Items are
+  taken best score per slot first, and a partial loadout is dropped (branch and bound) once
+  the best the remaining items could add in its free slots cannot reach the k-th best
+  complete loadout found so far.
+"""
+import heapq
+from itertools import islice
+from operator import itemgetter
+from utils.config import RARITY_ORDER, SIZE_SLOTS, BOARD_SLOTS
+
+# Score added per desired type an item has
+DESIRED_TYPE_BONUS = 1.0
+
+def effect_rarity_score(item):
+    """Default item score: one point per effect plus one per rarity tier above Bronze it starts at."""
+    tier = RARITY_ORDER.index(item.rarities[0]) if item.rarities and item.rarities[0] in RARITY_ORDER else 0
+    return len(item.effects) + tier
+
+def prune_candidates(entries, slots, k):
+    """Keep the entries that can appear in a top-k loadout.
+
+    entries are (score, size_slots, type_mask, item) tuples; the best
+    slots // size_slots + k - 1 of each (size_slots, type_mask) group are kept.
+    """
+    groups = {}
+    for entry in entries:
+        groups.setdefault((entry[1], entry[2]), []).append(entry)
+    kept = []
+    for (size_slots, mask), group in groups.items():
+        kept.extend(heapq.nlargest(slots // size_slots + k - 1, group, key=itemgetter(0)))
+    return kept
+
+def best_loadouts(entries, slots, full_mask, k):
+    """The k best (score, slots_used, entries) combinations covering full_mask, best first."""
+    # Best score per slot first, so the bound below tightens as early as possible
+    entries = sorted(entries, key=lambda entry: entry[0] / entry[1], reverse=True)
+    # remaining[i][free]: the most entries i.. can add in free slots, ignoring types. A plain
+    # knapsack over the suffix, so it bounds what any partial loadout can still gain.
+    remaining = [[0.0] * (slots + 1) for _ in range(len(entries) + 1)]
+    for index in range(len(entries) - 1, -1, -1):
+        score, size_slots = entries[index][0], entries[index][1]
+        after, row = remaining[index + 1], remaining[index]
+        for free in range(slots + 1):
+            row[free] = max(after[free], after[free - size_slots] + score) if free >= size_slots else after[free]
+    # (slots used, types covered) -> up to k (score, entries), best first
+    states = {(0, 0): [(0.0, ())]}
+    # Scores of the k best complete loadouts seen so far (min-heap)
+    complete_scores = []
+    for index, entry in enumerate(entries):
+        score, size_slots, mask = entry[0], entry[1], entry[2]
+        gain = remaining[index + 1]
+        threshold = complete_scores[0] if len(complete_scores) == k else float("-inf")
+        # Extend a snapshot of the states so each entry is used at most once
+        for (used, covered), partial in list(states.items()):
+            free = slots - used - size_slots
+            if free < 0:
+                continue
+            # Partials are best first: when the best cannot place, none can
+            best = partial[0][0] + score
+            if best + gain[free] <= threshold:
+                continue
+            key = (used + size_slots, covered | mask)
+            current = states.get(key, [])
+            if len(current) == k and best <= current[-1][0]:
+                continue
+            floor = max(threshold - gain[free], current[-1][0] if len(current) == k else float("-inf"))
+            extended = [(total + score, chosen + (entry,)) for total, chosen in partial if total + score > floor]
+            states[key] = list(islice(heapq.merge(current, extended, key=itemgetter(0), reverse=True), k))
+            if key[1] == full_mask:
+                for total, chosen in extended:
+                    if len(complete_scores) < k:
+                        heapq.heappush(complete_scores, total)
+                    elif total > complete_scores[0]:
+                        heapq.heapreplace(complete_scores, total)
+                    else:
+                        break
+    complete = [
+        (total, used, chosen)
+        for (used, covered), partial in states.items() if covered == full_mask
+        for total, chosen in partial if chosen
+    ]
+    return heapq.nlargest(k, complete, key=itemgetter(0))
+
+class BuildPlanner:
+    """Plan item loadouts for a hero's board from the item catalog."""
+    def __init__(self, item_db):
+        self.item_db = item_db
+
+    def plan(self, hero="", slots=BOARD_SLOTS, required_types=(), desired_types=(), score=effect_rarity_score, k=5, query=""):
+        """The k best loadouts as (score, slots_used, [ItemRecord]), best first.
+
+        Items are the hero's and the neutral ones (every item without a hero). score maps an
+        ItemRecord to a number; each of desired_types the item has adds DESIRED_TYPE_BONUS.
+        Every one of required_types must appear on at least one item of a loadout. query is a
+        text query (db/query_dsl.py) narrowing the candidate items, e.g. "-size:Large rarity>=Gold".
+        """
+        items = self.item_db.query_items(heroes=[hero] if hero else [], sort_by=None, query=query)
+        required_bits = {name: 1 << bit for bit, name in enumerate(dict.fromkeys(required_types))}
+        desired = set(desired_types)
+        entries = []
+        for item in items:
+            if item.size not in SIZE_SLOTS or SIZE_SLOTS[item.size] > slots:
+                continue
+            types = item.types
+            mask = 0
+            for name in types:
+                mask |= required_bits.get(name, 0)
+            bonus = DESIRED_TYPE_BONUS * len(desired.intersection(types))
+            entries.append((score(item) + bonus, SIZE_SLOTS[item.size], mask, item))
+
+        entries = prune_candidates(entries, slots, k)
+        full_mask = (1 << len(required_bits)) - 1
+        return [
+            (total, used, [entry[3] for entry in chosen])
+            for total, used, chosen in best_loadouts(entries, slots, full_mask, k)
+        ]
@@ -0,0 +1,311 @@
+"""Text queries such as `hero:Vanessa type:Weapon,Tool rarity>=Gold size:Small effect:"burn"`.
+
+A query is a list of terms that must all match. A term is `field:value`, a comparison such
+as `rarity>=Gold`, `damage>=50@Gold` or `date>=2026-01-01`, or a bare word, matched against
+the name (items, skills) or the title and description (videos). Comma-separated values
+match any of them, `-term` or `NOT term` negates, `a OR b` (or `a | b`) matches either
+side, and parentheses group. Values with spaces are quoted; names compare
+case-insensitively.
+
+compile_query turns a query into one WHERE criterion for query_items, query_skills or
+get_videos, plus its bind parameters, so the filters, the query and the JSON columns run as
+a single statement. Compiled queries are cached by their normalized tokens. The shape of
+a query (its terms with the values left out) keys the statement in DBRoutine.plan, so
+queries that only differ in their values share one statement.
+"""
+import re
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import select, bindparam, and_, or_, not_, exists
+from db.models import (
+    Item, ItemType, ItemEffect, ItemHero, Enchantment, Skill, SkillType, SkillEffect, SkillHero,
+    Video, VideoSkill, VideoItem, VideoHero, Type, Hero, EffectText, videos_fts
+)
+from db.value_filters import OPERATORS, value_criterion
+from utils.config import RARITY_ORDER, ENCHANTMENT_NAMES
+from utils.effect_values import STAT_KEYWORDS
+from utils.lru_cache import LRUCache
+
+class QuerySyntaxError(ValueError):
+    pass
+
+CompiledQuery = namedtuple("CompiledQuery", ["shape", "criterion", "params"])
+
+# Compiled queries kept, keyed by entity and normalized tokens
+QUERY_CACHE_SIZE = 512
+QUERY_CACHE = LRUCache(QUERY_CACHE_SIZE)
+
+TOKEN_PATTERN = re.compile(r'\(|\)|\||-(?=\()|(?:"[^"]*"|[^\s()|"])+')
+TERM_PATTERN = re.compile(r"^([A-Za-z][A-Za-z_]*)(>=|<=|:|=|>|<)(.*)$")
+VALUE_PATTERN = re.compile(r'"([^"]*)"|([^,"]+)')
+SET_OPS = (":", "=")
+COMPARISON_OPS = (">=", ">", "<=", "<")
+RARITIES = {name.lower(): name for name in RARITY_ORDER}
+ENCHANTMENTS = {name.lower(): name for name in ENCHANTMENT_NAMES}
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Each word is quoted, so FTS5 syntax (AND, NEAR, -, ", *) in user input is taken literally.
+    """
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in text.split())
+
+def tokenize(text):
+    tokens, position = [], 0
+    for match in TOKEN_PATTERN.finditer(text):
+        if text[position:match.start()].strip():
+            break
+        tokens.append(match.group(0))
+        position = match.end()
+    if text[position:].strip():
+        raise QuerySyntaxError(f"Unterminated quote or unexpected character at {text[position:].strip()[:20]!r}")
+    return tokens
+
+def _values(raw):
+    return [quoted or bare.strip() for quoted, bare in VALUE_PATTERN.findall(raw) if quoted or bare.strip()]
+
+class _Parser:
+    """Recursive descent over the tokens: OR binds loosest, then AND (juxtaposition), then NOT."""
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"Unexpected {self.peek()!r}")
+        return node
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek() in ("OR", "|"):
+            self.next()
+            nodes.append(self.parse_and())
+        return ("or", nodes) if len(nodes) > 1 else nodes[0]
+
+    def parse_and(self):
+        nodes = []
+        while self.peek() not in (None, ")", "OR", "|"):
+            if self.peek() == "AND":
+                self.next()
+                continue
+            nodes.append(self.parse_unary())
+        if not nodes:
+            raise QuerySyntaxError("Expected a term" + (f" before {self.peek()!r}" if self.peek() else " at the end"))
+        return ("and", nodes) if len(nodes) > 1 else nodes[0]
+
+    def parse_unary(self):
+        token = self.next()
+        if token in ("NOT", "-"):
+            if self.peek() in (None, ")", "OR", "|"):
+                raise QuerySyntaxError(f"Expected a term after {token!r}")
+            return ("not", self.parse_unary())
+        if token == "(":
+            node = self.parse_or()
+            if self.next() != ")":
+                raise QuerySyntaxError("Missing ')'")
+            return node
+        if token.startswith("-"):
+            return ("not", self.term(token[1:]))
+        return self.term(token)
+
+    def term(self, token):
+        match = TERM_PATTERN.match(token)
+        if match is None:
+            return ("term", None, ":", [token.replace('"', "")])
+        field, op, raw = match.groups()
+        values = _values(raw)
+        if not values:
+            raise QuerySyntaxError(f"Missing value after {field}{op}")
+        return ("term", field.lower().replace("_", " "), op, values)
+
+# Term compilers: (op, values, add) -> criterion, where add(value) binds a value and returns its parameter name
+
+def _expect(field, op, ops, values=None):
+    if op not in ops:
+        raise QuerySyntaxError(f"{field} takes {' or '.join(ops)}, not {op!r}")
+    if values is not None and op in COMPARISON_OPS and len(values) > 1:
+        raise QuerySyntaxError(f"{field}{op} compares with a single value")
+
+def _contains(field, column):
+    def compile_term(op, values, add):
+        _expect(field, op, SET_OPS)
+        return or_(*(column.ilike(bindparam(add(f"%{value}%"))) for value in values))
+    return compile_term
+
+def _one_of(field, column):
+    def compile_term(op, values, add):
+        _expect(field, op, SET_OPS)
+        return column.collate("NOCASE").in_(bindparam(add(values), expanding=True))
+    return compile_term
+
+def _linked(field, owner_id, link_owner, name_column, *join):
+    """owner_id IN the owners linked (through the join) to a name_column among the values."""
+    def compile_term(op, values, add):
+        _expect(field, op, SET_OPS)
+        return owner_id.in_(
+            select(link_owner).join(*join).where(name_column.collate("NOCASE").in_(bindparam(add(values), expanding=True)))
+        )
+    return compile_term
+
+def _effect(owner_id, link_owner, link_effect):
+    def compile_term(op, values, add):
+        _expect("effect", op, SET_OPS)
+        # Same plan as effect_keyword: match the few unique texts, then look up their owners
+        matching = select(EffectText.id).where(or_(*(
+            EffectText.text.ilike(bindparam(add(f"%{value}%"))) for value in values
+        )))
+        return owner_id.in_(select(link_owner).where(link_effect.in_(matching)))
+    return compile_term
+
+def _rarity_index(value):
+    if value.lower() not in RARITIES:
+        raise QuerySyntaxError(f"Unknown rarity {value!r}, expected one of {', '.join(RARITY_ORDER)}")
+    return RARITY_ORDER.index(RARITIES[value.lower()])
+
+def _rarity(owner):
+    def compile_term(op, values, add):
+        _expect("rarity", op, SET_OPS + COMPARISON_OPS, values)
+        indexes = [_rarity_index(value) for value in values]
+        if op in COMPARISON_OPS:
+            compare = OPERATORS[op][1]
+            indexes = [index for index in range(len(RARITY_ORDER)) if compare(index, indexes[0])]
+        # rarity_mask has bit rank - 1 set for every rarity the row is available at
+        return owner.rarity_mask.op("&")(bindparam(add(sum(1 << index for index in indexes)))) != 0
+    return compile_term
+
+def _stat(stat, owner, link_owner, link_effect):
+    def compile_term(op, values, add):
+        _expect(stat, op, SET_OPS + COMPARISON_OPS)
+        if len(values) > 1:
+            raise QuerySyntaxError(f"{stat} compares with a single value")
+        number, _, rarity = values[0].partition("@")
+        try:
+            number = float(number)
+        except ValueError:
+            raise QuerySyntaxError(f"{stat} needs a number, not {values[0]!r}") from None
+        rarity_param = add(RARITY_ORDER[_rarity_index(rarity)]) if rarity else None
+        name = OPERATORS["=" if op == ":" else op][0]
+        return value_criterion(owner, link_owner, link_effect, add(stat), add(number), name, rarity_param)
+    return compile_term
+
+def _item_hero(op, values, add):
+    # Neutral items match every hero, as in query_items
+    return (Item.is_neutral == 1) | _linked("hero", Item.id, ItemHero.item_id, Hero.name, Hero, ItemHero.hero_id == Hero.id)(op, values, add)
+
+def _enchant(op, values, add):
+    _expect("enchant", op, SET_OPS)
+    unknown = [value for value in values if value.lower() not in ENCHANTMENTS]
+    if unknown:
+        raise QuerySyntaxError(f"Unknown enchantment {unknown[0]!r}, expected one of {', '.join(ENCHANTMENT_NAMES)}")
+    # Probes the (item_id, enchantment_name) primary key per item; no index leads with the name
+    names = [ENCHANTMENTS[value.lower()] for value in values]
+    return exists().where(Enchantment.item_id == Item.id, Enchantment.enchantment_name.in_(bindparam(add(names), expanding=True)))
+
+def _fts(op, values, add):
+    _expect("text", op, SET_OPS)
+    return or_(*(
+        Video.id.in_(select(videos_fts.c.rowid).where(videos_fts.c.videos_fts.match(bindparam(add(fts_query(value))))))
+        for value in values
+    ))
+
+def _date(op, values, add):
+    _expect("date", op, SET_OPS + COMPARISON_OPS, values)
+    for value in values:
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            raise QuerySyntaxError(f"Dates are YYYY-MM-DD, not {value!r}") from None
+    if op in SET_OPS:
+        return Video.date.in_(bindparam(add(values), expanding=True))
+    return OPERATORS[op][1](Video.date, bindparam(add(values[0])))
+
+def _catalog_fields(owner, effect_owner, effect_id, type_owner, type_id, hero_owner, hero_id):
+    fields = {
+        "name": _contains("name", owner.name),
+        "effect": _effect(owner.id, effect_owner, effect_id),
+        "type": _linked("type", owner.id, type_owner, Type.name, Type, type_id == Type.id),
+        "hero": _linked("hero", owner.id, hero_owner, Hero.name, Hero, hero_id == Hero.id),
+        "rarity": _rarity(owner),
+    }
+    fields.update({stat: _stat(stat, owner, effect_owner, effect_id) for stat in STAT_KEYWORDS})
+    return fields
+
+# Field name -> term compiler per entity; None is the bare word
+FIELDS = {
+    "items": {
+        **_catalog_fields(Item, ItemEffect.item_id, ItemEffect.effect_id, ItemType.item_id, ItemType.type_id,
+                          ItemHero.item_id, ItemHero.hero_id),
+        None: _contains("name", Item.name),
+        "hero": _item_hero,
+        "size": _one_of("size", Item.size),
+        "enchant": _enchant,
+    },
+    "skills": {
+        **_catalog_fields(Skill, SkillEffect.skill_id, SkillEffect.effect_id, SkillType.skill_id, SkillType.type_id,
+                          SkillHero.skill_id, SkillHero.hero_id),
+        None: _contains("name", Skill.name),
+    },
+    "videos": {
+        None: _fts,
+        "text": _fts,
+        "title": _contains("title", Video.title),
+        "type": _one_of("type", Video.type),
+        "status": _one_of("status", Video.status),
+        "date": _date,
+        "hero": _linked("hero", Video.id, VideoHero.video_id, Hero.name, Hero, VideoHero.hero_id == Hero.id),
+        "skill": _linked("skill", Video.id, VideoSkill.video_id, Skill.name, Skill, VideoSkill.skill_id == Skill.id),
+        "item": _linked("item", Video.id, VideoItem.video_id, Item.name, Item, VideoItem.item_id == Item.id),
+    },
+}
+
+def field_names(entity):
+    """Fields of entity's queries, with the stats written as in a query (crit_chance)."""
+    return sorted(field.replace(" ", "_") for field in FIELDS[entity] if field)
+
+def _compile(node, fields, entity, params):
+    """Return (criterion, shape) for node, binding its values into params."""
+    kind = node[0]
+    if kind in ("and", "or"):
+        parts = [_compile(child, fields, entity, params) for child in node[1]]
+        combine, separator = (and_, " ") if kind == "and" else (or_, " | ")
+        return combine(*(criterion for criterion, _ in parts)), "(" + separator.join(shape for _, shape in parts) + ")"
+    if kind == "not":
+        criterion, shape = _compile(node[1], fields, entity, params)
+        return not_(criterion), "-" + shape
+    _, field, op, values = node
+    if field not in fields:
+        raise QuerySyntaxError(f"Unknown field {field!r} for {entity}, expected one of {', '.join(field_names(entity))}")
+
+    def add(value):
+        name = f"q{len(params)}"
+        params[name] = value
+        return name
+    # The values are bound parameters; only their count and any "@rarity" change the statement
+    markers = "".join("@" if "@" in value else "?" for value in values)
+    return fields[field](op, values, add), f"{field or ''}{op}{markers}"
+
+def compile_query(entity, text):
+    """Compile a text query on "items", "skills" or "videos" into a CompiledQuery.
+
+    Raises QuerySyntaxError (a ValueError) with a readable message for invalid queries.
+    """
+    tokens = tuple(tokenize(text))
+    if not tokens:
+        return None
+    key = (entity, tokens)
+    compiled = QUERY_CACHE.get(key)
+    if compiled is None:
+        params = {}
+        criterion, shape = _compile(_Parser(list(tokens)).parse(), FIELDS[entity], entity, params)
+        compiled = CompiledQuery(shape, criterion, params)
+        QUERY_CACHE.put(key, compiled)
+    return compiled
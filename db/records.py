@@ -0,0 +1,198 @@
+"""Slotted result records returned by the query methods.
+
+Multi-valued columns are kept as the single JSON string from the query (see
+db/aggregates.py, already distinct and ordered) and decoded only when read, so
+a row costs one slotted object plus the strings SQLite returned. Display
+strings are built on demand. Dict-style access (record["types"]) returns the
+same values as the old per-row dicts.
+"""
+import json
+
+class _JsonList:
+    """Descriptor that decodes a JSON array slot into a tuple on access.
+
+    The tuple is not cached: the decoded strings would take more memory than the
+    JSON one, and rows are only formatted when they are displayed or exported.
+    """
+    def __set_name__(self, owner, name):
+        self.slot = "_" + name
+
+    def __get__(self, record, owner=None):
+        if record is None:
+            return self
+        value = getattr(record, self.slot)
+        return tuple(json.loads(value)) if value else ()
+
+class _JsonObject(_JsonList):
+    """Descriptor that decodes a JSON object slot into a dict on access."""
+    def __get__(self, record, owner=None):
+        if record is None:
+            return self
+        value = getattr(record, self.slot)
+        return json.loads(value) if value else {}
+
+class _Record:
+    __slots__ = ()
+    # Keys available through dict-style access, in the order of the old dicts
+    fields = ()
+
+    def __getitem__(self, key):
+        if key not in self.fields:
+            raise KeyError(key)
+        return self._legacy(key)
+
+    def _legacy(self, key):
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self.fields else default
+
+    def keys(self):
+        return self.fields
+
+    def __contains__(self, key):
+        return key in self.fields
+
+    def to_dict(self):
+        return {key: self[key] for key in self.fields}
+
+    def to_json(self, fields=None):
+        """JSON-ready values of fields (default all): lists and objects for the multi-valued ones."""
+        values = {}
+        for field in fields or self.fields:
+            value = getattr(self, field)
+            values[field] = list(value) if isinstance(value, tuple) else value
+        return values
+
+    def __repr__(self):
+        return f"{type(self).__name__}(id={self.id!r}, {self.fields[1]}={getattr(self, self.fields[1])!r})"
+
+class ItemRecord(_Record):
+    __slots__ = ("id", "name", "size", "_rarities", "_effects", "_types", "_heroes", "_enchantments")
+    fields = ("id", "name", "size", "rarities", "effects", "types", "heroes", "enchantments")
+
+    rarities = _JsonList()
+    effects = _JsonList()
+    types = _JsonList()
+    heroes = _JsonList()
+    # Enchantment name -> effect text
+    enchantments = _JsonObject()
+
+    def __init__(self, id, name, size, rarities, effects, types, heroes, enchantments):
+        self.id = id
+        self.name = name
+        self.size = size
+        self._rarities = rarities
+        self._effects = effects
+        self._types = types
+        self._heroes = heroes
+        self._enchantments = enchantments
+
+    def enchantment_lines(self):
+        return [f"{name}: {effect}" for name, effect in self.enchantments.items()]
+
+    def _legacy(self, key):
+        if key == "enchantments":
+            return ", ".join(self.enchantment_lines())
+        if key in ("rarities", "effects"):
+            return ", ".join(getattr(self, key))
+        if key in ("types", "heroes"):
+            return list(getattr(self, key))
+        return getattr(self, key)
+
+    def display_values(self):
+        """Values for the name, size, effects, rarities, types, heroes, enchantments columns."""
+        return (
+            self.name,
+            self.size,
+            ", ".join(self.effects),
+            ", ".join(self.rarities),
+            ", ".join(self.types),
+            ", ".join(self.heroes),
+            ", ".join(self.enchantment_lines()),
+        )
+
+class SkillRecord(_Record):
+    __slots__ = ("id", "name", "_rarities", "_effects", "_types", "_heroes")
+    fields = ("id", "name", "rarities", "effects", "types", "heroes")
+
+    rarities = _JsonList()
+    effects = _JsonList()
+    types = _JsonList()
+    heroes = _JsonList()
+
+    def __init__(self, id, name, rarities, effects, types, heroes):
+        self.id = id
+        self.name = name
+        self._rarities = rarities
+        self._effects = effects
+        self._types = types
+        self._heroes = heroes
+
+    def _legacy(self, key):
+        if key in ("rarities", "effects"):
+            return ", ".join(getattr(self, key))
+        if key in ("types", "heroes"):
+            return list(getattr(self, key))
+        return getattr(self, key)
+
+    def display_values(self):
+        """Values for the name, effects, rarities, types, heroes columns."""
+        return (
+            self.name,
+            ", ".join(self.effects),
+            ", ".join(self.rarities),
+            ", ".join(self.types),
+            ", ".join(self.heroes),
+        )
+
+class VideoRecord(_Record):
+    __slots__ = ("id", "title", "type", "date", "status", "description", "_local_path", "_url",
+                 "_skills", "_items", "_heroes")
+    fields = ("id", "title", "type", "date", "status", "description", "local_path", "url",
+              "skills", "items", "heroes")
+
+    skills = _JsonList()
+    items = _JsonList()
+    heroes = _JsonList()
+
+    def __init__(self, id, title, type, date, status, description, local_path, url, skills, items, heroes):
+        self.id = id
+        self.title = title
+        self.type = type
+        self.date = date
+        self.status = status
+        self.description = description
+        self._local_path = local_path
+        self._url = url
+        self._skills = skills
+        self._items = items
+        self._heroes = heroes
+
+    @property
+    def local_path(self):
+        return self._local_path or ""
+
+    @property
+    def url(self):
+        return self._url or ""
+
+    def _legacy(self, key):
+        if key in ("skills", "items", "heroes"):
+            return ",".join(getattr(self, key))
+        return getattr(self, key)
+
+    def display_values(self):
+        """Values for the videos tab columns, title first."""
+        return (
+            self.title,
+            self.type,
+            self.date,
+            self.status,
+            ", ".join(self.skills),
+            ", ".join(self.items),
+            ", ".join(self.heroes),
+            self.description,
+            self.local_path,
+            self.url,
+        )
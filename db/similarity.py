@@ -0,0 +1,158 @@
+"""TF-IDF vectors over item and skill effects and types, for "similar to this one" lookups.
+
+Each row of the index is one item or skill: the words of its effect texts (numbers dropped,
+so "Deal 10 Damage" and "Deal 40 Damage" share their terms) plus one token per type,
+counted sublinearly, weighted by inverse document frequency and L2-normalized. Cosine
+similarity is then a dot product, and the top-k neighbours of a batch of rows come from
+one matrix product and an argpartition per batch.
+
+The catalog is a few thousand rows with a vocabulary of a few thousand terms, so the matrix
+is kept dense (float32). It is saved next to the database file and reused until the catalog
+version (the stamp ingest writes to PRAGMA user_version, plus the row count and highest id)
+changes.
+"""
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+import numpy as np
+from sqlalchemy import select, func
+from db.models import EffectText, Type
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"[a-z]+")
+# Rows scored per matrix product; bounds the (batch, rows) score matrix to a few MB
+BATCH_ROWS = 256
+
+def catalog_version(conn, model):
+    """Version of model's table: the stamp ingest writes to PRAGMA user_version, the row count and the highest id."""
+    user_version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+    count, max_id = conn.execute(select(func.count(), func.max(model.id))).one()
+    return np.array([user_version, count, max_id or 0], dtype=np.int64)
+
+def tokenize(effects, types):
+    """Term counts of one entity: lowercased effect words plus a "type:" token per type."""
+    terms = Counter()
+    for effect in effects:
+        terms.update(WORD_PATTERN.findall(effect.lower()))
+    terms.update(f"type:{name.lower()}" for name in types)
+    return terms
+
+def tfidf_matrix(documents):
+    """L2-normalized TF-IDF rows (float32) for a list of term Counters."""
+    vocabulary = {term: column for column, term in enumerate(sorted(set().union(*documents)))}
+    matrix = np.zeros((len(documents), len(vocabulary)), dtype=np.float32)
+    for row, terms in enumerate(documents):
+        for term, count in terms.items():
+            matrix[row, vocabulary[term]] = 1.0 + math.log(count)
+    # Smoothed idf: terms in every row keep a small weight instead of vanishing
+    document_frequency = np.count_nonzero(matrix, axis=0)
+    matrix *= (np.log((1.0 + len(documents)) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+class SimilarityIndex:
+    """Cosine top-k over the effects and types of one entity table (items or skills)."""
+    def __init__(self, db_routine, name, model, effect_owner, effect_id, type_owner, type_id):
+        self.db = db_routine
+        self.name = name
+        self.model = model
+        self.effects_query = select(effect_owner, EffectText.text).join(EffectText, EffectText.id == effect_id)
+        self.types_query = select(type_owner, Type.name).join(Type, Type.id == type_id)
+        self.version = None
+        # (ids, matrix, row of each id), replaced as a whole so readers never mix two builds
+        self.index = None
+        self.lock = threading.Lock()
+
+    @property
+    def cache_path(self):
+        database = self.db.engine.url.database
+        # Read-only routines keep the index in memory only
+        if not database or database == ":memory:" or self.db.read_only:
+            return None
+        return f"{database}.{self.name}-similarity.npz"
+
+    def similar(self, entity_ids, k=10):
+        """Map each id to its k most similar entities as [(id, score)], best first.
+
+        Unknown ids map to an empty list, and entities sharing no term (score 0) are left out.
+        """
+        ids, matrix, rows_by_id = self._refresh()
+        wanted = [entity_id for entity_id in entity_ids if entity_id in rows_by_id]
+        results = {entity_id: [] for entity_id in entity_ids}
+        k = min(k, len(ids) - 1)
+        if k <= 0:
+            return results
+        for start in range(0, len(wanted), BATCH_ROWS):
+            batch = wanted[start:start + BATCH_ROWS]
+            rows = np.fromiter((rows_by_id[entity_id] for entity_id in batch), dtype=np.int64, count=len(batch))
+            scores = matrix[rows] @ matrix.T
+            scores[np.arange(len(rows)), rows] = -1.0
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            for entity_id, neighbours, neighbour_scores in zip(batch, top, top_scores):
+                results[entity_id] = [
+                    (int(ids[column]), float(score))
+                    for column, score in zip(neighbours, neighbour_scores) if score > 0
+                ]
+        return results
+
+    def _refresh(self):
+        """Return the current index, loading or rebuilding it when the catalog version changed."""
+        with self.db.read_connection() as conn:
+            version = catalog_version(conn, self.model)
+            with self.lock:
+                if self.version is None or not np.array_equal(self.version, version):
+                    loaded = self._load(version)
+                    if loaded is None:
+                        loaded = self._build(conn)
+                        self._save(version, *loaded)
+                    ids, matrix = loaded
+                    self.index = (ids, matrix, {int(entity_id): row for row, entity_id in enumerate(ids)})
+                    self.version = version
+                return self.index
+
+    def _build(self, conn):
+        ids = conn.execute(select(self.model.id).order_by(self.model.id)).scalars().all()
+        effects, types = {entity_id: [] for entity_id in ids}, {entity_id: [] for entity_id in ids}
+        for entity_id, text in conn.execute(self.effects_query):
+            effects.setdefault(entity_id, []).append(text)
+        for entity_id, name in conn.execute(self.types_query):
+            types.setdefault(entity_id, []).append(name)
+        documents = [tokenize(effects[entity_id], types[entity_id]) for entity_id in ids]
+        matrix = tfidf_matrix(documents)
+        logger.info(f"Built {self.name} similarity index: {matrix.shape[0]} rows, {matrix.shape[1]} terms")
+        return np.array(ids, dtype=np.int64), matrix
+
+    def _load(self, version):
+        path = self.cache_path
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as cached:
+                if not np.array_equal(cached["version"], version):
+                    return None
+                return cached["ids"], cached["matrix"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable similarity cache {path}: {e}")
+            return None
+
+    def _save(self, version, ids, matrix):
+        path = self.cache_path
+        if path is None:
+            return
+        # Write a temporary file and rename it so a reader never sees a partial cache
+        temporary = f"{path}.tmp"
+        try:
+            with open(temporary, "wb") as f:
+                np.savez(f, version=version, ids=ids, matrix=matrix)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.warning(f"Could not write similarity cache {path}: {e}")
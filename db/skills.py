@@ -1,118 +1,153 @@
 from db.db_routine import DBRoutine
-from db.models import Skill, SkillRarity, SkillType, SkillEffect, SkillHero, ItemHero
-from utils.config import RARITY_ORDER
-from sqlalchemy import select, func, union, and_, case
-from sqlalchemy.sql import text
+from db.aggregates import json_list, json_rarities, rarity_bits
+from db.models import Skill, SkillRarity, SkillType, SkillEffect, SkillHero, ItemHero, Rarity, Type, Hero, EffectText
+from db.query_dsl import compile_query
+from db.records import SkillRecord
+from db.value_filters import add_value_filter_params, value_filter_criteria, stat_sort_key
+from utils.effect_values import STAT_KEYWORDS
+from sqlalchemy import select, bindparam, or_
 
 class SkillDB:
     def __init__(self, db_routine: DBRoutine):
         self.db = db_routine
+        self._similarity = None
+
+    # Created on first use, so callers that only query start without importing numpy
+    @property
+    def similarity(self):
+        if self._similarity is None:
+            from db.similarity import SimilarityIndex
+            self._similarity = SimilarityIndex(
+                self.db, "skills", Skill, SkillEffect.skill_id, SkillEffect.effect_id, SkillType.skill_id, SkillType.type_id
+            )
+        return self._similarity
 
     def get_rarities(self):
-        with self.db.get_connection() as session:
-            results = session.query(SkillRarity.rarity).distinct().all()
-            rarities = [row[0] for row in results if row[0] is not None]
-            sorted_rarities = sorted([r for r in rarities if r in RARITY_ORDER], key=lambda x: RARITY_ORDER.index(x))
-            return [""] + sorted_rarities
+        with self.db.read_connection() as conn:
+            results = conn.execute(
+                select(Rarity.name)
+                .where(Rarity.id.in_(select(SkillRarity.rarity_id)))
+                .order_by(Rarity.rank)
+            )
+            return [""] + [row[0] for row in results]
 
     def get_heroes(self):
-        with self.db.get_connection() as session:
-            skill_heroes = select(SkillHero.hero).where(SkillHero.hero != None)
-            item_heroes = select(ItemHero.hero).where(ItemHero.hero != None)
-            query = union(skill_heroes, item_heroes).order_by('hero')
-            result = session.execute(query)
-            return [""] + [row[0] for row in result.fetchall()]
+        with self.db.read_connection() as conn:
+            query = (
+                select(Hero.name)
+                .where(or_(Hero.id.in_(select(SkillHero.hero_id)), Hero.id.in_(select(ItemHero.hero_id))))
+                .order_by(Hero.name)
+            )
+            return [""] + [row[0] for row in conn.execute(query)]
 
     def get_types(self):
-        with self.db.get_connection() as session:
-            results = session.query(SkillType.type).distinct().order_by(SkillType.type).all()
+        with self.db.read_connection() as conn:
+            results = conn.execute(select(Type.name).where(Type.id.in_(select(SkillType.type_id))).order_by(Type.name))
             return [row[0] for row in results]
 
     def get_all_skills(self):
-        with self.db.get_connection() as session:
-            results = session.query(Skill.id, Skill.name).order_by(Skill.name).all()
+        with self.db.read_connection() as conn:
+            results = conn.execute(select(Skill.id, Skill.name).order_by(Skill.name))
             return [(row.id, row.name) for row in results]
 
-    def query_skills(self, name="", rarities=None, types=None, effect_keyword="", heroes=None, sort_by="name", sort_order="ASC"):
-        with self.db.get_connection() as session:
-            # Base query with joins
-            query = (
-                session.query(
-                    Skill.id,
-                    Skill.name,
-                    func.group_concat(SkillRarity.rarity.distinct()).label('rarities'),
-                    func.group_concat(SkillEffect.effect.distinct()).label('effects'),
-                    func.group_concat(SkillType.type.distinct()).label('types'),
-                    func.group_concat(SkillHero.hero.distinct()).label('heroes')
-                )
-                .outerjoin(SkillRarity, Skill.id == SkillRarity.skill_id)
-                .outerjoin(SkillEffect, Skill.id == SkillEffect.skill_id)
-                .outerjoin(SkillType, Skill.id == SkillType.skill_id)
-                .outerjoin(SkillHero, Skill.id == SkillHero.skill_id)
-            )
+    def similar_skills(self, skill_id, k=10):
+        """Skills whose effects and types are closest to skill_id's, as (SkillRecord, score), best first."""
+        matches = self.similarity.similar([skill_id], k)[skill_id]
+        records = {record.id: record for record in self.query_skills(sort_by=None, ids=[i for i, _ in matches])}
+        return [(records[i], score) for i, score in matches if i in records]
+
+    def query_skills(self, name="", rarities=None, types=None, effect_keyword="", heroes=None, sort_by="name", sort_order="ASC", ids=None, value_filters=None, query=""):
+        stmt, params = self.query_skills_statement(name, rarities, types, effect_keyword, heroes, sort_by, sort_order, ids, value_filters, query)
+        with self.db.read_connection() as conn:
+            # Rows come back in SkillRecord's argument order; JSON columns are decoded lazily
+            return [SkillRecord(*row) for row in conn.execute(stmt, params)]
 
-            # Apply filters
-            filters = []
-            if name:
-                filters.append(Skill.name.ilike(f"%{name}%"))
-            if rarities:
-                query = query.filter(Skill.id.in_(
-                    select(SkillRarity.skill_id).where(SkillRarity.rarity.in_(rarities))
-                ))
-            if types:
-                query = query.filter(Skill.id.in_(
-                    select(SkillType.skill_id).where(SkillType.type.in_(types))
-                ))
-            if effect_keyword:
-                filters.append(SkillEffect.effect.ilike(f"%{effect_keyword}%"))
-            if heroes:
-                query = query.filter(Skill.id.in_(
-                    select(SkillHero.skill_id).where(SkillHero.hero.in_(heroes))
-                ))
+    def query_skills_statement(self, name="", rarities=None, types=None, effect_keyword="", heroes=None, sort_by="name", sort_order="ASC", ids=None, value_filters=None, query=""):
+        """Return the cached Core statement for this filter shape and its bind parameters."""
+        params = {}
+        if name:
+            params["name"] = f"%{name}%"
+        if rarities:
+            params["rarities"] = list(rarities)
+        if types:
+            params["types"] = list(types)
+        if effect_keyword:
+            params["effect"] = f"%{effect_keyword}%"
+        if heroes:
+            params["heroes"] = list(heroes)
+        if ids is not None:
+            params["ids"] = list(ids)
+        add_value_filter_params(params, value_filters)
+        # A text query (db/query_dsl.py) is one more criterion on the same statement
+        compiled = compile_query("skills", query) if query else None
+        if compiled:
+            params.update(compiled.params)
+        # "stat:damage" sorts by the highest damage value among the effects
+        if sort_by and sort_by.startswith("stat:") and sort_by[5:] in STAT_KEYWORDS:
+            params["sort_stat"] = sort_by[5:]
+            sort_by = "stat"
+        elif sort_by not in ("name", "rarity", "types"):
+            sort_by = None
+        descending = sort_order == "DESC"
+        shape = ("skills", frozenset(params), sort_by, descending)
+        if compiled:
+            # Text queries come in any number of shapes, so their statements go to the bounded plan cache
+            build = lambda: self._build_query(params, sort_by, descending).where(compiled.criterion)
+            return self.db.plan(shape + (compiled.shape,), build), params
+        return self.db.statement(shape, lambda: self._build_query(params, sort_by, descending)), params
 
-            # Apply filters and group
-            query = query.filter(and_(*filters)).group_by(Skill.id)
+    def _build_query(self, params, sort_by, descending):
+        # One JSON aggregate per child table, correlated on the skill
+        stmt = select(
+            Skill.id,
+            Skill.name,
+            json_rarities(SkillRarity.rarity_id, SkillRarity.skill_id, Skill.id).label('rarities'),
+            json_list(EffectText.text, SkillEffect.skill_id, Skill.id, SkillEffect.effect_id == EffectText.id).label('effects'),
+            json_list(Type.name, SkillType.skill_id, Skill.id, SkillType.type_id == Type.id).label('types'),
+            json_list(Hero.name, SkillHero.skill_id, Skill.id, SkillHero.hero_id == Hero.id).label('heroes')
+        )
 
-            # Apply sorting
-            if sort_by == "name":
-                query = query.order_by(text(f"skills.name {sort_order}"))
-            elif sort_by == "rarity":
-                rarity_case = case(
-                    {rarity: idx + 1 for idx, rarity in enumerate(['Bronze', 'Silver', 'Gold', 'Diamond', 'Legendary'])},
-                    value=SkillRarity.rarity,
-                    else_=6
-                )
-                query = query.order_by(func.min(rarity_case).asc() if sort_order == "ASC" else func.min(rarity_case).desc())
-            elif sort_by == "types":
-                query = query.order_by(text(f"GROUP_CONCAT(DISTINCT skill_types.type) {sort_order}"))
+        # Apply filters
+        if "name" in params:
+            stmt = stmt.where(Skill.name.ilike(bindparam("name")))
+        if "rarities" in params:
+            # Bitwise test on the derived mask instead of a rarity subquery per row
+            stmt = stmt.where(Skill.rarity_mask.op("&")(rarity_bits("rarities")) != 0)
+        if "types" in params:
+            stmt = stmt.where(Skill.id.in_(
+                select(SkillType.skill_id).join(Type, SkillType.type_id == Type.id)
+                .where(Type.name.in_(bindparam("types", expanding=True)))
+            ))
+        if "effect" in params:
+            # LIKE '%...%' cannot use an index: match the few unique texts once, then
+            # look up the skills using them through (effect_id, skill_id)
+            matching = select(EffectText.id).where(EffectText.text.ilike(bindparam("effect")))
+            stmt = stmt.where(Skill.id.in_(
+                select(SkillEffect.skill_id).where(SkillEffect.effect_id.in_(matching))
+            ))
+        if "heroes" in params:
+            stmt = stmt.where(Skill.id.in_(
+                select(SkillHero.skill_id).join(Hero, SkillHero.hero_id == Hero.id)
+                .where(Hero.name.in_(bindparam("heroes", expanding=True)))
+            ))
+        if "ids" in params:
+            stmt = stmt.where(Skill.id.in_(bindparam("ids", expanding=True)))
+        # Numeric predicates such as "damage >= 50 at Gold" over the parsed effect values
+        stmt = stmt.where(*value_filter_criteria(params, Skill, SkillEffect.skill_id, SkillEffect.effect_id))
 
-            # Execute and format results
-            results = query.all()
-            skills = []
-            for row in results:
-                # Process effects (assuming plain text, no HTML)
-                effects = row.effects or ""
-                effects_list = sorted(list(set(effects.split(","))) if effects else [], key=str.lower)
-                
-                # Process types
-                types_list = sorted(list(set(row.types.split(","))) if row.types else [], key=str.lower)
-                
-                # Process rarities
-                rarities_list = sorted(
-                    [r for r in (row.rarities.split(",") if row.rarities else []) if r],
-                    key=lambda x: RARITY_ORDER.index(x) if x in RARITY_ORDER else len(RARITY_ORDER)
-                )
-                
-                # Process heroes
-                heroes_list = sorted(list(set(row.heroes.split(","))) if row.heroes else [], key=str.lower)
-                
-                skills.append({
-                    "id": row.id,
-                    "name": row.name,
-                    "rarities": ", ".join(rarities_list),
-                    "effects": ", ".join(effects_list),
-                    "types": types_list,
-                    "heroes": heroes_list
-                })
-            
-            return skills
\ No newline at end of file
+        # Apply sorting
+        if sort_by == "name":
+            key = Skill.name
+        elif sort_by == "rarity":
+            # Entries without a known rarity have no rank and sort last, as before the column
+            key = Skill.min_rarity_rank
+            return stmt.order_by((key.desc() if descending else key.asc()).nulls_last())
+        elif sort_by == "types":
+            key = Skill.type_sort_key
+        elif sort_by == "stat":
+            # Rows without the stat sort last either way
+            key = stat_sort_key(Skill, SkillEffect.skill_id, SkillEffect.effect_id)
+            return stmt.order_by((key.desc() if descending else key.asc()).nulls_last())
+        else:
+            return stmt
+        return stmt.order_by(key.desc() if descending else key.asc())
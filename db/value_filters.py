@@ -0,0 +1,114 @@
+"""Numeric predicates over the parsed effect values, such as "damage >= 50 at Gold".
+
+A predicate names a stat from utils.effect_values.STAT_KEYWORDS, a comparison and a number,
+optionally at a rarity. Without a rarity any of the effect's values may match. With one, the
+owner must be available at that rarity and the value is the one listed for it: the effect's
+tier rarity rank - min_rarity_rank, or its single value when it lists one.
+
+The query methods add each predicate as an IN subquery driven by the (stat, value) index, and
+the comparison operators are encoded in the bind parameter names so they are part of the
+statement cache key.
+"""
+import operator
+import re
+from collections import namedtuple
+from sqlalchemy import select, bindparam, func, literal, Integer
+from sqlalchemy.orm import aliased
+from db.models import EffectValue, Rarity
+from utils.config import RARITY_ORDER
+from utils.effect_values import STAT_KEYWORDS
+
+ValueFilter = namedtuple("ValueFilter", ["stat", "op", "value", "rarity"])
+
+# Operator as written -> (name used in the bind parameter, comparison)
+OPERATORS = {
+    ">=": ("ge", operator.ge),
+    ">": ("gt", operator.gt),
+    "<=": ("le", operator.le),
+    "<": ("lt", operator.lt),
+    "==": ("eq", operator.eq),
+    "=": ("eq", operator.eq),
+}
+COMPARISONS = {name: compare for name, compare in OPERATORS.values()}
+
+FILTER_PATTERN = re.compile(
+    r"^\s*(?P<stat>[a-z][a-z ]*?)\s*(?P<op>>=|<=|==|=|>|<)\s*(?P<value>-?\d+(?:\.\d+)?)"
+    r"(?:\s+at\s+(?P<rarity>[a-z]+))?\s*$",
+    re.IGNORECASE
+)
+PARAM_PATTERN = re.compile(r"^value(\d+)_(ge|gt|le|lt|eq)$")
+
+def parse_value_filter(text):
+    """Parse "stat op number [at rarity]" into a ValueFilter. Raises ValueError when invalid."""
+    match = FILTER_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Invalid value filter {text!r}: expected e.g. 'damage >= 50 at Gold'")
+    stat = " ".join(match.group("stat").lower().split())
+    if stat not in STAT_KEYWORDS:
+        raise ValueError(f"Unknown stat {stat!r} in value filter {text!r}")
+    rarity = match.group("rarity")
+    if rarity is not None:
+        names = {name.lower(): name for name in RARITY_ORDER}
+        if rarity.lower() not in names:
+            raise ValueError(f"Unknown rarity {rarity!r} in value filter {text!r}")
+        rarity = names[rarity.lower()]
+    return ValueFilter(stat, match.group("op"), float(match.group("value")), rarity)
+
+def add_value_filter_params(params, value_filters):
+    """Add the bind parameters of value_filters (ValueFilter tuples or strings) to params."""
+    for index, value_filter in enumerate(value_filters or ()):
+        if isinstance(value_filter, str):
+            value_filter = parse_value_filter(value_filter)
+        if value_filter.op not in OPERATORS:
+            raise ValueError(f"Unknown operator {value_filter.op!r} in value filter {value_filter}")
+        params[f"value_stat{index}"] = value_filter.stat
+        params[f"value{index}_{OPERATORS[value_filter.op][0]}"] = value_filter.value
+        if value_filter.rarity:
+            params[f"value_rarity{index}"] = value_filter.rarity
+
+def value_filter_criteria(params, owner, link_owner, link_effect):
+    """WHERE criteria for the value filters in params, on owner rows linked through link_owner/link_effect."""
+    criteria = []
+    for name in sorted(params):
+        match = PARAM_PATTERN.match(name)
+        if not match:
+            continue
+        index, op = match.groups()
+        rarity = f"value_rarity{index}" if f"value_rarity{index}" in params else None
+        criteria.append(value_criterion(owner, link_owner, link_effect, f"value_stat{index}", name, op, rarity))
+    return criteria
+
+def value_criterion(owner, link_owner, link_effect, stat_param, value_param, op, rarity_param=None):
+    """owner.id IN the owners with a stat_param value comparing with op ("ge", ...) to value_param.
+
+    With rarity_param, only the value listed for that rarity counts, on owners available at it.
+    """
+    matching = (
+        select(link_owner)
+        .join(EffectValue, EffectValue.effect_id == link_effect)
+        .where(
+            EffectValue.stat == bindparam(stat_param),
+            COMPARISONS[op](EffectValue.value, bindparam(value_param))
+        )
+    )
+    if rarity_param:
+        # Uncorrelated, so SQLite evaluates the rank once per query
+        rank = select(Rarity.rank).where(Rarity.name == bindparam(rarity_param)).scalar_subquery()
+        candidate = aliased(owner)
+        bit = literal(1).op("<<", return_type=Integer)(rank - 1)
+        matching = matching.join(candidate, candidate.id == link_owner).where(
+            candidate.rarity_mask.op("&")(bit) != 0,
+            (EffectValue.per_rarity == 0) | (EffectValue.tier == rank - candidate.min_rarity_rank)
+        )
+    return owner.id.in_(matching)
+
+def stat_sort_key(owner, link_owner, link_effect):
+    """Highest value of the stat in the sort_stat bind parameter among the owner's effects."""
+    return (
+        select(func.max(EffectValue.value))
+        .select_from(link_owner.class_)
+        .join(EffectValue, EffectValue.effect_id == link_effect)
+        .where(link_owner == owner.id, EffectValue.stat == bindparam("sort_stat"))
+        .correlate(owner)
+        .scalar_subquery()
+    )
@@ -1,86 +1,161 @@
+from db.aggregates import json_list
 from db.db_routine import DBRoutine
-from db.models import Video, VideoSkill, VideoItem, VideoHero, Skill, Item, SkillHero, ItemHero
-from sqlalchemy import select, func, union, and_
-from sqlalchemy.sql import text
+from db.models import Video, VideoSkill, VideoItem, VideoHero, Skill, Item, SkillHero, ItemHero, Hero, videos_fts
+from db.query_dsl import compile_query, fts_query
+from db.records import VideoRecord
+from sqlalchemy import select, bindparam, or_, func
+
+# Sortable columns and their tie-breakers; each key is served by an index on videos
+# (idx_video_date, idx_video_title, idx_video_status_date, idx_video_type_date)
+SORT_KEYS = {
+    "date": (Video.date, Video.id),
+    "title": (Video.title.collate("NOCASE"), Video.id),
+    "status": (Video.status, Video.date, Video.id),
+    "type": (Video.type, Video.date, Video.id),
+}
+
+def _linked_videos(params, values_param, count_param, video_column, value_column, *join):
+    """Video ids linked to any of the values, or to all of them when params holds count_param."""
+    query = select(video_column)
+    if join:
+        query = query.join(*join)
+    query = query.where(value_column.in_(bindparam(values_param, expanding=True)))
+    if count_param in params:
+        # The association primary keys make (video, value) unique, so a full match has one row per value.
+        # Grouping on video_id + 0 keeps SQLite from walking the (video_id, value) index in full to skip
+        # the GROUP BY sort; seeking the few rows per value through (value, video_id) is cheaper
+        query = query.group_by(video_column + 0).having(func.count() == bindparam(count_param))
+    return query
+
+def _set_params(params, values_param, count_param, values, match):
+    """Add a deduplicated value set and, for match="all" on more than one value, its size."""
+    values = list(dict.fromkeys(values or []))
+    if not values:
+        return
+    params[values_param] = values
+    if match == "all" and len(values) > 1:
+        params[count_param] = len(values)
 
 class VideoDB:
     def __init__(self, db_routine: DBRoutine):
         self.db = db_routine
 
     def get_all_heroes(self):
-        with self.db.get_connection() as session:
-            # Union skill_heroes and item_heroes, select distinct heroes
-            skill_heroes = select(SkillHero.hero).where(SkillHero.hero != None)
-            item_heroes = select(ItemHero.hero).where(ItemHero.hero != None)
-            query = union(skill_heroes, item_heroes).order_by('hero')
-            result = session.execute(query)
-            return [row[0] for row in result.fetchall()]
-
-    def get_videos(self, video_type="", status="", skill_ids=None, item_ids=None, hero_name="", sort_by="date", sort_order="DESC"):
-        with self.db.get_connection() as session:
+        with self.db.read_connection() as conn:
+            # Heroes referenced by any skill or item
             query = (
-                session.query(
-                    Video.id,
-                    Video.title,
-                    Video.type,
-                    Video.date,
-                    Video.status,
-                    Video.description,
-                    Video.local_path,
-                    Video.url,
-                    func.group_concat(Skill.name.distinct()).label('skills'),
-                    func.group_concat(Item.name.distinct()).label('items'),
-                    func.group_concat(VideoHero.hero_name.distinct()).label('heroes')
-                )
-                .outerjoin(VideoSkill, Video.id == VideoSkill.video_id)
-                .outerjoin(Skill, VideoSkill.skill_id == Skill.id)
-                .outerjoin(VideoItem, Video.id == VideoItem.video_id)
-                .outerjoin(Item, VideoItem.item_id == Item.id)
-                .outerjoin(VideoHero, Video.id == VideoHero.video_id)
+                select(Hero.name)
+                .where(or_(Hero.id.in_(select(SkillHero.hero_id)), Hero.id.in_(select(ItemHero.hero_id))))
+                .order_by(Hero.name)
             )
-
-            filters = []
-            if video_type:
-                filters.append(Video.type == video_type)
-            if status:
-                filters.append(Video.status == status)
-            if skill_ids:
-                query = query.filter(Video.id.in_(
-                    select(VideoSkill.video_id).where(VideoSkill.skill_id.in_(skill_ids))
-                ))
-            if item_ids:
-                query = query.filter(Video.id.in_(
-                    select(VideoItem.video_id).where(VideoItem.item_id.in_(item_ids))
-                ))
-            if hero_name and hero_name != "":
-                query = query.filter(Video.id.in_(
-                    select(VideoHero.video_id).where(VideoHero.hero_name == hero_name)
-                ))
-
-            query = (
-                query
-                .filter(and_(*filters))
-                .group_by(Video.id)
-                .order_by(text(f"videos.{sort_by} {sort_order}"))
+            return [row[0] for row in conn.execute(query)]
+
+    def get_videos(self, video_type="", status="", skill_ids=None, item_ids=None, heroes=None, sort_by="date", sort_order="DESC",
+                   date_from="", date_to="", title_prefix="", skill_match="any", item_match="any", hero_match="any", search="", query=""):
+        stmt, params = self.get_videos_statement(
+            video_type, status, skill_ids, item_ids, heroes, sort_by, sort_order, date_from, date_to, title_prefix,
+            skill_match, item_match, hero_match, search, query
+        )
+        with self.db.read_connection() as conn:
+            # Rows come back in VideoRecord's argument order; JSON columns are decoded lazily
+            return [VideoRecord(*row) for row in conn.execute(stmt, params)]
+
+    def get_videos_statement(self, video_type="", status="", skill_ids=None, item_ids=None, heroes=None, sort_by="date", sort_order="DESC",
+                             date_from="", date_to="", title_prefix="", skill_match="any", item_match="any", hero_match="any", search="", query=""):
+        """Return the cached Core statement for this filter shape and its bind parameters.
+
+        status is a single status or a collection of them; dates are inclusive YYYY-MM-DD bounds.
+        skill_match, item_match and hero_match are "any" (linked to one of the values) or "all".
+        search is free text matched against titles and descriptions (see fts_query); with it,
+        sort_by="relevance" orders by bm25, best match first. query is a text query (db/query_dsl.py).
+        """
+        params = {}
+        if video_type:
+            params["video_type"] = video_type
+        statuses = [s for s in ([status] if isinstance(status, str) else status or []) if s]
+        if statuses:
+            params["statuses"] = statuses
+        if date_from:
+            params["date_from"] = date_from
+        if date_to:
+            params["date_to"] = date_to
+        if title_prefix:
+            # Plain LIKE is case-insensitive and can use the NOCASE title index; ilike could not
+            escaped = title_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params["title_prefix"] = f"{escaped}%"
+        _set_params(params, "skill_ids", "skill_count", skill_ids, skill_match)
+        _set_params(params, "item_ids", "item_count", item_ids, item_match)
+        _set_params(params, "heroes", "hero_count", [heroes] if isinstance(heroes, str) else heroes, hero_match)
+        if search.strip():
+            params["search"] = fts_query(search)
+        compiled = compile_query("videos", query) if query else None
+        if compiled:
+            params.update(compiled.params)
+        if not (sort_by in SORT_KEYS or sort_by == "relevance" and "search" in params):
+            sort_by = "date"
+        descending = sort_order == "DESC"
+        shape = ("videos", frozenset(params), sort_by, descending)
+        if compiled:
+            # Text queries come in any number of shapes, so their statements go to the bounded plan cache
+            build = lambda: self._build_query(params, sort_by, descending).where(compiled.criterion)
+            return self.db.plan(shape + (compiled.shape,), build), params
+        return self.db.statement(shape, lambda: self._build_query(params, sort_by, descending)), params
+
+    def _build_query(self, params, sort_by, descending):
+        stmt = select(
+            Video.id,
+            Video.title,
+            Video.type,
+            Video.date,
+            Video.status,
+            Video.description,
+            Video.local_path,
+            Video.url,
+            json_list(Skill.name, VideoSkill.video_id, Video.id, VideoSkill.skill_id == Skill.id).label('skills'),
+            json_list(Item.name, VideoItem.video_id, Video.id, VideoItem.item_id == Item.id).label('items'),
+            json_list(Hero.name, VideoHero.video_id, Video.id, VideoHero.hero_id == Hero.id).label('heroes')
+        )
+
+        if "search" in params:
+            stmt = stmt.join(videos_fts, videos_fts.c.rowid == Video.id).where(
+                videos_fts.c.videos_fts.match(bindparam("search"))
             )
-
-            results = query.all()
-            return [
-                {
-                    "id": row.id,
-                    "title": row.title,
-                    "type": row.type,
-                    "date": row.date,
-                    "status": row.status,
-                    "description": row.description,
-                    "local_path": row.local_path or "",
-                    "url": row.url or "",
-                    "skills": row.skills or "",
-                    "items": row.items or "",
-                    "heroes": row.heroes or ""
-                }
-                for row in results
-            ]
+        if "video_type" in params:
+            stmt = stmt.where(Video.type == bindparam("video_type"))
+        if "statuses" in params:
+            stmt = stmt.where(Video.status.in_(bindparam("statuses", expanding=True)))
+        if "date_from" in params:
+            stmt = stmt.where(Video.date >= bindparam("date_from"))
+        if "date_to" in params:
+            stmt = stmt.where(Video.date <= bindparam("date_to"))
+        if "title_prefix" in params:
+            stmt = stmt.where(Video.title.like(bindparam("title_prefix"), escape="\\"))
+        # The set sizes are only present for match="all", which also makes them part of the shape
+        if "skill_ids" in params:
+            stmt = stmt.where(Video.id.in_(
+                _linked_videos(params, "skill_ids", "skill_count", VideoSkill.video_id, VideoSkill.skill_id)
+            ))
+        if "item_ids" in params:
+            stmt = stmt.where(Video.id.in_(
+                _linked_videos(params, "item_ids", "item_count", VideoItem.video_id, VideoItem.item_id)
+            ))
+        if "heroes" in params:
+            stmt = stmt.where(Video.id.in_(
+                _linked_videos(params, "heroes", "hero_count", VideoHero.video_id, Hero.name, Hero, VideoHero.hero_id == Hero.id)
+            ))
+
+        if sort_by == "relevance":
+            # bm25 ranks are negative; the lowest is the best match
+            return stmt.order_by(videos_fts.c.rank, Video.date.desc())
+        return stmt.order_by(*(key.desc() if descending else key.asc() for key in SORT_KEYS[sort_by]))
+
+    def search_videos(self, text, sort_by="relevance", **filters):
+        """Videos whose title or description contain every word of text, best match first.
+
+        filters are the other get_videos arguments, including a query= text query, and are
+        applied in the same statement.
+        """
+        return self.get_videos(sort_by=sort_by, search=text, **filters)
 
     def add_video(self, title, video_type, date, status, description, skill_ids, item_ids, hero_names, local_path="", url=""):
         with self.db.get_connection() as session:
@@ -100,8 +175,21 @@ class VideoDB:
                 session.add(VideoSkill(video_id=video.id, skill_id=skill_id))
             for item_id in item_ids:
                 session.add(VideoItem(video_id=video.id, item_id=item_id))
-            for hero_name in hero_names:
-                session.add(VideoHero(video_id=video.id, hero_name=hero_name))
+            for hero_id in self._hero_ids(session, hero_names):
+                session.add(VideoHero(video_id=video.id, hero_id=hero_id))
+            video_id = video.id
+        return video_id
+
+    def _hero_ids(self, session, hero_names):
+        """Resolve hero names to heroes.id, adding any hero not in the table yet."""
+        hero_ids = dict(session.execute(select(Hero.name, Hero.id).where(Hero.name.in_(hero_names))).all())
+        for hero_name in hero_names:
+            if hero_name not in hero_ids:
+                hero = Hero(name=hero_name)
+                session.add(hero)
+                session.flush()
+                hero_ids[hero_name] = hero.id
+        return [hero_ids[hero_name] for hero_name in hero_names]
 
     def update_video(self, video_id, title, video_type, date, status, description, skill_ids, item_ids, hero_names, local_path="", url=""):
         with self.db.get_connection() as session:
@@ -126,36 +214,25 @@ class VideoDB:
                 session.add(VideoSkill(video_id=video_id, skill_id=skill_id))
             for item_id in item_ids:
                 session.add(VideoItem(video_id=video_id, item_id=item_id))
-            for hero_name in hero_names:
-                session.add(VideoHero(video_id=video_id, hero_name=hero_name))
+            for hero_id in self._hero_ids(session, hero_names):
+                session.add(VideoHero(video_id=video_id, hero_id=hero_id))
 
     def delete_video(self, video_id):
         with self.db.get_connection() as session:
             video = session.get(Video, video_id)
             if video:
+                # SQLite does not enforce the ON DELETE CASCADE, and video ids can be reused
+                session.query(VideoSkill).filter(VideoSkill.video_id == video_id).delete()
+                session.query(VideoItem).filter(VideoItem.video_id == video_id).delete()
+                session.query(VideoHero).filter(VideoHero.video_id == video_id).delete()
                 session.delete(video)
 
-    def get_video_associations(self, title):
-        """Fetch skill_ids, item_ids, and hero_names associated with a video by title."""
-        with self.db.get_connection() as session:
-            video = session.query(Video).filter(Video.title == title).first()
-            if not video:
-                return [], [], []
-
-            skill_ids = [
-                vs.skill_id for vs in session.query(VideoSkill.skill_id)
-                .filter(VideoSkill.video_id == video.id)
-                .all()
-            ]
-            item_ids = [
-                vi.item_id for vi in session.query(VideoItem.item_id)
-                .filter(VideoItem.video_id == video.id)
-                .all()
-            ]
-            hero_names = [
-                vh.hero_name for vh in session.query(VideoHero.hero_name)
-                .filter(VideoHero.video_id == video.id)
-                .all()
-            ]
-
-            return skill_ids, item_ids, hero_names
\ No newline at end of file
+    def get_video_associations(self, video_id):
+        """Fetch skill_ids, item_ids, and hero_names associated with a video."""
+        with self.db.read_connection() as conn:
+            skill_ids = list(conn.scalars(select(VideoSkill.skill_id).where(VideoSkill.video_id == video_id)))
+            item_ids = list(conn.scalars(select(VideoItem.item_id).where(VideoItem.video_id == video_id)))
+            hero_names = list(conn.scalars(
+                select(Hero.name).join(VideoHero, VideoHero.hero_id == Hero.id).where(VideoHero.video_id == video_id)
+            ))
+            return skill_ids, item_ids, hero_names
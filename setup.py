@@ -14,8 +14,12 @@ setup(name="shiny-pancake",
             "tkcalendar >= 1.6.1, < 2.0.0",
             "sqlalchemy >= 2.0.41, < 3.0.0",
             "alembic >= 1.15.2, < 2.0.0",
+            "numpy >= 2.0, < 3.0",
 		],
 		entry_points={
+			"console_scripts": [
+				"bazaar-query = cli.bazaar_query:main",
+			],
 		},
 		classifiers=[
 				"Development Status :: 3 - Alpha",
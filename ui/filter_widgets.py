@@ -2,8 +2,9 @@ import tkinter as tk
 from tkinter import ttk
 
 class FilterWidgets:
-    def __init__(self, parent, get_rarities_func, get_types_func, get_heroes_func, get_sizes_func=None):
+    def __init__(self, parent, get_rarities_func, get_types_func, get_heroes_func, get_sizes_func=None, search_func=None):
         self.parent = parent
+        self.search_func = search_func
         self.get_rarities_func = get_rarities_func
         self.get_types_func = get_types_func
         self.get_heroes_func = get_heroes_func
@@ -65,6 +66,14 @@ class FilterWidgets:
             self.widgets["type_vars"][type_name] = var
             ttk.Checkbutton(scrollable_frame, text=type_name, variable=var).grid(row=i, column=0, sticky="w")
 
+        # Text query, combined with the filters above, e.g. hero:Vanessa type:Weapon,Tool rarity>=Gold -size:Large
+        ttk.Label(filter_frame, text="Query:").grid(row=row_offset + 1, column=0, padx=5, sticky="w")
+        self.widgets["query_var"] = tk.StringVar()
+        query_entry = ttk.Entry(filter_frame, textvariable=self.widgets["query_var"])
+        query_entry.grid(row=row_offset + 1, column=1, padx=5, sticky="ew")
+        if self.search_func:
+            query_entry.bind("<Return>", lambda event: self.search_func())
+
         return filter_frame
 
     def get_filter_values(self):
@@ -74,5 +83,6 @@ class FilterWidgets:
             "types": [t for t, var in self.widgets["type_vars"].items() if var.get()],
             "effect_keyword": self.widgets["effect_var"].get().strip(),
             "hero": self.widgets["hero_var"].get(),
-            "size": self.widgets.get("size_var", tk.StringVar()).get()
+            "size": self.widgets.get("size_var", tk.StringVar()).get(),
+            "query": self.widgets["query_var"].get().strip()
         }
\ No newline at end of file
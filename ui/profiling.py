@@ -0,0 +1,180 @@
+"""Opt-in profiling of the main UI actions.
+
+Enable with the BAZAAR_PROFILE=1 environment variable or the --profile flag of
+skill_query_desktop.py. Each wrapped action runs under cProfile (and
+tracemalloc with BAZAAR_PROFILE_MEMORY=1 / --profile-memory) and one .prof file
+per call is written to BAZAAR_PROFILE_DIR (default ./profiles). Wall time is
+split between DB calls, Tk rendering and the remaining Python work, and a
+summary table is printed and saved on exit.
+"""
+import atexit
+import cProfile
+import functools
+import logging
+import os
+import time
+import tracemalloc
+import tkinter as tk
+from tkinter import ttk, messagebox
+from db.items import ItemDB
+from db.skills import SkillDB
+from db.videos import VideoDB
+from ui.search_popup import SearchPopup
+from ui.tabs.items_tab import ItemsTab
+from ui.tabs.skills_tab import SkillsTab
+from ui.tabs.videos_tab import VideoTab
+from ui.tabs.planner_tab import PlannerTab
+
+logger = logging.getLogger(__name__)
+
+# (class, method, label) for every profiled user action
+ACTIONS = [
+    (SkillsTab, "update_results", "SkillsTab.update_results"),
+    (SkillsTab, "sort_column", "SkillsTab.sort_column"),
+    (SkillsTab, "export_results", "SkillsTab.export_results"),
+    (ItemsTab, "update_results", "ItemsTab.update_results"),
+    (ItemsTab, "sort_column", "ItemsTab.sort_column"),
+    (ItemsTab, "export_results", "ItemsTab.export_results"),
+    (VideoTab, "update_results", "VideoTab.update_results"),
+    (VideoTab, "sort_column", "VideoTab.sort_column"),
+    (VideoTab, "load_selected", "VideoTab.load_selected"),
+    (VideoTab, "add_video", "VideoTab.add_video"),
+    (PlannerTab, "update_results", "PlannerTab.update_results"),
+    (SearchPopup, "__init__", "SearchPopup.open"),
+    (SearchPopup, "update_results", "SearchPopup.update_results"),
+]
+
+# Calls whose time is attributed to Tk rendering
+TK_METHODS = [
+    (ttk.Treeview, ["insert", "delete", "item", "get_children", "selection"]),
+    (tk.Listbox, ["insert", "delete"]),
+]
+
+# Modal dialogs block on the user; their time is excluded from the split
+WAIT_FUNCTIONS = ["showinfo", "showerror", "showwarning", "askyesno"]
+
+class ActionProfiler:
+    def __init__(self, output_dir="profiles", trace_memory=False):
+        self.output_dir = output_dir
+        self.trace_memory = trace_memory
+        self.summary = {}
+        self.call_count = 0
+        self.current = None
+        self.in_bucket = False
+
+    def install(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        for cls, name, label in ACTIONS:
+            setattr(cls, name, self._wrap_action(getattr(cls, name), label))
+        for cls in (ItemDB, SkillDB, VideoDB):
+            for name, func in list(vars(cls).items()):
+                if callable(func) and not name.startswith("_"):
+                    setattr(cls, name, self._wrap_bucket(func, "db"))
+        for cls, names in TK_METHODS:
+            for name in names:
+                setattr(cls, name, self._wrap_bucket(getattr(cls, name), "tk"))
+        for name in WAIT_FUNCTIONS:
+            setattr(messagebox, name, self._wrap_bucket(getattr(messagebox, name), "wait"))
+        atexit.register(self.report)
+        logger.info(f"UI profiling enabled, writing profiles to {os.path.abspath(self.output_dir)}")
+
+    def _wrap_bucket(self, func, bucket):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Only the outermost call is timed, so nested DB/Tk calls are not counted twice
+            if self.current is None or self.in_bucket:
+                return func(*args, **kwargs)
+            self.in_bucket = True
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.current[bucket] += time.perf_counter() - start
+                self.in_bucket = False
+        return wrapper
+
+    def _wrap_action(self, func, label):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if self.current is not None:
+                # Nested action (e.g. sort_column -> update_results): part of the outer one
+                return func(*args, **kwargs)
+            return self._run_action(label, func, args, kwargs)
+        return wrapper
+
+    def _run_action(self, label, func, args, kwargs):
+        self.current = {"db": 0.0, "tk": 0.0, "wait": 0.0}
+        self.call_count += 1
+        profile = cProfile.Profile()
+        trace_memory = self.trace_memory and not tracemalloc.is_tracing()
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            result = func(*args, **kwargs)
+            # Flush pending geometry and redraws so rendering cost lands in this action
+            if tk._default_root is not None:
+                self.in_bucket = True
+                flush_start = time.perf_counter()
+                tk._default_root.update_idletasks()
+                self.current["tk"] += time.perf_counter() - flush_start
+                self.in_bucket = False
+            return result
+        finally:
+            profile.disable()
+            wall = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+            if trace_memory:
+                tracemalloc.stop()
+            buckets, self.current = self.current, None
+            profile.dump_stats(os.path.join(self.output_dir, f"{self.call_count:04d}-{label}.prof"))
+            self._record(label, wall, buckets, peak)
+
+    def _record(self, label, wall, buckets, peak):
+        wall -= buckets["wait"]
+        entry = self.summary.setdefault(label, {"calls": 0, "wall": 0.0, "max": 0.0, "db": 0.0, "tk": 0.0, "peak": 0})
+        entry["calls"] += 1
+        entry["wall"] += wall
+        entry["max"] = max(entry["max"], wall)
+        entry["db"] += buckets["db"]
+        entry["tk"] += buckets["tk"]
+        entry["peak"] = max(entry["peak"], peak)
+        logger.info(f"{label}: {wall * 1000:.1f} ms (db {buckets['db'] * 1000:.1f} ms, tk {buckets['tk'] * 1000:.1f} ms)")
+
+    def format_summary(self):
+        headers = ["action", "calls", "total ms", "mean ms", "max ms", "db %", "python %", "tk %", "peak KB"]
+        rows = []
+        for label, entry in sorted(self.summary.items(), key=lambda kv: -kv[1]["wall"]):
+            wall = entry["wall"] or 1e-9
+            python = max(wall - entry["db"] - entry["tk"], 0.0)
+            rows.append([
+                label, entry["calls"], f"{entry['wall'] * 1000:.1f}", f"{entry['wall'] * 1000 / entry['calls']:.1f}",
+                f"{entry['max'] * 1000:.1f}", f"{entry['db'] / wall:.0%}", f"{python / wall:.0%}",
+                f"{entry['tk'] / wall:.0%}", f"{entry['peak'] / 1024:.0f}" if entry["peak"] else "-",
+            ])
+        widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) if rows else len(h) for i, h in enumerate(headers)]
+        lines = ["  ".join(h.ljust(w) for h, w in zip(headers, widths))]
+        lines.append("  ".join("-" * w for w in widths))
+        lines.extend("  ".join(str(v).ljust(w) for v, w in zip(row, widths)) for row in rows)
+        return "\n".join(lines)
+
+    def report(self):
+        if not self.summary:
+            return
+        text = self.format_summary()
+        print(text)
+        with open(os.path.join(self.output_dir, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+def _env_flag(name):
+    return os.environ.get(name, "").lower() in ("1", "true", "yes", "on")
+
+def install(profile=False, trace_memory=False):
+    """Install the profiler when requested by flag or environment. Returns it, or None."""
+    trace_memory = trace_memory or _env_flag("BAZAAR_PROFILE_MEMORY")
+    if not (profile or trace_memory or _env_flag("BAZAAR_PROFILE")):
+        return None
+    profiler = ActionProfiler(os.environ.get("BAZAAR_PROFILE_DIR", "profiles"), trace_memory)
+    profiler.install()
+    return profiler
@@ -1,6 +1,7 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 from ui.filter_widgets import FilterWidgets
+from db.query_dsl import QuerySyntaxError
 
 class SearchPopup:
     def __init__(self, parent, title, query_func, get_rarities_func, get_types_func, get_heroes_func, entity_name, get_sizes_func=None, initial_selected_options=None):
@@ -10,7 +11,9 @@ class SearchPopup:
         self.query_func = query_func
         self.entity_name = entity_name
         self.selected_items = initial_selected_options or []
-        self.filter_widgets = FilterWidgets(self.popup, get_rarities_func, get_types_func, get_heroes_func, get_sizes_func)
+        self.filter_widgets = FilterWidgets(
+            self.popup, get_rarities_func, get_types_func, get_heroes_func, get_sizes_func, search_func=self.update_results
+        )
         self.get_sizes_func = get_sizes_func
         self.create_widgets()
 
@@ -81,45 +84,37 @@ class SearchPopup:
         ttk.Button(button_frame, text="Confirm", command=self.confirm_selection).grid(row=0, column=3, padx=5)
 
     def update_results(self):
+        filters = self.filter_widgets.get_filter_values()
+        try:
+            results = self.query_func(
+                name=filters["name"],
+                rarities=[filters["rarity"]] if filters["rarity"] else [],
+                types=filters["types"],
+                effect_keyword=filters["effect_keyword"],
+                heroes=[filters["hero"]] if filters["hero"] else [],
+                size=filters["size"],
+                sort_by="name",
+                sort_order="ASC",
+                query=filters["query"]
+            ) if self.get_sizes_func else self.query_func(
+                name=filters["name"],
+                rarities=[filters["rarity"]] if filters["rarity"] else [],
+                types=filters["types"],
+                effect_keyword=filters["effect_keyword"],
+                heroes=[filters["hero"]] if filters["hero"] else [],
+                sort_by="name",
+                sort_order="ASC",
+                query=filters["query"]
+            )
+        except QuerySyntaxError as e:
+            # Keep the previous results while the query is being fixed
+            messagebox.showerror("Query", str(e), parent=self.popup)
+            return
         for item in self.tree.get_children():
             self.tree.delete(item)
-        filters = self.filter_widgets.get_filter_values()
-        results = self.query_func(
-            name=filters["name"],
-            rarities=[filters["rarity"]] if filters["rarity"] else [],
-            types=filters["types"],
-            effect_keyword=filters["effect_keyword"],
-            heroes=[filters["hero"]] if filters["hero"] else [],
-            size=filters["size"],
-            sort_by="name",
-            sort_order="ASC"
-        ) if self.get_sizes_func else self.query_func(
-            name=filters["name"],
-            rarities=[filters["rarity"]] if filters["rarity"] else [],
-            types=filters["types"],
-            effect_keyword=filters["effect_keyword"],
-            heroes=[filters["hero"]] if filters["hero"] else [],
-            sort_by="name",
-            sort_order="ASC"
-        )
         self.current_results = results
         for result in results:
-            values = (
-                result["name"],
-                result["size"],
-                result["effects"],
-                result["rarities"],
-                ", ".join(result["types"]),
-                ", ".join(result["heroes"]),
-                result["enchantments"]
-            ) if self.filter_widgets.get_sizes_func else (
-                result["name"],
-                result["effects"],
-                result["rarities"],
-                ", ".join(result["types"]),
-                ", ".join(result["heroes"]),
-            )
-            self.tree.insert("", "end", values=values, tags=(result["id"],))
+            self.tree.insert("", "end", values=result.display_values(), tags=(result.id,))
 
     def add_selected(self):
         selected = self.tree.selection()
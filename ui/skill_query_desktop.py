@@ -1,5 +1,8 @@
+import argparse
 import tkinter as tk
 from tkinter import ttk
+from ui import profiling
+from ui.watchdog import start_watchdog
 from db.db_routine import DBRoutine
 from db.skills import SkillDB
 from db.items import ItemDB
@@ -7,6 +10,7 @@ from db.videos import VideoDB
 from ui.tabs.skills_tab import SkillsTab
 from ui.tabs.items_tab import ItemsTab
 from ui.tabs.videos_tab import VideoTab
+from ui.tabs.planner_tab import PlannerTab
 
 class SkillQueryApp:
     def __init__(self, root):
@@ -30,15 +34,35 @@ class SkillQueryApp:
         skills_frame = ttk.Frame(notebook)
         items_frame = ttk.Frame(notebook)
         videos_frame = ttk.Frame(notebook)
+        planner_frame = ttk.Frame(notebook)
         notebook.add(skills_frame, text="Skills")
         notebook.add(items_frame, text="Items")
         notebook.add(videos_frame, text="Videos")
+        notebook.add(planner_frame, text="Planner")
 
         self.skills_tab = SkillsTab(skills_frame, self.skill_db)
         self.items_tab = ItemsTab(items_frame, self.item_db)
         self.videos_tab = VideoTab(videos_frame, self.video_db, self.skill_db, self.item_db)
+        self.planner_tab = PlannerTab(planner_frame, self.item_db)
+
+        # Event-loop stall counter
+        self.stall_label = ttk.Label(self.root, text="Stalls: 0", anchor="e")
+        self.watchdog = start_watchdog(self.root, on_stall=self.update_stall_count)
+        if self.watchdog:
+            self.stall_label.grid(row=1, column=0, sticky="ew", padx=5)
+
+    def update_stall_count(self, count):
+        self.stall_label.config(text=f"Stalls: {count}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Skill, Item, and Video Query")
+    parser.add_argument("--profile", action="store_true", help="Profile UI actions (same as BAZAAR_PROFILE=1)")
+    parser.add_argument("--profile-memory", action="store_true", help="Also trace memory while profiling")
+    args = parser.parse_args()
+
+    # Must run before the tabs are built so their button commands bind to the wrappers
+    profiling.install(args.profile, args.profile_memory)
+
     root = tk.Tk()
     app = SkillQueryApp(root)
     root.mainloop()
\ No newline at end of file
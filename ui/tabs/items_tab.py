@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk
 import csv
 from ui.filter_widgets import FilterWidgets
+from db.query_dsl import QuerySyntaxError
 
 class ItemsTab:
     def __init__(self, parent, item_db):
@@ -14,7 +15,8 @@ class ItemsTab:
             self.item_db.get_rarities,
             self.item_db.get_types,
             self.item_db.get_heroes,
-            self.item_db.get_sizes
+            self.item_db.get_sizes,
+            search_func=self.update_results
         )
         self.create_widgets()
 
@@ -78,6 +80,11 @@ class ItemsTab:
         # Bind selection event
         self.tree.bind("<<TreeviewSelect>>", self.load_selected_enchantments)
 
+        # Right-click menu on a result row
+        self.context_menu = tk.Menu(self.tree, tearoff=0)
+        self.context_menu.add_command(label="Find similar items", command=self.show_similar_items)
+        self.tree.bind("<Button-3>", self.open_context_menu)
+
         # Initial results
         self.update_results()
 
@@ -89,51 +96,62 @@ class ItemsTab:
             self.enchantments_listbox.insert("end", "No item selected")
             return
 
-        # Get the selected item's enchantments
-        item = self.tree.item(selected[0])
-        enchantments = item["values"][6]  # enchantments column
-        if not enchantments:
+        # One row per enchantment name from the enchantment matrix (Treeview iid is the item id)
+        enchantments = self.item_db.get_item_enchantments(int(selected[0]))
+        if not any(text for _, text in enchantments):
             self.enchantments_listbox.insert("end", "No enchantments")
             return
 
-        # Split enchantments if it's a string
-        if isinstance(enchantments, str):
-            enchantment_list = [e.strip() for e in enchantments.split(",") if e.strip()]
-        else:
-            enchantment_list = enchantments
+        # Populate listbox; enchantments the item lacks are greyed out
+        for name, text in enchantments:
+            self.enchantments_listbox.insert("end", f"{name}: {text if text else '-'}")
+            if not text:
+                self.enchantments_listbox.itemconfig("end", foreground="gray")
 
-        # Populate listbox
-        if enchantment_list:
-            for enchantment in enchantment_list:
-                self.enchantments_listbox.insert("end", enchantment)
-        else:
-            self.enchantments_listbox.insert("end", "No enchantments")
+    def open_context_menu(self, event):
+        row = self.tree.identify_row(event.y)
+        if not row:
+            return
+        self.tree.selection_set(row)
+        self.context_menu.tk_popup(event.x_root, event.y_root)
+
+    def show_similar_items(self):
+        """Replace the results with the items most similar to the selected one, best match first."""
+        selected = self.tree.selection()
+        if not selected:
+            return
+        item_id = int(selected[0])
+        item = self.results_by_id.get(item_id)
+        similar = self.item_db.similar_items(item_id)
+        # The selected item stays on top so the list reads as "items like this one"
+        self.show_results(([item] if item else []) + [record for record, score in similar])
 
     def update_results(self):
+        filters = self.filter_widgets.get_filter_values()
+        try:
+            results = self.item_db.query_items(
+                name=filters["name"],
+                rarities=[filters["rarity"]] if filters["rarity"] else [],
+                types=filters["types"],
+                effect_keyword=filters["effect_keyword"],
+                heroes=[filters["hero"]] if filters["hero"] else [],
+                size=filters["size"],
+                sort_by=self.sort_by,
+                sort_order=self.sort_order,
+                query=filters["query"]
+            )
+        except QuerySyntaxError as e:
+            tk.messagebox.showerror("Query", str(e))
+            return
+        self.show_results(results)
+
+    def show_results(self, results):
         for item in self.tree.get_children():
             self.tree.delete(item)
-        filters = self.filter_widgets.get_filter_values()
-        results = self.item_db.query_items(
-            name=filters["name"],
-            rarities=[filters["rarity"]] if filters["rarity"] else [],
-            types=filters["types"],
-            effect_keyword=filters["effect_keyword"],
-            heroes=[filters["hero"]] if filters["hero"] else [],
-            size=filters["size"],
-            sort_by=self.sort_by,
-            sort_order=self.sort_order
-        )
         self.current_results = results
+        self.results_by_id = {result.id: result for result in results}
         for result in results:
-            self.tree.insert("", "end", values=(
-                result["name"],
-                result["size"],
-                result["effects"],
-                result["rarities"],
-                ", ".join(result["types"]),
-                ", ".join(result["heroes"]),
-                result["enchantments"]
-            ))
+            self.tree.insert("", "end", iid=str(result.id), values=result.display_values())
 
     def sort_column(self, column):
         if self.sort_by == column:
@@ -151,13 +169,5 @@ class ItemsTab:
             writer = csv.writer(f)
             writer.writerow(["Name", "Size", "Effects", "Rarities", "Types", "Heroes", "Enchantments"])
             for result in self.current_results:
-                writer.writerow([
-                    result["name"],
-                    result["size"],
-                    result["effects"],
-                    result["rarities"],
-                    ", ".join(result["types"]),
-                    ", ".join(result["heroes"]),
-                    result["enchantments"]
-                ])
+                writer.writerow(result.display_values())
         tk.messagebox.showinfo("Export", "Results exported to items_results.csv")
\ No newline at end of file
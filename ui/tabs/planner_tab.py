@@ -0,0 +1,111 @@
+import tkinter as tk
+from tkinter import ttk
+import time
+from db.planner import BuildPlanner
+from db.query_dsl import QuerySyntaxError
+from utils.config import BOARD_SLOTS
+
+MAX_LOADOUTS = 50
+
+class PlannerTab:
+    def __init__(self, parent, item_db):
+        self.parent = parent
+        self.item_db = item_db
+        self.planner = BuildPlanner(item_db)
+        self.types = self.item_db.get_types()
+        self.create_widgets()
+
+    def create_widgets(self):
+        main_frame = ttk.Frame(self.parent, padding="10")
+        main_frame.grid(row=0, column=0, sticky="nsew")
+        self.parent.columnconfigure(0, weight=1)
+        self.parent.rowconfigure(0, weight=1)
+
+        # Constraints frame
+        constraints_frame = ttk.LabelFrame(main_frame, text="Board", padding="5")
+        constraints_frame.grid(row=0, column=0, sticky="ew", pady=5)
+        constraints_frame.columnconfigure(1, weight=1)
+        constraints_frame.columnconfigure(3, weight=1)
+
+        ttk.Label(constraints_frame, text="Hero:").grid(row=0, column=0, padx=5, sticky="w")
+        self.hero_var = tk.StringVar()
+        ttk.Combobox(constraints_frame, textvariable=self.hero_var, values=self.item_db.get_heroes(), state="readonly").grid(row=0, column=1, padx=5, sticky="ew")
+
+        ttk.Label(constraints_frame, text="Slots:").grid(row=1, column=0, padx=5, sticky="w")
+        self.slots_var = tk.IntVar(value=BOARD_SLOTS)
+        ttk.Spinbox(constraints_frame, from_=1, to=BOARD_SLOTS, textvariable=self.slots_var, width=5).grid(row=1, column=1, padx=5, sticky="w")
+
+        ttk.Label(constraints_frame, text="Loadouts:").grid(row=2, column=0, padx=5, sticky="w")
+        self.k_var = tk.IntVar(value=5)
+        ttk.Spinbox(constraints_frame, from_=1, to=MAX_LOADOUTS, textvariable=self.k_var, width=5).grid(row=2, column=1, padx=5, sticky="w")
+
+        # Text query narrowing the candidate items, e.g. -size:Large rarity>=Gold
+        ttk.Label(constraints_frame, text="Query:").grid(row=3, column=0, padx=5, sticky="w")
+        self.query_var = tk.StringVar()
+        query_entry = ttk.Entry(constraints_frame, textvariable=self.query_var)
+        query_entry.grid(row=3, column=1, columnspan=5, padx=5, sticky="ew")
+        query_entry.bind("<Return>", lambda event: self.update_results())
+
+        # Every required type must be on the board; desired types add to an item's score
+        ttk.Label(constraints_frame, text="Required types:").grid(row=0, column=2, padx=5, sticky="nw")
+        self.required_listbox = tk.Listbox(constraints_frame, selectmode="multiple", height=6, exportselection=0)
+        self.required_listbox.grid(row=0, column=3, rowspan=3, padx=5, sticky="ew")
+        ttk.Label(constraints_frame, text="Desired types:").grid(row=0, column=4, padx=5, sticky="nw")
+        self.desired_listbox = tk.Listbox(constraints_frame, selectmode="multiple", height=6, exportselection=0)
+        self.desired_listbox.grid(row=0, column=5, rowspan=3, padx=5, sticky="ew")
+        for type_name in self.types:
+            self.required_listbox.insert("end", type_name)
+            self.desired_listbox.insert("end", type_name)
+
+        ttk.Button(main_frame, text="Plan", command=self.update_results).grid(row=1, column=0, pady=5)
+
+        # Treeview
+        columns = ("score", "slots", "items")
+        self.tree = ttk.Treeview(main_frame, columns=columns, show="headings")
+        self.tree.heading("score", text="Score")
+        self.tree.heading("slots", text="Slots")
+        self.tree.heading("items", text="Items")
+        self.tree.column("score", width=60)
+        self.tree.column("slots", width=50)
+        self.tree.column("items", width=700)
+        self.tree.grid(row=2, column=0, sticky="nsew")
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(2, weight=1)
+
+        scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=self.tree.yview)
+        scrollbar.grid(row=2, column=1, sticky="ns")
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        self.status_label = ttk.Label(main_frame, text="")
+        self.status_label.grid(row=3, column=0, sticky="w")
+
+    def update_results(self):
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        try:
+            slots = min(max(int(self.slots_var.get()), 1), BOARD_SLOTS)
+            k = min(max(int(self.k_var.get()), 1), MAX_LOADOUTS)
+        except (tk.TclError, ValueError):
+            self.status_label.config(text="Slots and loadouts must be whole numbers.")
+            return
+        start = time.perf_counter()
+        try:
+            loadouts = self.planner.plan(
+                hero=self.hero_var.get(),
+                slots=slots,
+                required_types=[self.types[i] for i in self.required_listbox.curselection()],
+                desired_types=[self.types[i] for i in self.desired_listbox.curselection()],
+                k=k,
+                query=self.query_var.get().strip()
+            )
+        except QuerySyntaxError as e:
+            self.status_label.config(text=str(e))
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for score, used, items in loadouts:
+            names = ", ".join(f"{item.name} ({item.size})" for item in items)
+            self.tree.insert("", "end", values=(f"{score:g}", f"{used}/{slots}", names))
+        if loadouts:
+            self.status_label.config(text=f"{len(loadouts)} loadouts in {elapsed_ms:.0f} ms")
+        else:
+            self.status_label.config(text="No loadout fits the board with every required type.")
@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import ttk
 import csv
 from ui.filter_widgets import FilterWidgets
+from db.query_dsl import QuerySyntaxError
 
 class SkillsTab:
     def __init__(self, parent, skill_db):
@@ -13,7 +14,8 @@ class SkillsTab:
             self.parent,
             self.skill_db.get_rarities,
             self.skill_db.get_types,
-            self.skill_db.get_heroes
+            self.skill_db.get_heroes,
+            search_func=self.update_results
         )
         self.create_widgets()
 
@@ -47,28 +49,54 @@ class SkillsTab:
         scrollbar.grid(row=3, column=1, sticky="ns")
         self.tree.configure(yscrollcommand=scrollbar.set)
 
+        # Right-click menu on a result row
+        self.context_menu = tk.Menu(self.tree, tearoff=0)
+        self.context_menu.add_command(label="Find similar skills", command=self.show_similar_skills)
+        self.tree.bind("<Button-3>", self.open_context_menu)
+
+    def open_context_menu(self, event):
+        row = self.tree.identify_row(event.y)
+        if not row:
+            return
+        self.tree.selection_set(row)
+        self.context_menu.tk_popup(event.x_root, event.y_root)
+
+    def show_similar_skills(self):
+        """Replace the results with the skills most similar to the selected one, best match first."""
+        selected = self.tree.selection()
+        if not selected:
+            return
+        skill_id = int(selected[0])
+        skill = next((result for result in self.current_results if result.id == skill_id), None)
+        similar = self.skill_db.similar_skills(skill_id)
+        # The selected skill stays on top so the list reads as "skills like this one"
+        self.show_results(([skill] if skill else []) + [record for record, score in similar])
+
     def update_results(self):
+        filters = self.filter_widgets.get_filter_values()
+        try:
+            results = self.skill_db.query_skills(
+                name=filters["name"],
+                rarities=[filters["rarity"]] if filters["rarity"] else [],
+                types=filters["types"],
+                effect_keyword=filters["effect_keyword"],
+                heroes=[filters["hero"]] if filters["hero"] else [],
+                sort_by=self.sort_by,
+                sort_order=self.sort_order,
+                query=filters["query"]
+            )
+        except QuerySyntaxError as e:
+            tk.messagebox.showerror("Query", str(e))
+            return
+        self.show_results(results)
+
+    def show_results(self, results):
         for item in self.tree.get_children():
             self.tree.delete(item)
-        filters = self.filter_widgets.get_filter_values()
-        results = self.skill_db.query_skills(
-            name=filters["name"],
-            rarities=[filters["rarity"]] if filters["rarity"] else [],
-            types=filters["types"],
-            effect_keyword=filters["effect_keyword"],
-            heroes=[filters["hero"]] if filters["hero"] else [],
-            sort_by=self.sort_by,
-            sort_order=self.sort_order
-        )
         self.current_results = results
+        # Treeview iid is the skill id
         for result in results:
-            self.tree.insert("", "end", values=(
-                result["name"],
-                result["effects"],
-                result["rarities"],
-                ", ".join(result["types"]),
-                ", ".join(result["heroes"])
-            ))
+            self.tree.insert("", "end", iid=str(result.id), values=result.display_values())
 
     def sort_column(self, column):
         if self.sort_by == column:
@@ -86,11 +114,5 @@ class SkillsTab:
             writer = csv.writer(f)
             writer.writerow(["Name", "Effects", "Rarities", "Types", "Heroes"])
             for result in self.current_results:
-                writer.writerow([
-                    result["name"],
-                    result["effects"],
-                    result["rarities"],
-                    ", ".join(result["types"]),
-                    ", ".join(result["heroes"])
-                ])
+                writer.writerow(result.display_values())
         tk.messagebox.showinfo("Export", "Results exported to skills_results.csv")
\ No newline at end of file
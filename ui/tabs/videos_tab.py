@@ -1,10 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime
+from datetime import datetime, timedelta
 from tkcalendar import DateEntry
 from ui.search_popup import SearchPopup
+from db.query_dsl import QuerySyntaxError
 import re
 
+VIDEO_STATUSES = ["Draft", "Uploaded", "Published"]
+# Days of history the tab shows by default
+DEFAULT_DAYS = 30
+
 class VideoTab:
     def __init__(self, parent, video_db, skill_db, item_db):
         self.parent = parent
@@ -31,36 +36,71 @@ class VideoTab:
         filter_frame.grid(row=0, column=0, sticky="ew", pady=5)
         filter_frame.columnconfigure(1, weight=1)
 
-        ttk.Label(filter_frame, text="Type:").grid(row=0, column=0, padx=5, sticky="w")
-        self.type_var = tk.StringVar()
-        ttk.Combobox(filter_frame, textvariable=self.type_var, values=["", "Short", "Long"], state="readonly").grid(row=0, column=1, padx=5, sticky="ew")
-
-        ttk.Label(filter_frame, text="Status:").grid(row=1, column=0, padx=5, sticky="w")
-        self.status_var = tk.StringVar()
-        ttk.Combobox(filter_frame, textvariable=self.status_var, values=["", "Draft", "Uploaded", "Published"], state="readonly").grid(row=1, column=1, padx=5, sticky="ew")
+        ttk.Label(filter_frame, text="Search:").grid(row=0, column=0, padx=5, sticky="w")
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(filter_frame, textvariable=self.search_var)
+        search_entry.grid(row=0, column=1, padx=5, sticky="ew")
+        search_entry.bind("<Return>", lambda event: self.search())
 
-        ttk.Label(filter_frame, text="Skill:").grid(row=2, column=0, padx=5, sticky="w")
+        ttk.Label(filter_frame, text="Type:").grid(row=1, column=0, padx=5, sticky="w")
+        self.type_var = tk.StringVar()
+        ttk.Combobox(filter_frame, textvariable=self.type_var, values=["", "Short", "Long"], state="readonly").grid(row=1, column=1, padx=5, sticky="ew")
+
+        ttk.Label(filter_frame, text="Status:").grid(row=2, column=0, padx=5, sticky="nw")
+        self.status_filter_listbox = tk.Listbox(filter_frame, selectmode="multiple", height=3, exportselection=0)
+        self.status_filter_listbox.grid(row=2, column=1, padx=5, sticky="ew")
+        for status in VIDEO_STATUSES:
+            self.status_filter_listbox.insert("end", status)
+
+        # Date range; defaults to the last month so the full history is not loaded on start
+        ttk.Label(filter_frame, text="From:").grid(row=3, column=0, padx=5, sticky="w")
+        date_frame = ttk.Frame(filter_frame)
+        date_frame.grid(row=3, column=1, padx=5, sticky="w")
+        self.date_from_var = tk.StringVar(value=(datetime.now() - timedelta(days=DEFAULT_DAYS)).strftime("%Y-%m-%d"))
+        ttk.Entry(date_frame, textvariable=self.date_from_var, width=12).grid(row=0, column=0)
+        ttk.Label(date_frame, text="To:").grid(row=0, column=1, padx=5)
+        self.date_to_var = tk.StringVar()
+        ttk.Entry(date_frame, textvariable=self.date_to_var, width=12).grid(row=0, column=2)
+
+        ttk.Label(filter_frame, text="Title starts with:").grid(row=4, column=0, padx=5, sticky="w")
+        self.title_prefix_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.title_prefix_var).grid(row=4, column=1, padx=5, sticky="ew")
+
+        ttk.Label(filter_frame, text="Skill:").grid(row=5, column=0, padx=5, sticky="w")
         self.skill_filter_var = tk.StringVar()
         self.skill_filter_entry = ttk.Entry(filter_frame, textvariable=self.skill_filter_var, state="readonly")
-        self.skill_filter_entry.grid(row=2, column=1, padx=5, sticky="ew")
-        ttk.Button(filter_frame, text="Advanced Search", command=self.open_skill_search).grid(row=2, column=2, padx=5)
+        self.skill_filter_entry.grid(row=5, column=1, padx=5, sticky="ew")
+        ttk.Button(filter_frame, text="Advanced Search", command=self.open_skill_search).grid(row=5, column=2, padx=5)
+        self.skill_match_all_var = tk.BooleanVar()
+        ttk.Checkbutton(filter_frame, text="Match all", variable=self.skill_match_all_var).grid(row=5, column=3, padx=5)
 
-        ttk.Label(filter_frame, text="Item:").grid(row=3, column=0, padx=5, sticky="w")
+        ttk.Label(filter_frame, text="Item:").grid(row=6, column=0, padx=5, sticky="w")
         self.item_filter_var = tk.StringVar()
         self.item_filter_entry = ttk.Entry(filter_frame, textvariable=self.item_filter_var, state="readonly")
-        self.item_filter_entry.grid(row=3, column=1, padx=5, sticky="ew")
-        ttk.Button(filter_frame, text="Advanced Search", command=self.open_item_search).grid(row=3, column=2, padx=5)
+        self.item_filter_entry.grid(row=6, column=1, padx=5, sticky="ew")
+        ttk.Button(filter_frame, text="Advanced Search", command=self.open_item_search).grid(row=6, column=2, padx=5)
+        self.item_match_all_var = tk.BooleanVar()
+        ttk.Checkbutton(filter_frame, text="Match all", variable=self.item_match_all_var).grid(row=6, column=3, padx=5)
 
-        ttk.Label(filter_frame, text="Heroes:").grid(row=4, column=0, padx=5, sticky="nw")
+        ttk.Label(filter_frame, text="Heroes:").grid(row=7, column=0, padx=5, sticky="nw")
         self.heroes_filter_listbox = tk.Listbox(filter_frame, selectmode="multiple", height=5, exportselection=0)
-        self.heroes_filter_listbox.grid(row=4, column=1, padx=5, sticky="ew")
+        self.heroes_filter_listbox.grid(row=7, column=1, padx=5, sticky="ew")
         for hero in self.heroes:
             self.heroes_filter_listbox.insert("end", hero)
         heroes_scrollbar = ttk.Scrollbar(filter_frame, orient="vertical", command=self.heroes_filter_listbox.yview)
-        heroes_scrollbar.grid(row=4, column=2, sticky="ns")
+        heroes_scrollbar.grid(row=7, column=2, sticky="ns")
         self.heroes_filter_listbox.configure(yscrollcommand=heroes_scrollbar.set)
+        self.hero_match_all_var = tk.BooleanVar()
+        ttk.Checkbutton(filter_frame, text="Match all", variable=self.hero_match_all_var).grid(row=7, column=3, padx=5, sticky="n")
+
+        # Text query, combined with the filters above, e.g. hero:Mak -status:Draft date>=2026-01-01
+        ttk.Label(filter_frame, text="Query:").grid(row=8, column=0, padx=5, sticky="w")
+        self.query_var = tk.StringVar()
+        query_entry = ttk.Entry(filter_frame, textvariable=self.query_var)
+        query_entry.grid(row=8, column=1, padx=5, sticky="ew")
+        query_entry.bind("<Return>", lambda event: self.search())
 
-        ttk.Button(filter_frame, text="Search", command=self.update_results).grid(row=5, column=0, columnspan=3, pady=5)
+        ttk.Button(filter_frame, text="Search", command=self.search).grid(row=9, column=0, columnspan=4, pady=5)
 
         # Input frame
         input_frame = ttk.LabelFrame(main_frame, text="Add/Edit Video", padding="5")
@@ -82,7 +122,7 @@ class VideoTab:
 
         ttk.Label(input_frame, text="Status:").grid(row=3, column=0, padx=5, sticky="w")
         self.input_status_var = tk.StringVar()
-        ttk.Combobox(input_frame, textvariable=self.input_status_var, values=["Draft", "Uploaded", "Published"], state="readonly").grid(row=3, column=1, padx=5, sticky="ew")
+        ttk.Combobox(input_frame, textvariable=self.input_status_var, values=VIDEO_STATUSES, state="readonly").grid(row=3, column=1, padx=5, sticky="ew")
 
         ttk.Label(input_frame, text="Description:").grid(row=4, column=0, padx=5, sticky="w")
         self.description_var = tk.StringVar()
@@ -231,31 +271,49 @@ class VideoTab:
         self.items_var.set(", ".join(name for _, name in self.selected_items))
 
     def update_results(self):
+        date_from = self.date_from_var.get().strip()
+        date_to = self.date_to_var.get().strip()
+        for date in (date_from, date_to):
+            if date:
+                try:
+                    datetime.strptime(date, "%Y-%m-%d")
+                except ValueError:
+                    messagebox.showerror("Error", "Date must be in YYYY-MM-DD format.")
+                    return
+        selected_heroes = [self.heroes[i] for i in self.heroes_filter_listbox.curselection()]
+        try:
+            videos = self.video_db.get_videos(
+                video_type=self.type_var.get(),
+                status=[VIDEO_STATUSES[i] for i in self.status_filter_listbox.curselection()],
+                date_from=date_from,
+                date_to=date_to,
+                title_prefix=self.title_prefix_var.get().strip(),
+                skill_ids=self.skill_filter_ids if self.skill_filter_ids else None,
+                item_ids=self.item_filter_ids if self.item_filter_ids else None,
+                heroes=selected_heroes,
+                skill_match="all" if self.skill_match_all_var.get() else "any",
+                item_match="all" if self.item_match_all_var.get() else "any",
+                hero_match="all" if self.hero_match_all_var.get() else "any",
+                search=self.search_var.get(),
+                query=self.query_var.get().strip(),
+                sort_by=self.sort_by,
+                sort_order=self.sort_order
+            )
+        except QuerySyntaxError as e:
+            messagebox.showerror("Query", str(e))
+            return
         for item in self.tree.get_children():
             self.tree.delete(item)
-        selected_heroes = [self.heroes[i] for i in self.heroes_filter_listbox.curselection()]
-        videos = self.video_db.get_videos(
-            video_type=self.type_var.get(),
-            status=self.status_var.get(),
-            skill_ids=self.skill_filter_ids if self.skill_filter_ids else None,
-            item_ids=self.item_filter_ids if self.item_filter_ids else None,
-            hero_name=selected_heroes[0] if len(selected_heroes) != 0 else None,
-            sort_by=self.sort_by,
-            sort_order=self.sort_order
-        )
         for video in videos:
-            self.tree.insert("", "end", values=(
-                video["title"],
-                video["type"],
-                video["date"],
-                video["status"],
-                video["skills"],
-                video["items"],
-                video["heroes"],
-                video["description"],
-                video["local_path"],
-                video["url"]
-            ))
+            self.tree.insert("", "end", iid=video.id, values=video.display_values())
+
+    def search(self):
+        # A new text search lists the best matches first until a column header is clicked
+        if self.search_var.get().strip():
+            self.sort_by, self.sort_order = "relevance", "ASC"
+        elif self.sort_by == "relevance":
+            self.sort_by, self.sort_order = "date", "DESC"
+        self.update_results()
 
     def sort_column(self, column):
         if self.sort_by == column:
@@ -302,9 +360,8 @@ class VideoTab:
         selected = self.tree.selection()
         if not selected:
             return
-        item = self.tree.item(selected[0])
-        values = item["values"]
-        title = values[0]
+        video_id = int(selected[0])
+        values = self.tree.item(selected[0])["values"]
 
         self.title_var.set(values[0])
         self.input_type_var.set(values[1])
@@ -315,7 +372,7 @@ class VideoTab:
         self.url_var.set(values[9])
 
         # Fetch associations from VideoDB
-        selected_skill_ids, selected_item_ids, selected_hero_names = self.video_db.get_video_associations(title)
+        selected_skill_ids, selected_item_ids, selected_hero_names = self.video_db.get_video_associations(video_id)
 
         # Update selected skills and items
         self.selected_skills = [
@@ -339,9 +396,7 @@ class VideoTab:
         if not selected:
             messagebox.showerror("Error", "Please select a video to update.")
             return
-        video_id = self.tree.item(selected[0])["values"][0]
-        videos = self.video_db.get_videos()
-        video_id = next(v["id"] for v in videos if v["title"] == video_id)
+        video_id = int(selected[0])
         title = self.title_var.get().strip()
         video_type = self.input_type_var.get()
         date = self.date_entry.get()
@@ -373,9 +428,7 @@ class VideoTab:
             messagebox.showerror("Error", "Please select a video to delete.")
             return
         if messagebox.askyesno("Confirm", "Are you sure you want to delete the selected video?"):
-            video_id = self.tree.item(selected[0])["values"][0]
-            videos = self.video_db.get_videos()
-            video_id = next(v["id"] for v in videos if v["title"] == str(video_id))
+            video_id = int(selected[0])
             self.video_db.delete_video(video_id)
             self.update_results()
             self.clear_inputs()
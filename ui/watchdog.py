@@ -0,0 +1,143 @@
+"""Tk event-loop lag watchdog.
+
+The main thread schedules a root.after tick every interval. A side thread
+watches the time since the last tick; once it passes the threshold it samples
+the main thread's stack with sys._current_frames until the loop recovers, then
+writes a stall report with the hottest stacks to a rotating log. While the
+loop stays blocked, an interim report is written every few seconds, so a hard
+freeze or a hung app that gets killed still leaves its stacks in the log.
+
+Set BAZAAR_WATCHDOG=0 to disable, BAZAAR_STALL_MS to change the threshold and
+BAZAAR_STALL_LOG to change the log file.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from logging.handlers import RotatingFileHandler
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Distinct stacks kept per stall; later new stacks are not counted
+MAX_STACKS = 100
+
+def _stall_logger(log_path):
+    logger = logging.getLogger("bazaar.stalls")
+    if not logger.handlers:
+        handler = RotatingFileHandler(log_path, maxBytes=1024 * 1024, backupCount=3, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.WARNING)
+        # Keep stall reports out of the console log
+        logger.propagate = False
+    return logger
+
+class EventLoopWatchdog:
+    def __init__(self, root, interval_ms=100, threshold_ms=250, sample_ms=20, report_ms=2000, log_path="stalls.log", on_stall=None):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.threshold = threshold_ms / 1000
+        self.sample_interval = sample_ms / 1000
+        self.report_interval = report_ms / 1000
+        self.on_stall = on_stall
+        self.logger = _stall_logger(log_path)
+        self.stall_count = 0
+        self.max_lag_ms = 0.0
+        self.main_thread_id = threading.get_ident()
+        self.last_tick = time.perf_counter()
+        self.reported_count = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._monitor, name="event-loop-watchdog", daemon=True)
+
+    def start(self):
+        self.last_tick = time.perf_counter()
+        self.root.after(self.interval_ms, self._tick)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _tick(self):
+        now = time.perf_counter()
+        # How late this tick ran compared to when it was due
+        lag_ms = (now - self.last_tick) * 1000 - self.interval_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        self.last_tick = now
+        if self.on_stall and self.stall_count != self.reported_count:
+            self.reported_count = self.stall_count
+            self.on_stall(self.stall_count)
+        if not self.stop_event.is_set():
+            self.root.after(self.interval_ms, self._tick)
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return None
+        return tuple((f.filename, f.lineno, f.name) for f in traceback.extract_stack(frame))
+
+    def _monitor(self):
+        while not self.stop_event.wait(self.sample_interval):
+            stall_tick = self.last_tick
+            if time.perf_counter() - stall_tick < self.threshold:
+                continue
+            self.stall_count += 1
+            samples = Counter()
+            next_report = time.perf_counter() + self.report_interval
+            while self.last_tick == stall_tick and not self.stop_event.is_set():
+                stack = self._sample()
+                if stack and (stack in samples or len(samples) < MAX_STACKS):
+                    samples[stack] += 1
+                now = time.perf_counter()
+                if now >= next_report:
+                    # The loop may never recover (or the app gets killed): log what is known so far
+                    self._report(self._lag_ms(stall_tick, now), samples, "still blocked after")
+                    next_report = now + self.report_interval
+                time.sleep(self.sample_interval)
+            last_tick = self.last_tick
+            if last_tick == stall_tick:
+                # stop() ended the watch before the loop recovered
+                self._report(self._lag_ms(stall_tick, time.perf_counter()), samples, "stopped while blocked, for at least")
+            else:
+                self._report(self._lag_ms(stall_tick, last_tick), samples, "blocked for")
+
+    def _lag_ms(self, stall_tick, end):
+        return max(0.0, (end - stall_tick) * 1000 - self.interval_ms)
+
+    def _report(self, duration_ms, samples, state):
+        total = sum(samples.values())
+        lines = [f"Stall #{self.stall_count}: event loop {state} {duration_ms:.0f} ms ({total} samples)"]
+        for stack, count in samples.most_common(3):
+            lines.append(f"  {count}/{total} samples, blocked in {_blocking_frame(stack)}:")
+            lines.extend(f"    {_format_frame(frame)}" for frame in stack[-12:])
+        self.logger.warning("\n".join(lines))
+
+def _format_frame(frame):
+    filename, lineno, name = frame
+    if filename.startswith(PROJECT_ROOT):
+        filename = os.path.relpath(filename, PROJECT_ROOT)
+    return f"{filename}:{lineno} {name}"
+
+def _blocking_frame(stack):
+    """Innermost frame of the app itself, plus the library frame it was waiting on if different."""
+    app_frames = [frame for frame in stack if frame[0].startswith(PROJECT_ROOT) and not frame[0].endswith("watchdog.py")]
+    innermost = stack[-1]
+    if not app_frames:
+        return _format_frame(innermost)
+    if app_frames[-1] == innermost:
+        return _format_frame(innermost)
+    return f"{_format_frame(app_frames[-1])} -> {innermost[2]}"
+
+def start_watchdog(root, on_stall=None):
+    """Start the watchdog unless BAZAAR_WATCHDOG=0. Returns it, or None."""
+    if os.environ.get("BAZAAR_WATCHDOG", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    watchdog = EventLoopWatchdog(
+        root,
+        threshold_ms=int(os.environ.get("BAZAAR_STALL_MS", "250")),
+        log_path=os.environ.get("BAZAAR_STALL_LOG", "stalls.log"),
+        on_stall=on_stall,
+    )
+    watchdog.start()
+    return watchdog
@@ -1,4 +1,10 @@
 # Configuration constants
 RARITY_ORDER = ["Bronze", "Silver", "Gold", "Diamond", "Legendary"]
 SIZE_ORDER = ["Small", "Medium", "Large"]
+# Board slots taken by each item size, and the slots on a board
+SIZE_SLOTS = {"Small": 1, "Medium": 2, "Large": 3}
+BOARD_SLOTS = 10
+# Item enchantments; an item without a row for one of these does not have it
+ENCHANTMENT_NAMES = ["Heavy", "Icy", "Turbo", "Shielded", "Restorative", "Toxic",
+                     "Fiery", "Shiny", "Deadly", "Radiant", "Obsidian", "Golden"]
 DATABASE_PATH = "bazaar.db"
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""Extract numeric stat values from effect texts.
+
+An effect lists one value, or one value per rarity tier separated by "»" starting at the
+owner's lowest rarity: "Deal 10 » 20 » 40 Damage" on a Silver-to-Diamond item is 10 damage
+at Silver, 20 at Gold and 40 at Diamond. Each number group is attributed to a stat keyword:
+the keyword right before it ("Heal 15", "Crit Chance 50%"), else right after it ("Deal 10
+Damage", "+1 Multicast"), else the nearest one in the same clause ("Haste an item for 2
+second(s)"). Groups with no keyword in their clause are skipped.
+"""
+import re
+
+# Longest first so "crit chance" wins over a shorter keyword inside it
+STAT_KEYWORDS = [
+    "crit chance", "max health", "lifesteal", "multicast", "cooldown", "damage", "shield",
+    "poison", "freeze", "charge", "regen", "haste", "value", "burn", "heal", "slow", "ammo",
+    "gold", "xp",
+]
+
+NUMBER = r"\d+(?:\.\d+)?"
+VALUE_GROUP_PATTERN = re.compile(rf"\+?({NUMBER})%?(?:\s*»\s*\+?{NUMBER}%?)*")
+NUMBER_PATTERN = re.compile(NUMBER)
+KEYWORD_PATTERN = re.compile(r"\b(" + "|".join(re.escape(k) for k in STAT_KEYWORDS) + r")\b")
+CLAUSE_BREAK_PATTERN = re.compile(r"[,.;]")
+
+def parse_effect_values(text):
+    """Return (stat, tier, value, per_rarity) tuples for every value in text.
+
+    tier is the 0-based position in a "»" list; per_rarity is 1 for such lists and 0 for a
+    single value, which applies at every rarity (with tier 0). A stat found twice in one
+    text keeps its first values.
+    """
+    lowered = text.lower()
+    keywords = [(match.start(), match.end(), match.group(1)) for match in KEYWORD_PATTERN.finditer(lowered)]
+    groups = list(VALUE_GROUP_PATTERN.finditer(lowered))
+    values, seen = [], set()
+    for position, group in enumerate(groups):
+        # The clause around the group: bounded by the neighbouring groups and punctuation
+        clause_start = groups[position - 1].end() if position else 0
+        clause_end = groups[position + 1].start() if position + 1 < len(groups) else len(lowered)
+        for match in CLAUSE_BREAK_PATTERN.finditer(lowered, clause_start, group.start()):
+            clause_start = match.end()
+        match = CLAUSE_BREAK_PATTERN.search(lowered, group.end(), clause_end)
+        if match:
+            clause_end = match.start()
+        before = [k for k in keywords if clause_start <= k[0] and k[1] <= group.start()]
+        after = [k for k in keywords if group.end() <= k[0] and k[1] <= clause_end]
+        if before and not lowered[before[-1][1]:group.start()].strip(" :+"):
+            stat = before[-1][2]
+        elif after and not lowered[group.end():after[0][0]].strip():
+            stat = after[0][2]
+        elif before or after:
+            stat = before[-1][2] if before else after[0][2]
+        else:
+            continue
+        if stat in seen:
+            continue
+        seen.add(stat)
+        numbers = [float(number) for number in NUMBER_PATTERN.findall(group.group(0))]
+        per_rarity = 1 if len(numbers) > 1 else 0
+        values.extend((stat, tier, value, per_rarity) for tier, value in enumerate(numbers))
+    return values
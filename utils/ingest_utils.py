@@ -0,0 +1,290 @@
+import logging
+import random
+from utils.config import RARITY_ORDER
+from utils.effect_values import parse_effect_values
+
+# Child tables that reference items/skills, as (table, foreign key column)
+ITEM_CHILD_TABLES = [
+    ("item_heroes", "item_id"),
+    ("item_types", "item_id"),
+    ("item_rarities", "item_id"),
+    ("item_effects", "item_id"),
+    ("enchantments", "item_id"),
+    ("video_items", "item_id"),
+]
+
+SKILL_CHILD_TABLES = [
+    ("skill_heroes", "skill_id"),
+    ("skill_types", "skill_id"),
+    ("skill_rarities", "skill_id"),
+    ("skill_effects", "skill_id"),
+    ("video_skills", "skill_id"),
+]
+
+# Indexes as (name, table, columns), mirrored in db/models.py. The derived columns serve
+# the rarity and type sorts and the neutral-item test; on the child tables (entity_id, value) serves the per-row aggregates and
+# (value, entity_id) the filters.
+ITEM_INDEXES = [
+    ("idx_item_min_rarity_rank", "items", ("min_rarity_rank",)),
+    ("idx_item_is_neutral", "items", ("is_neutral",)),
+    ("idx_item_type_sort_key", "items", ("type_sort_key",)),
+    ("idx_item_rarities_item", "item_rarities", ("item_id", "rarity_id")),
+    ("idx_item_rarity", "item_rarities", ("rarity_id", "item_id")),
+    ("idx_item_types_item", "item_types", ("item_id", "type_id")),
+    ("idx_item_type", "item_types", ("type_id", "item_id")),
+    ("idx_item_heroes_item", "item_heroes", ("item_id", "hero_id")),
+    ("idx_item_hero", "item_heroes", ("hero_id", "item_id")),
+    ("idx_item_effects_item", "item_effects", ("item_id", "effect_id")),
+    ("idx_item_effect", "item_effects", ("effect_id", "item_id")),
+]
+
+SKILL_INDEXES = [
+    ("idx_skill_min_rarity_rank", "skills", ("min_rarity_rank",)),
+    ("idx_skill_type_sort_key", "skills", ("type_sort_key",)),
+    ("idx_skill_rarities_skill", "skill_rarities", ("skill_id", "rarity_id")),
+    ("idx_skill_rarity", "skill_rarities", ("rarity_id", "skill_id")),
+    ("idx_skill_types_skill", "skill_types", ("skill_id", "type_id")),
+    ("idx_skill_type", "skill_types", ("type_id", "skill_id")),
+    ("idx_skill_heroes_skill", "skill_heroes", ("skill_id", "hero_id")),
+    ("idx_skill_hero", "skill_heroes", ("hero_id", "skill_id")),
+    ("idx_skill_effects_skill", "skill_effects", ("skill_id", "effect_id")),
+    ("idx_skill_effect", "skill_effects", ("effect_id", "skill_id")),
+]
+
+# Range scans over one stat's parsed values
+EFFECT_VALUE_INDEXES = [
+    ("idx_effect_value_stat", "effect_values", ("stat", "value", "per_rarity")),
+]
+
+def create_indexes(cursor, indexes):
+    """Create the given (name, table, columns) indexes if missing."""
+    for name, table, columns in indexes:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+
+def create_dimension_tables(cursor):
+    """Create the heroes, types, rarities, effect_texts and effect_values tables and seed rarities from RARITY_ORDER.
+
+    Child tables store the integer id of a dimension row instead of its name;
+    effect and enchantment rows store the id of their (deduplicated) text.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS heroes (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS types (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rarities (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            rank INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS effect_texts (
+            id INTEGER PRIMARY KEY,
+            text TEXT NOT NULL UNIQUE
+        )
+    """)
+    # Mirrored by db.models.EffectValue; filled by refresh_effect_values
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS effect_values (
+            effect_id INTEGER NOT NULL,
+            stat TEXT NOT NULL,
+            tier INTEGER NOT NULL,
+            value REAL NOT NULL,
+            per_rarity INTEGER NOT NULL,
+            PRIMARY KEY (effect_id, stat, tier),
+            FOREIGN KEY (effect_id) REFERENCES effect_texts(id)
+        ) WITHOUT ROWID
+    """)
+    create_indexes(cursor, EFFECT_VALUE_INDEXES)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO rarities (id, name, rank) VALUES (?, ?, ?)",
+        [(rank, name, rank) for rank, name in enumerate(RARITY_ORDER, start=1)]
+    )
+
+class DimensionIds:
+    """In-memory name -> id map over a dimension table.
+
+    Loaded once per ingest run; names not in the table yet are inserted on first
+    lookup. Call reload() after a rollback, which may have undone such inserts.
+    """
+    def __init__(self, cursor, table, column="name"):
+        self.cursor = cursor
+        self.table = table
+        self.column = column
+        self.reload()
+
+    def reload(self):
+        self.cursor.execute(f"SELECT {self.column}, id FROM {self.table}")
+        self.ids = dict(self.cursor.fetchall())
+
+    def __getitem__(self, name):
+        dimension_id = self.ids.get(name)
+        if dimension_id is None:
+            if self.table == "rarities":
+                # Unknown rarities rank after the known ones
+                self.cursor.execute(
+                    "INSERT INTO rarities (name, rank) VALUES (?, (SELECT COALESCE(MAX(rank), 0) + 1 FROM rarities))",
+                    (name,)
+                )
+            else:
+                self.cursor.execute(f"INSERT INTO {self.table} ({self.column}) VALUES (?)", (name,))
+            dimension_id = self.ids[name] = self.cursor.lastrowid
+            logging.debug(f"Added {name} to {self.table}")
+        return dimension_id
+
+def existing_tables(cursor):
+    """Return the set of table names present in the database."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return {row[0] for row in cursor.fetchall()}
+
+def prune_obsolete(cursor, table, child_tables, processed_names):
+    """Delete rows of `table` whose name was not processed, then every orphaned child row.
+
+    Runs inside the caller's transaction; nothing is committed here.
+    Returns the list of deleted names.
+    """
+    cursor.execute("DROP TABLE IF EXISTS temp.processed_names")
+    cursor.execute("CREATE TEMP TABLE processed_names (name TEXT PRIMARY KEY)")
+    cursor.executemany(
+        "INSERT OR IGNORE INTO temp.processed_names (name) VALUES (?)",
+        ((name,) for name in processed_names)
+    )
+
+    # Anti-join against the processed names
+    cursor.execute(f"""
+        SELECT t.name FROM {table} t
+        WHERE NOT EXISTS (SELECT 1 FROM temp.processed_names p WHERE p.name = t.name)
+    """)
+    deleted_names = [row[0] for row in cursor.fetchall()]
+    cursor.execute(f"""
+        DELETE FROM {table}
+        WHERE NOT EXISTS (SELECT 1 FROM temp.processed_names p WHERE p.name = {table}.name)
+    """)
+
+    # Remove child rows whose parent no longer exists (including older leftovers)
+    tables = existing_tables(cursor)
+    for child_table, fk_column in child_tables:
+        if child_table not in tables:
+            continue
+        cursor.execute(f"""
+            DELETE FROM {child_table}
+            WHERE NOT EXISTS (SELECT 1 FROM {table} p WHERE p.id = {child_table}.{fk_column})
+        """)
+        if cursor.rowcount:
+            logging.info(f"Removed {cursor.rowcount} orphaned rows from {child_table}")
+
+    cursor.execute("DROP TABLE temp.processed_names")
+    return deleted_names
+
+def _refresh_columns(cursor, table, derived, columns):
+    """Copy `columns` from the derived query (one row per owner_id) into `table` where they differ."""
+    assignments = ", ".join(f"{column} = d.{column}" for column in columns)
+    changed = " OR ".join(f"{table}.{column} IS NOT d.{column}" for column in columns)
+    cursor.execute(f"UPDATE {table} SET {assignments} FROM ({derived}) d WHERE d.owner_id = {table}.id AND ({changed})")
+    return cursor.rowcount
+
+def refresh_rarity_columns(cursor, table, rarity_table, fk_column):
+    """Recompute `table`.rarity_mask and min_rarity_rank from its rarity rows.
+
+    Bit rank - 1 of rarity_mask is set for every linked rarity (ranks come from
+    the rarities table, seeded from RARITY_ORDER); min_rarity_rank is NULL when
+    there are none. Only rows whose values change are written. Returns that count.
+    """
+    return _refresh_columns(cursor, table, f"""
+        SELECT t.id AS owner_id, COALESCE(r.mask, 0) AS rarity_mask, r.min_rank AS min_rarity_rank
+        FROM {table} t LEFT JOIN (
+            SELECT c.{fk_column} AS owner_id, SUM(DISTINCT 1 << (rarities.rank - 1)) AS mask,
+                   MIN(rarities.rank) AS min_rank
+            FROM {rarity_table} c JOIN rarities ON rarities.id = c.rarity_id
+            GROUP BY c.{fk_column}
+        ) r ON r.owner_id = t.id
+    """, ("rarity_mask", "min_rarity_rank"))
+
+def refresh_hero_columns(cursor, table, hero_table, fk_column):
+    """Recompute `table`.hero_count and is_neutral (no hero) from its hero rows. Returns the rows written."""
+    return _refresh_columns(cursor, table, f"""
+        SELECT t.id AS owner_id, COALESCE(h.heroes, 0) AS hero_count, h.heroes IS NULL AS is_neutral
+        FROM {table} t LEFT JOIN (
+            SELECT {fk_column} AS owner_id, COUNT(DISTINCT hero_id) AS heroes FROM {hero_table} GROUP BY {fk_column}
+        ) h ON h.owner_id = t.id
+    """, ("hero_count", "is_neutral"))
+
+def refresh_type_sort_key(cursor, table, type_table, fk_column):
+    """Recompute `table`.type_sort_key: the JSON array of its type names, as the types column shows them.
+
+    Returns the rows written.
+    """
+    return _refresh_columns(cursor, table, f"""
+        SELECT t.id AS owner_id, (
+            SELECT json_group_array(name) FROM (
+                SELECT DISTINCT types.name FROM {type_table} c JOIN types ON types.id = c.type_id
+                WHERE c.{fk_column} = t.id ORDER BY types.name COLLATE NOCASE
+            )
+        ) AS type_sort_key
+        FROM {table} t
+    """, ("type_sort_key",))
+
+def prune_effect_texts(cursor):
+    """Delete effect texts no longer referenced by any effect or enchantment row. Returns the count."""
+    tables = existing_tables(cursor)
+    references = [f"SELECT effect_id FROM {table}" for table in ("item_effects", "skill_effects", "enchantments")
+                  if table in tables]
+    cursor.execute(f"DELETE FROM effect_texts WHERE id NOT IN ({' UNION ALL '.join(references)})")
+    removed = cursor.rowcount
+    if removed:
+        logging.info(f"Removed {removed} unused effect texts")
+        if "effect_values" in tables:
+            cursor.execute("DELETE FROM effect_values WHERE effect_id NOT IN (SELECT id FROM effect_texts)")
+    return removed
+
+def refresh_effect_values(cursor):
+    """Parse the numeric values of every effect text that has none stored yet. Returns the rows added.
+
+    Texts without any value are parsed again on each run; there are only a few.
+    """
+    if "effect_values" not in existing_tables(cursor):
+        return 0
+    cursor.execute("SELECT id, text FROM effect_texts WHERE id NOT IN (SELECT effect_id FROM effect_values)")
+    rows = [(effect_id, *value) for effect_id, text in cursor.fetchall() for value in parse_effect_values(text)]
+    cursor.executemany(
+        "INSERT OR IGNORE INTO effect_values (effect_id, stat, tier, value, per_rarity) VALUES (?, ?, ?, ?, ?)", rows
+    )
+    return len(rows)
+
+def stamp_catalog_version(cursor):
+    """Write a new catalog version to PRAGMA user_version. Returns it.
+
+    Caches derived from the catalog (db/similarity.py) compare it to tell when to rebuild.
+    The stamp is random rather than a counter so a recreated database file never repeats
+    the version of the one it replaced.
+    """
+    version = random.randrange(1, 2 ** 31)
+    cursor.execute(f"PRAGMA user_version = {version}")
+    return version
+
+def optimize_database(conn):
+    """Run incremental vacuum (when enabled) and PRAGMA optimize.
+
+    Returns (reclaimed_pages, free_pages) where free_pages are pages still on the freelist.
+    """
+    cursor = conn.cursor()
+    page_count_before = cursor.execute("PRAGMA page_count").fetchone()[0]
+    auto_vacuum = cursor.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if auto_vacuum == 2:
+        # INCREMENTAL: return every free page to the filesystem. executescript steps the
+        # pragma to completion; a plain execute only frees a single page.
+        conn.executescript("PRAGMA incremental_vacuum;")
+    cursor.execute("PRAGMA optimize").fetchall()
+    conn.commit()
+    page_count_after = cursor.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+    return page_count_before - page_count_after, free_pages
@@ -3,6 +3,8 @@ from bs4 import BeautifulSoup
 import sqlite3
 import logging
 from datetime import datetime
+from utils.config import DATABASE_PATH
+from utils.ingest_utils import ITEM_CHILD_TABLES, ITEM_INDEXES, DimensionIds, create_indexes, create_dimension_tables, prune_obsolete, prune_effect_texts, refresh_effect_values, refresh_rarity_columns, refresh_hero_columns, refresh_type_sort_key, stamp_catalog_version, optimize_database
 
 # Configure logging
 logging.basicConfig(
@@ -14,66 +16,67 @@ logging.basicConfig(
     ]
 )
 
-# Define default enchantment effects for missing enchantments
-DEFAULT_ENCHANTMENTS = {
-    "Heavy": "None",
-    "Icy": "None",
-    "Turbo": "None",
-    "Shielded": "None",
-    "Restorative": "None",
-    "Toxic": "None",
-    "Fiery": "None",
-    "Shiny": "None",
-    "Deadly": "None",
-    "Radiant": "None",
-    "Obsidian": "None",
-    "Golden": "None",
-}
-
 # Function to create database and tables
-def create_database_items():
+def create_database_items(db_path=DATABASE_PATH):
     # Connect to SQLite database (creates file if not exists)
-    conn = sqlite3.connect("bazaar.db")
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
+
+    # Only takes effect on a new database file; lets obsolete pruning give pages back
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
     
     # Create items table with unique constraint on name
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS items (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL UNIQUE,
-            size TEXT NOT NULL
+            size TEXT NOT NULL,
+            -- Derived from the child rows by refresh_rarity_columns, refresh_hero_columns
+            -- and refresh_type_sort_key
+            rarity_mask INTEGER NOT NULL DEFAULT 0,
+            min_rarity_rank INTEGER,
+            hero_count INTEGER NOT NULL DEFAULT 0,
+            is_neutral INTEGER NOT NULL DEFAULT 1,
+            type_sort_key TEXT NOT NULL DEFAULT '[]'
         )
     """)
 
+    # Hero, type, rarity and effect text tables referenced by the child tables
+    create_dimension_tables(cursor)
+
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS item_heroes (
             item_id INTEGER,
-            hero TEXT NOT NULL,
-            FOREIGN KEY (item_id) REFERENCES items(id)
+            hero_id INTEGER NOT NULL,
+            FOREIGN KEY (item_id) REFERENCES items(id),
+            FOREIGN KEY (hero_id) REFERENCES heroes(id)
         )
     """)
     
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS item_types (
             item_id INTEGER,
-            type TEXT NOT NULL,
-            FOREIGN KEY (item_id) REFERENCES items(id)
+            type_id INTEGER NOT NULL,
+            FOREIGN KEY (item_id) REFERENCES items(id),
+            FOREIGN KEY (type_id) REFERENCES types(id)
         )
     """)
     
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS item_rarities (
             item_id INTEGER,
-            rarity TEXT NOT NULL,
-            FOREIGN KEY (item_id) REFERENCES items(id)
+            rarity_id INTEGER NOT NULL,
+            FOREIGN KEY (item_id) REFERENCES items(id),
+            FOREIGN KEY (rarity_id) REFERENCES rarities(id)
         )
     """)
     
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS item_effects (
             item_id INTEGER,
-            effect TEXT NOT NULL,
-            FOREIGN KEY (item_id) REFERENCES items(id)
+            effect_id INTEGER NOT NULL,
+            FOREIGN KEY (item_id) REFERENCES items(id),
+            FOREIGN KEY (effect_id) REFERENCES effect_texts(id)
         )
     """)
     
@@ -81,84 +84,122 @@ def create_database_items():
         CREATE TABLE IF NOT EXISTS enchantments (
             item_id INTEGER,
             enchantment_name TEXT NOT NULL,
-            enchantment_effect TEXT NOT NULL,
+            effect_id INTEGER NOT NULL,
             PRIMARY KEY (item_id, enchantment_name),
-            FOREIGN KEY (item_id) REFERENCES items(id)
+            FOREIGN KEY (item_id) REFERENCES items(id),
+            FOREIGN KEY (effect_id) REFERENCES effect_texts(id)
         )
     """)
+
+    # Covering indexes on the child tables
+    create_indexes(cursor, ITEM_INDEXES)
     
     conn.commit()
     conn.close()
 
-# Function to update database with new HTML data
-def update_items_from_html(html_file, delete_obsolete=False):
+# Function to read the name of an item card ("" without one)
+def item_name(item):
+    name_tag = item.find("p", class_="x1cabzks")
+    return name_tag.get_text(strip=True) if name_tag else ""
+
+# Function to extract one item card into a dict
+def parse_item(item):
+    # Extract item name
+    name = item_name(item)
+    if not name:
+        logging.warning("Skipping item with empty name")
+        return None
+
+    # Extract hero
+    hero_tag = item.find("p", class_="x2fl5vp x5gn1fm")
+    hero = hero_tag.get_text(strip=True) if hero_tag else ""
+
+    # Extract size and types
+    size_types = item.find_all("div", class_="x1x4sc3n x5gn1fm xmpun7n x19l6gds x1m59ps7 x78zum5 xl56j7k x6s0dn4 x1jnr06f x1xq1gxn xxk0z11")
+    size = size_types[0].get_text(strip=True) if size_types else ""
+    types = [t.get_text(strip=True) for t in size_types[1:]] if len(size_types) > 1 else []
+
+    # Extract rarities
+    rarity_group = item.find("div", role="radiogroup")
+    rarities = [label.find("div", class_="x2lah0s").get_text(strip=True) for label in rarity_group.find_all("label")] if rarity_group else []
+
+    # Extract effects
+    effects_list = item.find("ul", class_="x2fl5vp x5gn1fm x5tiur9 x1ghz6dp")
+    effects = [li.get_text(strip=True) for li in effects_list.find_all("li")] if effects_list else []
+
+    # Extract enchantments
+    enchantments = {}
+    potential_enc_divs = item.find_all("div", recursive=True)
+    for div in potential_enc_divs:
+        enc_name = div.find("span", class_="x19jf9pv x1g1qkmr x1db2dqx")
+        enc_effect = div.find("span", class_="x2fl5vp xqxvn2f")
+        if enc_name and enc_effect:
+            enc_name_text = enc_name.get_text(strip=True)
+            enc_effect_text = enc_effect.get_text(strip=True)
+            if enc_name_text not in enchantments:
+                enchantments[enc_name_text] = enc_effect_text
+                logging.debug(f"Found enchantment for {name}: {enc_name_text} - {enc_effect_text}")
+
+    return {
+        "name": name,
+        "hero": hero,
+        "size": size,
+        "types": types,
+        "rarities": rarities,
+        "effects": effects,
+        "enchantments": enchantments,
+    }
+
+# Function to parse every item card in an HTML file
+def parse_items_html(html_file):
     # Read HTML file
     try:
         with open(html_file, "r", encoding="utf-8") as file:
             soup = BeautifulSoup(file, "html.parser")
     except Exception as e:
         logging.error(f"Failed to read HTML file {html_file}: {e}")
-        return
+        return None
 
-    # Connect to database
-    conn = sqlite3.connect("bazaar.db")
+    # Find all item containers
+    item_containers = soup.find_all("div", class_="x6ac99c x1qhigcl x1n2onr6 x1n9hxaw x25l62i xiy17q3 x19l6gds xvrka61")
+    logging.info(f"Found {len(item_containers)} items in HTML")
+
+    items = []
+    for item in item_containers:
+        try:
+            parsed = parse_item(item)
+        except Exception as e:
+            name = item_name(item)
+            logging.error(f"Error parsing item {name}: {e}")
+            if name:
+                # The stored item is left as it is and is not pruned as obsolete
+                items.append({"name": name, "parse_failed": True})
+            continue
+        if parsed:
+            items.append(parsed)
+    return items
+
+# Function to write parsed items; the caller commits
+def store_items(conn, items, delete_obsolete=False):
     cursor = conn.cursor()
+    hero_ids = DimensionIds(cursor, "heroes")
+    type_ids = DimensionIds(cursor, "types")
+    rarity_ids = DimensionIds(cursor, "rarities")
+    effect_ids = DimensionIds(cursor, "effect_texts", "text")
 
     # Track processed item names for obsolete check
     processed_names = set()
     updated_count = 0
     inserted_count = 0
 
-    # Find all item containers
-    item_containers = soup.find_all("div", class_="x6ac99c x1qhigcl x1n2onr6 x1n9hxaw x25l62i xiy17q3 x19l6gds xvrka61")
-    logging.info(f"Found {len(item_containers)} items in HTML")
-
-    for item in item_containers:
+    for item in items:
+        name = item["name"]
+        processed_names.add(name)
+        if item.get("parse_failed"):
+            logging.warning(f"Keeping item {name} unchanged: its card could not be parsed")
+            continue
         try:
-            # Extract item name
-            name_tag = item.find("p", class_="x1cabzks")
-            name = name_tag.get_text(strip=True) if name_tag else ""
-            if not name:
-                logging.warning("Skipping item with empty name")
-                continue
-
-            processed_names.add(name)
-
-            # Extract hero
-            hero_tag = item.find("p", class_="x2fl5vp x5gn1fm")
-            hero = hero_tag.get_text(strip=True) if hero_tag else ""
-
-            # Extract size and types
-            size_types = item.find_all("div", class_="x1x4sc3n x5gn1fm xmpun7n x19l6gds x1m59ps7 x78zum5 xl56j7k x6s0dn4 x1jnr06f x1xq1gxn xxk0z11")
-            size = size_types[0].get_text(strip=True) if size_types else ""
-            types = [t.get_text(strip=True) for t in size_types[1:]] if len(size_types) > 1 else []
-
-            # Extract rarities
-            rarity_group = item.find("div", role="radiogroup")
-            rarities = [label.find("div", class_="x2lah0s").get_text(strip=True) for label in rarity_group.find_all("label")] if rarity_group else []
-
-            # Extract effects
-            effects_list = item.find("ul", class_="x2fl5vp x5gn1fm x5tiur9 x1ghz6dp")
-            effects = [li.get_text(strip=True) for li in effects_list.find_all("li")] if effects_list else []
-
-            # Extract enchantments
-            enchantments = {}
-            potential_enc_divs = item.find_all("div", recursive=True)
-            for div in potential_enc_divs:
-                enc_name = div.find("span", class_="x19jf9pv x1g1qkmr x1db2dqx")
-                enc_effect = div.find("span", class_="x2fl5vp xqxvn2f")
-                if enc_name and enc_effect:
-                    enc_name_text = enc_name.get_text(strip=True)
-                    enc_effect_text = enc_effect.get_text(strip=True).replace(",", " ")
-                    if enc_name_text not in enchantments:
-                        enchantments[enc_name_text] = enc_effect_text
-                        logging.debug(f"Found enchantment for {name}: {enc_name_text} - {enc_effect_text}")
-
-            # Ensure all enchantments are present
-            for enc_name in DEFAULT_ENCHANTMENTS:
-                if enc_name not in enchantments:
-                    enchantments[enc_name] = DEFAULT_ENCHANTMENTS[enc_name]
-                    logging.debug(f"Missing enchantment for {name}: {enc_name}. Using default: {DEFAULT_ENCHANTMENTS[enc_name]}")
+            size = item["size"]
 
             # Check if item exists
             cursor.execute("SELECT id, size FROM items WHERE name = ?", (name,))
@@ -186,36 +227,64 @@ def update_items_from_html(html_file, delete_obsolete=False):
                 logging.info(f"Inserted new item: {name}")
 
             # Insert related data
-            if hero:
-                cursor.execute("INSERT INTO item_heroes (item_id, hero) VALUES (?, ?)", (item_id, hero))
-            for type_name in types:
-                cursor.execute("INSERT INTO item_types (item_id, type) VALUES (?, ?)", (item_id, type_name))
-            for rarity in rarities:
-                cursor.execute("INSERT INTO item_rarities (item_id, rarity) VALUES (?, ?)", (item_id, rarity))
-            for effect in effects:
-                cursor.execute("INSERT INTO item_effects (item_id, effect) VALUES (?, ?)", (item_id, effect))
-            for enc_name, enc_effect in enchantments.items():
-                cursor.execute("INSERT INTO enchantments (item_id, enchantment_name, enchantment_effect) VALUES (?, ?, ?)",
-                              (item_id, enc_name, enc_effect))
+            if item["hero"]:
+                cursor.execute("INSERT INTO item_heroes (item_id, hero_id) VALUES (?, ?)",
+                               (item_id, hero_ids[item["hero"]]))
+            cursor.executemany("INSERT INTO item_types (item_id, type_id) VALUES (?, ?)",
+                               [(item_id, type_ids[type_name]) for type_name in item["types"]])
+            cursor.executemany("INSERT INTO item_rarities (item_id, rarity_id) VALUES (?, ?)",
+                               [(item_id, rarity_ids[rarity]) for rarity in item["rarities"]])
+            cursor.executemany("INSERT INTO item_effects (item_id, effect_id) VALUES (?, ?)",
+                               [(item_id, effect_ids[effect]) for effect in item["effects"]])
+            # Only the enchantments the item has; a missing one has no row
+            cursor.executemany("INSERT INTO enchantments (item_id, enchantment_name, effect_id) VALUES (?, ?, ?)",
+                               [(item_id, enc_name, effect_ids[enc_effect])
+                                for enc_name, enc_effect in item["enchantments"].items()])
 
         except Exception as e:
             logging.error(f"Error processing item {name}: {e}")
             conn.rollback()
+            for dimension in (hero_ids, type_ids, rarity_ids, effect_ids):
+                dimension.reload()
             continue
 
-    # Optional: Delete obsolete items
+    # Optional: Delete obsolete items and their related rows
     deleted_count = 0
     if delete_obsolete:
-        cursor.execute("SELECT id, name FROM items")
-        for item_id, name in cursor.fetchall():
-            if name not in processed_names:
-                cursor.execute("DELETE FROM items WHERE id = ?", (item_id,))
-                deleted_count += 1
-                logging.info(f"Deleted obsolete item: {name}")
+        for name in prune_obsolete(cursor, "items", ITEM_CHILD_TABLES, processed_names):
+            deleted_count += 1
+            logging.info(f"Deleted obsolete item: {name}")
+
+    # Derived columns of every item whose rarities, heroes or types changed
+    refresh_rarity_columns(cursor, "items", "item_rarities", "item_id")
+    refresh_hero_columns(cursor, "items", "item_heroes", "item_id")
+    refresh_type_sort_key(cursor, "items", "item_types", "item_id")
+
+    # Texts only the replaced effect and enchantment rows used
+    prune_effect_texts(cursor)
+    # Numeric values of the texts added by this run
+    refresh_effect_values(cursor)
+
+    # New catalog version: caches built from the catalog are rebuilt on next use
+    stamp_catalog_version(cursor)
+
+    return inserted_count, updated_count, deleted_count
+
+# Function to update database with new HTML data
+def update_items_from_html(html_file, delete_obsolete=False, db_path=DATABASE_PATH):
+    items = parse_items_html(html_file)
+    if items is None:
+        return
+
+    # Connect to database
+    conn = sqlite3.connect(db_path)
+    inserted_count, updated_count, deleted_count = store_items(conn, items, delete_obsolete)
 
     try:
         conn.commit()
-        logging.info(f"Update completed: {inserted_count} inserted, {updated_count} updated, {deleted_count} deleted")
+        reclaimed_pages, free_pages = optimize_database(conn)
+        logging.info(f"Update completed: {inserted_count} inserted, {updated_count} updated, {deleted_count} deleted, "
+                     f"{reclaimed_pages} pages reclaimed, {free_pages} free pages left")
     except Exception as e:
         logging.error(f"Failed to commit changes: {e}")
         conn.rollback()
@@ -5,6 +5,8 @@ import logging
 import re
 import os
 from datetime import datetime
+from utils.config import DATABASE_PATH
+from utils.ingest_utils import SKILL_CHILD_TABLES, SKILL_INDEXES, DimensionIds, create_indexes, create_dimension_tables, prune_obsolete, prune_effect_texts, refresh_effect_values, refresh_rarity_columns, refresh_type_sort_key, stamp_catalog_version, optimize_database
 
 # Set up logging
 logging.basicConfig(
@@ -17,26 +19,37 @@ logging.basicConfig(
 )
 
 # Function to create database and skill-related tables
-def create_database_skills():
+def create_database_skills(db_path=DATABASE_PATH):
     # Connect to SQLite database (creates file if not exists)
-    conn = sqlite3.connect("bazaar.db")
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
+
+    # Only takes effect on a new database file; lets obsolete pruning give pages back
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
     
     # Create skills table with unique constraint on name
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS skills (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL UNIQUE,
-            icon_url TEXT
+            icon_url TEXT,
+            -- Derived from the child rows by refresh_rarity_columns and refresh_type_sort_key
+            rarity_mask INTEGER NOT NULL DEFAULT 0,
+            min_rarity_rank INTEGER,
+            type_sort_key TEXT NOT NULL DEFAULT '[]'
         )
     """)
     
+    # Hero, type, rarity and effect text tables referenced by the child tables
+    create_dimension_tables(cursor)
+
     # Create skill_heroes table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS skill_heroes (
             skill_id INTEGER,
-            hero TEXT NOT NULL,
-            FOREIGN KEY (skill_id) REFERENCES skills(id)
+            hero_id INTEGER NOT NULL,
+            FOREIGN KEY (skill_id) REFERENCES skills(id),
+            FOREIGN KEY (hero_id) REFERENCES heroes(id)
         )
     """)
     
@@ -44,8 +57,9 @@ def create_database_skills():
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS skill_rarities (
             skill_id INTEGER,
-            rarity TEXT NOT NULL,
-            FOREIGN KEY (skill_id) REFERENCES skills(id)
+            rarity_id INTEGER NOT NULL,
+            FOREIGN KEY (skill_id) REFERENCES skills(id),
+            FOREIGN KEY (rarity_id) REFERENCES rarities(id)
         )
     """)
     
@@ -53,8 +67,9 @@ def create_database_skills():
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS skill_effects (
             skill_id INTEGER,
-            effect TEXT NOT NULL,
-            FOREIGN KEY (skill_id) REFERENCES skills(id)
+            effect_id INTEGER NOT NULL,
+            FOREIGN KEY (skill_id) REFERENCES skills(id),
+            FOREIGN KEY (effect_id) REFERENCES effect_texts(id)
         )
     """)
     
@@ -62,10 +77,14 @@ def create_database_skills():
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS skill_types (
             skill_id INTEGER,
-            type TEXT NOT NULL,
-            FOREIGN KEY (skill_id) REFERENCES skills(id)
+            type_id INTEGER NOT NULL,
+            FOREIGN KEY (skill_id) REFERENCES skills(id),
+            FOREIGN KEY (type_id) REFERENCES types(id)
         )
     """)
+
+    # Covering indexes on the child tables
+    create_indexes(cursor, SKILL_INDEXES)
     
     # Commit changes and close connection
     conn.commit()
@@ -80,16 +99,78 @@ def clean_effect_text(effect_html):
     text = re.sub(r'\s+', ' ', text).strip()
     return text
 
-# Function to update database with new HTML data
-def update_skills_from_html(html_files, monster_html_file=None, delete_obsolete=False):
-    # Connect to database
-    conn = sqlite3.connect("bazaar.db")
-    cursor = conn.cursor()
-
-    # Track processed skill names for obsolete check
-    processed_names = set()
-    updated_count = 0
-    inserted_count = 0
+# Function to read the skill name of a wiki table row ("" without one)
+def wiki_skill_name(row):
+    cols = row.find_all("td")
+    link = cols[1].find("a") if len(cols) >= 5 else None
+    return link.get_text(strip=True) if link else ""
+
+# Function to extract one row of the wiki skill table
+def parse_wiki_skill_row(row):
+    cols = row.find_all("td")
+    if len(cols) < 5:
+        return None
+
+    # Extract name
+    name = wiki_skill_name(row)
+    if not name:
+        logging.warning("Skipping skill with empty name")
+        return None
+
+    # Extract icon URL
+    img_tag = cols[0].find("img")
+    icon_url = img_tag["src"] if img_tag and "src" in img_tag.attrs else ""
+    if icon_url.startswith("/images/"):
+        icon_url = f"https://thebazaar.wiki{icon_url.split('?')[0]}"
+
+    # Extract effect
+    effect_html = str(cols[2])
+    effect = clean_effect_text(effect_html)
+
+    # Extract types
+    types_html = cols[4]
+    types = [font.get_text(strip=True) for font in types_html.find_all("font", color="#9aabff")]
+    types = [t.replace("Reference", "").replace("SLow", "Slow").strip() for t in types]
+
+    return {"source": "wiki", "name": name, "icon_url": icon_url, "effect": effect, "types": types}
+
+# Function to read the name of a mobalytics skill card ("" without one)
+def mobalytics_skill_name(skill):
+    name_tag = skill.find("p", class_="x1cabzks")
+    return name_tag.get_text(strip=True) if name_tag else ""
+
+# Function to extract one mobalytics skill card
+def parse_mobalytics_skill(skill):
+    # Extract skill name
+    name = mobalytics_skill_name(skill)
+    if not name:
+        logging.warning("Skipping skill with empty name")
+        return None
+
+    # Extract icon URL
+    icon_tag = skill.find("img", class_="x19kjcj4")
+    icon_url = icon_tag["src"] if icon_tag and "src" in icon_tag.attrs else ""
+
+    # Extract heroes
+    hero_tag = skill.find("p", class_="x2fl5vp x5gn1fm")
+    hero_text = hero_tag.get_text(strip=True) if hero_tag else ""
+    heroes = [h.strip() for h in hero_text.split(",") if h.strip()] if hero_text else []
+
+    # Extract rarities
+    rarity_group = skill.find("div", role="radiogroup")
+    rarities = [label.find("div", class_="x2lah0s").get_text(strip=True) 
+               for label in rarity_group.find_all("label")] if rarity_group else []
+
+    # Extract effects
+    effects_list = skill.find("ul", class_="x2fl5vp x5gn1fm x5tiur9 x1ghz6dp")
+    effects = [li.get_text(strip=True) for li in effects_list.find_all("li")] if effects_list else []
+
+    return {"source": "mobalytics", "name": name, "icon_url": icon_url, "heroes": heroes,
+            "rarities": rarities, "effects": effects}
+
+# Function to parse skill and monster HTML files into skill records
+def parse_skills_html(html_files, monster_html_file=None):
+    skills = []
 
     # Process skill HTML files
     for html_file in html_files:
@@ -104,7 +185,7 @@ def update_skills_from_html(html_files, monster_html_file=None, delete_obsolete=
             logging.error(f"Failed to read HTML file {html_file}: {e}")
             continue
 
-        is_wiki_file = "./var/skill_w_types.html" in html_file
+        is_wiki_file = os.path.basename(html_file) == "skill_w_types.html"
         logging.info(f"Parsing {'wiki' if is_wiki_file else 'mobalytics'} file: {html_file}")
 
         if is_wiki_file:
@@ -113,156 +194,26 @@ def update_skills_from_html(html_files, monster_html_file=None, delete_obsolete=
             if not skill_table:
                 logging.error(f"No skill table found in {html_file}")
                 continue
-
-            skill_rows = skill_table.find("tbody").find_all("tr")
-            for row in skill_rows:
-                try:
-                    cols = row.find_all("td")
-                    if len(cols) < 5:
-                        continue
-
-                    # Extract name
-                    name = cols[1].find("a").get_text(strip=True) if cols[1].find("a") else ""
-                    if not name:
-                        logging.warning("Skipping skill with empty name")
-                        continue
-
-                    processed_names.add(name)
-                    logging.info(f"Processing skill: {name}")
-
-                    # Extract icon URL
-                    img_tag = cols[0].find("img")
-                    icon_url = img_tag["src"] if img_tag and "src" in img_tag.attrs else ""
-                    if icon_url.startswith("/images/"):
-                        icon_url = f"https://thebazaar.wiki{icon_url.split('?')[0]}"
-
-                    # Extract effect
-                    effect_html = str(cols[2])
-                    effect = clean_effect_text(effect_html)
-
-                    # Extract types
-                    types_html = cols[4]
-                    types = [font.get_text(strip=True) for font in types_html.find_all("font", color="#9aabff")]
-
-                    # Check if skill exists
-                    cursor.execute("SELECT id, icon_url FROM skills WHERE name = ?", (name,))
-                    existing_skill = cursor.fetchone()
-
-                    if existing_skill:
-                        # Update existing skill
-                        skill_id, old_icon_url = existing_skill
-                        update_fields = []
-                        update_params = []
-                        if old_icon_url != icon_url:
-                            update_fields.append("icon_url = ?")
-                            update_params.append(icon_url)
-                        if update_fields:
-                            update_params.append(skill_id)
-                            cursor.execute(f"UPDATE skills SET {', '.join(update_fields)} WHERE id = ?", update_params)
-                            logging.info(f"Updated skill {name}: {', '.join(update_fields)}")
-                        updated_count += 1
-
-                        # Delete old related data
-                        cursor.execute("DELETE FROM skill_effects WHERE skill_id = ?", (skill_id,))
-                        cursor.execute("DELETE FROM skill_types WHERE skill_id = ?", (skill_id,))
-                    else:
-                        # Insert new skill
-                        cursor.execute("INSERT INTO skills (name, icon_url) VALUES (?, ?)", 
-                                     (name, icon_url))
-                        skill_id = cursor.lastrowid
-                        inserted_count += 1
-                        logging.info(f"Inserted new skill: {name}")
-
-                    # Insert related data
-                    if effect:
-                        cursor.execute("INSERT INTO skill_effects (skill_id, effect) VALUES (?, ?)", (skill_id, effect))
-                        logging.info(f"Added effect for skill {name}: {effect}")
-                    for skill_type in types:
-                        skill_type = skill_type.replace("Reference", "").replace("SLow", "Slow").strip()
-                        cursor.execute("INSERT OR IGNORE INTO skill_types (skill_id, type) VALUES (?, ?)", 
-                                     (skill_id, skill_type))
-                        logging.info(f"Added type for skill {name}: {skill_type}")
-
-                except Exception as e:
-                    logging.error(f"Error processing skill {name}: {e}")
-                    conn.rollback()
-                    continue
-
+            entries, parse_entry, entry_name = skill_table.find("tbody").find_all("tr"), parse_wiki_skill_row, wiki_skill_name
+            source = "wiki"
         else:
             # Parse skill_data.html (mobalytics format)
-            skill_containers = soup.find_all("div", class_="x6ac99c x1qhigcl x1n2onr6 x1n9hxaw x25l62i xiy17q3 x19l6gds xvrka61")
-            for skill in skill_containers:
-                try:
-                    # Extract skill name
-                    name_tag = skill.find("p", class_="x1cabzks")
-                    name = name_tag.get_text(strip=True) if name_tag else ""
-                    if not name:
-                        logging.warning("Skipping skill with empty name")
-                        logging.info(name_tag)
-                        continue
-
-                    processed_names.add(name)
-                    logging.info(f"Processing skill: {name}")
-
-                    # Extract icon URL
-                    icon_tag = skill.find("img", class_="x19kjcj4")
-                    icon_url = icon_tag["src"] if icon_tag and "src" in icon_tag.attrs else ""
-
-                    # Extract heroes
-                    hero_tag = skill.find("p", class_="x2fl5vp x5gn1fm")
-                    hero_text = hero_tag.get_text(strip=True) if hero_tag else ""
-                    heroes = [h.strip() for h in hero_text.split(",") if h.strip()] if hero_text else []
-
-                    # Extract rarities
-                    rarity_group = skill.find("div", role="radiogroup")
-                    rarities = [label.find("div", class_="x2lah0s").get_text(strip=True) 
-                               for label in rarity_group.find_all("label")] if rarity_group else []
-
-                    # Extract effects
-                    effects_list = skill.find("ul", class_="x2fl5vp x5gn1fm x5tiur9 x1ghz6dp")
-                    effects = [li.get_text(strip=True) for li in effects_list.find_all("li")] if effects_list else []
-
-                    # Check if skill exists
-                    cursor.execute("SELECT id, icon_url FROM skills WHERE name = ?", (name,))
-                    existing_skill = cursor.fetchone()
-
-                    if existing_skill:
-                        # Update existing skill
-                        skill_id, old_icon_url = existing_skill
-                        if old_icon_url != icon_url:
-                            cursor.execute("UPDATE skills SET icon_url = ? WHERE id = ?", (icon_url, skill_id))
-                            logging.info(f"Updated icon_url for skill {name}: {old_icon_url} -> {icon_url}")
-                        updated_count += 1
-
-                        # Delete old related data
-                        cursor.execute("DELETE FROM skill_heroes WHERE skill_id = ?", (skill_id,))
-                        cursor.execute("DELETE FROM skill_rarities WHERE skill_id = ?", (skill_id,))
-                        cursor.execute("DELETE FROM skill_effects WHERE skill_id = ?", (skill_id,))
-                    else:
-                        # Insert new skill
-                        cursor.execute("INSERT INTO skills (name, icon_url) VALUES (?, ?)", (name, icon_url))
-                        skill_id = cursor.lastrowid
-                        inserted_count += 1
-                        logging.info(f"Inserted new skill: {name}")
-
-                    # Insert related data
-                    for hero in heroes:
-                        cursor.execute("INSERT OR IGNORE INTO skill_heroes (skill_id, hero) VALUES (?, ?)", 
-                                     (skill_id, hero))
-                        logging.info(f"Associated hero with skill {name}: {hero}")
-                    for rarity in rarities:
-                        cursor.execute("INSERT OR IGNORE INTO skill_rarities (skill_id, rarity) VALUES (?, ?)", 
-                                     (skill_id, rarity))
-                        logging.info(f"Added rarity for skill {name}: {rarity}")
-                    for effect in effects:
-                        cursor.execute("INSERT INTO skill_effects (skill_id, effect) VALUES (?, ?)", 
-                                     (skill_id, effect))
-                        logging.info(f"Added effect for skill {name}: {effect}")
-
-                except Exception as e:
-                    logging.error(f"Error processing skill {name}: {e}")
-                    conn.rollback()
-                    continue
+            entries = soup.find_all("div", class_="x6ac99c x1qhigcl x1n2onr6 x1n9hxaw x25l62i xiy17q3 x19l6gds xvrka61")
+            parse_entry, entry_name = parse_mobalytics_skill, mobalytics_skill_name
+            source = "mobalytics"
+
+        for entry in entries:
+            try:
+                parsed = parse_entry(entry)
+            except Exception as e:
+                name = entry_name(entry)
+                logging.error(f"Error parsing skill {name}: {e}")
+                if name:
+                    # The stored skill is left as it is and is not pruned as obsolete
+                    skills.append({"source": source, "name": name, "parse_failed": True})
+                continue
+            if parsed:
+                skills.append(parsed)
 
     # Process monster skills
     if monster_html_file and os.path.exists(monster_html_file):
@@ -279,54 +230,153 @@ def update_skills_from_html(html_files, monster_html_file=None, delete_obsolete=
                 count = 0
                 skill_rows = skill_table.find("tbody").find_all("tr")
                 for row in skill_rows:
-                    try:
-                        cols = row.find_all("td")
-                        if len(cols) < 5:
-                            continue
-
-                        # Extract name
-                        name = cols[1].find("a").get_text(strip=True) if cols[1].find("a") else ""
-                        if not name:
-                            logging.warning("Skipping monster skill with empty name")
-                            continue
-
-                        processed_names.add(name)
-                        logging.info(f"Processing monster skill: {name}")
-
-                        # Check if skill exists
-                        cursor.execute("SELECT id FROM skills WHERE name = ?", (name,))
-                        skill_id = cursor.fetchone()
-                        if skill_id:
-                            skill_id = skill_id[0]
-                            cursor.execute("INSERT OR IGNORE INTO skill_heroes (skill_id, hero) VALUES (?, ?)", 
-                                         (skill_id, "Monster"))
-                            logging.info(f"Marked skill {name} as associated with 'Monster'")
-                            updated_count += 1
-                        else:
-                            logging.warning(f"Skill {name} not found in skills table, skipping monster association")
-
-                        count += 1
-                    except Exception as e:
-                        logging.error(f"Error processing monster skill {name}: {e}")
-                        conn.rollback()
+                    cols = row.find_all("td")
+                    if len(cols) < 5:
+                        continue
+
+                    # Extract name
+                    name = cols[1].find("a").get_text(strip=True) if cols[1].find("a") else ""
+                    if not name:
+                        logging.warning("Skipping monster skill with empty name")
                         continue
 
+                    skills.append({"source": "monster", "name": name})
+                    count += 1
+
                 logging.info(f"Total monster skills processed: {count}")
 
-    # Optional: Delete obsolete skills
+    return skills
+
+# Function to write parsed skill records; the caller commits
+def store_skills(conn, skills, delete_obsolete=False):
+    cursor = conn.cursor()
+    hero_ids = DimensionIds(cursor, "heroes")
+    type_ids = DimensionIds(cursor, "types")
+    rarity_ids = DimensionIds(cursor, "rarities")
+    effect_ids = DimensionIds(cursor, "effect_texts", "text")
+
+    # Track processed skill names for obsolete check
+    processed_names = set()
+    updated_count = 0
+    inserted_count = 0
+
+    for skill in skills:
+        name = skill["name"]
+        processed_names.add(name)
+        if skill.get("parse_failed"):
+            logging.warning(f"Keeping skill {name} unchanged: its {skill['source']} entry could not be parsed")
+            continue
+        try:
+            logging.info(f"Processing {'monster ' if skill['source'] == 'monster' else ''}skill: {name}")
+
+            if skill["source"] == "monster":
+                # Check if skill exists
+                cursor.execute("SELECT id FROM skills WHERE name = ?", (name,))
+                skill_id = cursor.fetchone()
+                if skill_id:
+                    skill_id = skill_id[0]
+                    cursor.execute("INSERT OR IGNORE INTO skill_heroes (skill_id, hero_id) VALUES (?, ?)", 
+                                 (skill_id, hero_ids["Monster"]))
+                    logging.info(f"Marked skill {name} as associated with 'Monster'")
+                    updated_count += 1
+                else:
+                    logging.warning(f"Skill {name} not found in skills table, skipping monster association")
+                continue
+
+            # Check if skill exists
+            icon_url = skill["icon_url"]
+            cursor.execute("SELECT id, icon_url FROM skills WHERE name = ?", (name,))
+            existing_skill = cursor.fetchone()
+
+            if existing_skill:
+                # Update existing skill
+                skill_id, old_icon_url = existing_skill
+                if old_icon_url != icon_url:
+                    cursor.execute("UPDATE skills SET icon_url = ? WHERE id = ?", (icon_url, skill_id))
+                    logging.info(f"Updated icon_url for skill {name}: {old_icon_url} -> {icon_url}")
+                updated_count += 1
+
+                # Delete old related data
+                if skill["source"] == "wiki":
+                    cursor.execute("DELETE FROM skill_effects WHERE skill_id = ?", (skill_id,))
+                    cursor.execute("DELETE FROM skill_types WHERE skill_id = ?", (skill_id,))
+                else:
+                    cursor.execute("DELETE FROM skill_heroes WHERE skill_id = ?", (skill_id,))
+                    cursor.execute("DELETE FROM skill_rarities WHERE skill_id = ?", (skill_id,))
+                    cursor.execute("DELETE FROM skill_effects WHERE skill_id = ?", (skill_id,))
+            else:
+                # Insert new skill
+                cursor.execute("INSERT INTO skills (name, icon_url) VALUES (?, ?)", (name, icon_url))
+                skill_id = cursor.lastrowid
+                inserted_count += 1
+                logging.info(f"Inserted new skill: {name}")
+
+            # Insert related data
+            if skill["source"] == "wiki":
+                if skill["effect"]:
+                    cursor.execute("INSERT INTO skill_effects (skill_id, effect_id) VALUES (?, ?)",
+                                   (skill_id, effect_ids[skill["effect"]]))
+                    logging.info(f"Added effect for skill {name}: {skill['effect']}")
+                for skill_type in skill["types"]:
+                    cursor.execute("INSERT OR IGNORE INTO skill_types (skill_id, type_id) VALUES (?, ?)", 
+                                 (skill_id, type_ids[skill_type]))
+                    logging.info(f"Added type for skill {name}: {skill_type}")
+            else:
+                for hero in skill["heroes"]:
+                    cursor.execute("INSERT OR IGNORE INTO skill_heroes (skill_id, hero_id) VALUES (?, ?)", 
+                                 (skill_id, hero_ids[hero]))
+                    logging.info(f"Associated hero with skill {name}: {hero}")
+                for rarity in skill["rarities"]:
+                    cursor.execute("INSERT OR IGNORE INTO skill_rarities (skill_id, rarity_id) VALUES (?, ?)", 
+                                 (skill_id, rarity_ids[rarity]))
+                    logging.info(f"Added rarity for skill {name}: {rarity}")
+                for effect in skill["effects"]:
+                    cursor.execute("INSERT INTO skill_effects (skill_id, effect_id) VALUES (?, ?)", 
+                                 (skill_id, effect_ids[effect]))
+                    logging.info(f"Added effect for skill {name}: {effect}")
+
+        except Exception as e:
+            logging.error(f"Error processing skill {name}: {e}")
+            conn.rollback()
+            for dimension in (hero_ids, type_ids, rarity_ids, effect_ids):
+                dimension.reload()
+            continue
+
+    # Optional: Delete obsolete skills and their related rows
     deleted_count = 0
     if delete_obsolete:
-        cursor.execute("SELECT id, name FROM skills")
-        for skill_id, name in cursor.fetchall():
-            if name not in processed_names:
-                cursor.execute("DELETE FROM skills WHERE id = ?", (skill_id,))
-                deleted_count += 1
-                logging.info(f"Deleted obsolete skill: {name}")
+        for name in prune_obsolete(cursor, "skills", SKILL_CHILD_TABLES, processed_names):
+            deleted_count += 1
+            logging.info(f"Deleted obsolete skill: {name}")
+
+    # Derived columns of every skill whose rarities or types changed
+    refresh_rarity_columns(cursor, "skills", "skill_rarities", "skill_id")
+    refresh_type_sort_key(cursor, "skills", "skill_types", "skill_id")
+
+    # Texts only the replaced effect rows used
+    prune_effect_texts(cursor)
+    # Numeric values of the texts added by this run
+    refresh_effect_values(cursor)
+
+    # New catalog version: caches built from the catalog are rebuilt on next use
+    stamp_catalog_version(cursor)
+
+    return inserted_count, updated_count, deleted_count
+
+# Function to update database with new HTML data
+def update_skills_from_html(html_files, monster_html_file=None, delete_obsolete=False, db_path=DATABASE_PATH):
+    skills = parse_skills_html(html_files, monster_html_file)
+
+    # Connect to database
+    conn = sqlite3.connect(db_path)
+    inserted_count, updated_count, deleted_count = store_skills(conn, skills, delete_obsolete)
 
     # Commit changes
     try:
         conn.commit()
-        logging.info(f"Update completed: {inserted_count} inserted, {updated_count} updated, {deleted_count} deleted")
+        reclaimed_pages, free_pages = optimize_database(conn)
+        logging.info(f"Update completed: {inserted_count} inserted, {updated_count} updated, {deleted_count} deleted, "
+                     f"{reclaimed_pages} pages reclaimed, {free_pages} free pages left")
     except Exception as e:
         logging.error(f"Failed to commit changes: {e}")
         conn.rollback()